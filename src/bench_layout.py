@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Layout Benchmark
+Times each Graphviz layout engine on synthetic schemas of increasing size
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from diagram_renderer import LAYOUT_ENGINES, choose_layout_engine, engine_attributes, layout_command
+from graphviz_erd import GraphvizERDGenerator
+from synthetic_schema import synthetic_schema
+
+def time_layout(source: str, engine: str, timeout: float, work_dir: Path) -> float:
+    """Seconds engine needs to lay out source (positioned DOT output only), None on timeout"""
+    source_path = work_dir / f"graph_{engine}.gv"
+    layout_path = work_dir / f"layout_{engine}.gv"
+    source_path.write_text(source, encoding='utf-8')
+    start = time.perf_counter()
+    try:
+        subprocess.run(layout_command(engine, source_path, layout_path),
+                       capture_output=True, text=True, check=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    return time.perf_counter() - start
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Time Graphviz layout engines on synthetic schemas")
+    parser.add_argument('--sizes', default='50,100,200,400,800,1600',
+                        help="Comma separated table counts (default 50,100,200,400,800,1600)")
+    parser.add_argument('--engines', default=','.join(LAYOUT_ENGINES),
+                        help=f"Comma separated engines (default {','.join(LAYOUT_ENGINES)})")
+    parser.add_argument('--fks-per-table', type=float, default=1.5,
+                        help="Average foreign keys per table (default 1.5)")
+    parser.add_argument('--timeout', type=float, default=120,
+                        help="Seconds before a layout is reported as timed out (default 120)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    engines = [engine.strip() for engine in args.engines.split(',') if engine.strip()]
+    unknown = [engine for engine in engines if engine not in LAYOUT_ENGINES]
+    if unknown:
+        print(f"Error: Unknown layout engines: {', '.join(unknown)}")
+        return 1
+
+    print(f"{'tables':>7} {'edges':>7} {'auto':>6} " + ' '.join(f"{engine:>9}" for engine in engines))
+    with tempfile.TemporaryDirectory(prefix='erd_bench_') as tmp_dir:
+        for size in sizes:
+            schema_data = synthetic_schema(size, fks_per_table=args.fks_per_table)
+            generator = GraphvizERDGenerator(schema_data)
+            dot = generator.new_digraph()
+            for table_name, table_data in schema_data['tables'].items():
+                generator.add_table(dot, table_name, table_data['columns'])
+            generator.add_relationships(dot)
+
+            cells = []
+            for engine in engines:
+                graph = dot.copy()
+                graph.attr(**engine_attributes(engine, generator.table_count))
+                elapsed = time_layout(graph.source, engine, args.timeout, Path(tmp_dir))
+                cells.append(f"{'timeout':>9}" if elapsed is None else f"{elapsed:>8.2f}s")
+            auto_engine = choose_layout_engine(generator.table_count, generator.edge_count)
+            print(f"{generator.table_count:>7} {generator.edge_count:>7} {auto_engine:>6} " + ' '.join(cells))
+            sys.stdout.flush()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+Times and memory-profiles each generation stage on synthetic schemas, without a database
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from compact_schema import write_compact_schema
+from emitters import ERDEmitter, MarkdownEmitter, SnapshotEmitter, emit_schema
+from erd_generator import ERDGenerator
+from graphviz_erd import GraphvizERDGenerator
+from markdown_converter import MarkdownConverter
+from schema_snapshot import SNAPSHOT_SUFFIX
+from synthetic_schema import synthetic_schema
+
+# emit: the single emit_schema pass of main.emit_stage (.er, Markdown and snapshot);
+# md-reparse: the standalone converter re-parsing a .er file (markdown_converter.py)
+STAGES = ('erd', 'emit', 'md-reparse', 'compact', 'dot', 'render')
+DEFAULT_THRESHOLD = 1.25
+
+def _build_digraph(schema_data: Dict[str, Any]):
+    """DOT construction stage: the Graphviz generator and its populated digraph"""
+    generator = GraphvizERDGenerator(schema_data)
+    dot = generator.new_digraph()
+    for table_name, table_data in schema_data['tables'].items():
+        generator.add_table(dot, table_name, table_data['columns'])
+    generator.add_relationships(dot)
+    return generator, dot
+
+def measure(stage: Callable[[], int], repeat: int) -> Dict[str, Any]:
+    """Run stage repeat times; timings exclude tracing, the peak comes from one traced run
+
+    stage returns the size in bytes of what it produced. Its progress output is
+    discarded so that printing does not count towards the timings.
+    """
+    timings = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output_bytes = stage()
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            stage()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        'seconds_min': round(min(timings), 6),
+        'seconds_median': round(statistics.median(timings), 6),
+        'peak_kib': round(peak / 1024, 1),
+        'output_bytes': output_bytes,
+    }
+
+def benchmark_size(schema_data: Dict[str, Any], stages: List[str], repeat: int,
+                   work_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Measure every requested stage for one schema; later stages reuse earlier outputs"""
+    erd_path = work_dir / 'bench.er'
+    markdown_path = work_dir / 'bench.md'
+    snapshot_path = work_dir / f"bench{SNAPSHOT_SUFFIX}"
+    compact_path = work_dir / 'bench.schema.txt'
+    diagram_path = work_dir / 'bench.pdf'
+
+    def erd_stage() -> int:
+        ERDGenerator(schema_data).generate_erd_file(erd_path)
+        return erd_path.stat().st_size
+
+    def emit_stage() -> int:
+        # The emitters main.emit_stage uses with the default configuration
+        emitters = [ERDEmitter(erd_path), MarkdownEmitter(markdown_path), SnapshotEmitter(snapshot_path)]
+        outputs = emit_schema(schema_data, schema_data['tables'].items(), emitters)
+        return sum(path.stat().st_size for path in outputs.values())
+
+    def markdown_reparse_stage() -> int:
+        MarkdownConverter().convert_erd_to_markdown(erd_path, markdown_path)
+        return markdown_path.stat().st_size
+
+    def compact_stage() -> int:
+        with open(compact_path, 'w', encoding='utf-8') as f:
+            write_compact_schema(schema_data, f)
+        return compact_path.stat().st_size
+
+    def dot_stage() -> int:
+        _, dot = _build_digraph(schema_data)
+        return len(dot.source.encode('utf-8'))
+
+    def render_stage() -> int:
+        generator, dot = _build_digraph(schema_data)
+        generator.render(dot, diagram_path)
+        return diagram_path.stat().st_size
+
+    runners = {'erd': erd_stage, 'emit': emit_stage, 'md-reparse': markdown_reparse_stage,
+               'compact': compact_stage, 'dot': dot_stage, 'render': render_stage}
+    results = {}
+    for stage in stages:
+        if stage == 'md-reparse' and not erd_path.exists():
+            # The converter reads the .er file, so produce it untimed
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                erd_stage()
+        results[stage] = measure(runners[stage], repeat)
+    return results
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print time ratios against a baseline run and return the regressions above threshold"""
+    if baseline.get('parameters') != results['parameters']:
+        print("Warning: Baseline was run with different parameters; ratios may not be comparable")
+    baseline_runs = {run['tables']: run['stages'] for run in baseline.get('runs', [])}
+    regressions = []
+    print(f"\n{'tables':>7} {'stage':>10} {'baseline':>10} {'current':>10} {'ratio':>6}")
+    for run in results['runs']:
+        for stage, current in run['stages'].items():
+            previous = baseline_runs.get(run['tables'], {}).get(stage)
+            if not previous or not previous['seconds_min']:
+                continue
+            ratio = current['seconds_min'] / previous['seconds_min']
+            marker = ' !' if ratio > threshold else ''
+            print(f"{run['tables']:>7} {stage:>10} {previous['seconds_min']:>9.4f}s "
+                  f"{current['seconds_min']:>9.4f}s {ratio:>5.2f}x{marker}")
+            if ratio > threshold:
+                regressions.append(f"{stage} at {run['tables']} tables ({ratio:.2f}x)")
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark ERD generation stages on synthetic schemas")
+    parser.add_argument('--sizes', default='100,500,1000',
+                        help="Comma separated table counts (default 100,500,1000)")
+    parser.add_argument('--columns', type=int, default=8, help="Columns per table (default 8)")
+    parser.add_argument('--fks-per-table', type=float, default=1.5,
+                        help="Average foreign keys per table (default 1.5)")
+    parser.add_argument('--comment-length', type=int, default=16,
+                        help="Characters per column comment (default 16)")
+    parser.add_argument('--multibyte', action='store_true', help="Use Japanese column comments")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the synthetic schemas (default 0)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage (default 3)")
+    parser.add_argument('--render', action='store_true',
+                        help="Also time Graphviz rendering (requires the dot binary)")
+    parser.add_argument('--output', type=Path, help="Write the results as JSON to this file")
+    parser.add_argument('--compare', type=Path, help="Baseline JSON from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Slowdown ratio reported as a regression (default {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    stages = [stage for stage in STAGES if stage != 'render' or args.render]
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'columns_per_table': args.columns,
+            'fks_per_table': args.fks_per_table,
+            'comment_length': args.comment_length,
+            'multibyte': args.multibyte,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'runs': [],
+    }
+
+    print(f"{'tables':>7} {'stage':>10} {'min':>10} {'median':>10} {'peak':>10} {'output':>10}")
+    with tempfile.TemporaryDirectory(prefix='erd_benchmark_') as tmp_dir:
+        for size in sizes:
+            schema_data = synthetic_schema(size, columns_per_table=args.columns,
+                                           fks_per_table=args.fks_per_table,
+                                           comment_length=args.comment_length,
+                                           multibyte=args.multibyte, seed=args.seed)
+            stage_results = benchmark_size(schema_data, stages, max(1, args.repeat), Path(tmp_dir))
+            results['runs'].append({'tables': size, 'relationships': len(schema_data['relationships']),
+                                    'stages': stage_results})
+            for stage, result in stage_results.items():
+                print(f"{size:>7} {stage:>10} {result['seconds_min']:>9.4f}s {result['seconds_median']:>9.4f}s "
+                      f"{result['peak_kib']:>7.0f}KiB {result['output_bytes']:>10}")
+            sys.stdout.flush()
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+        print(f"Results written: {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions above {args.threshold:.2f}x: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
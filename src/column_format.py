@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Column Format
+Wording of column types, constraints and relationships shared by the .er labels and the Markdown outputs
+"""
+
+from typing import Collection, List, Tuple
+from schema_graph import RelationshipCollector
+from schema_model import Column
+
+def column_cardinality(column: Column) -> str:
+    """ERD cardinality symbol of a column"""
+    if column.is_primary_key:
+        return '*'  # Primary key
+    elif not column.is_nullable:
+        return '+'  # Required field (1 or more)
+    else:
+        return ''   # Optional field (0 or more)
+
+def format_data_type(column: Column) -> str:
+    """Data type with length/precision, e.g. varchar(255), decimal(10,2), datetime(3)"""
+    data_type = column.data_type
+    if column.max_length:
+        data_type += f"({column.max_length})"
+    elif column.precision and column.scale:
+        data_type += f"({column.precision},{column.scale})"
+    elif column.precision:
+        data_type += f"({column.precision})"
+    elif column.datetime_precision:
+        data_type += f"({column.datetime_precision})"
+    return data_type
+
+def column_constraints(column: Column, foreign_key_columns: Collection[str] = ()) -> List[str]:
+    """Constraint keywords of a column in label order
+
+    foreign_key_columns names the columns of the table that belong to a foreign
+    key (see RelationshipCollector.fk_columns); COLUMN_KEY 'MUL' only marks the
+    first column of a non-unique index and says nothing about foreign keys.
+    """
+    constraints = []
+
+    if column.is_auto_increment:
+        constraints.append('auto_increment')
+
+    if column.is_primary_key:
+        constraints.append('primary key')
+    elif column.is_unique:
+        constraints.append('unique')
+
+    if column.name in foreign_key_columns:
+        constraints.append('foreign key')
+
+    if not column.is_nullable:
+        constraints.append('not null')
+
+    if column.default is not None:
+        default_value = column.default
+        if default_value == 'CURRENT_TIMESTAMP':
+            constraints.append('default current_timestamp')
+        else:
+            constraints.append(f"default {default_value}")
+
+    return constraints
+
+def column_comment(column: Column) -> str:
+    """Stripped column comment (may be empty)"""
+    return column.comment.strip()
+
+def relationship_edges(relationships: RelationshipCollector) -> List[Tuple[str, str, str]]:
+    """Relationships as (source_table, cardinality, target_table)
+
+    Composite foreign keys and repeated FKs between the same two tables are
+    collapsed into one edge; cardinality is inferred from nullability and
+    unique indexes of the FK columns.
+    """
+    return [(edge.source, edge.cardinality, edge.target) for edge in relationships.edges()]
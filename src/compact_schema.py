@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Compact Schema
+Token-dense plain-text serialization of the extracted schema for LLM context: one line per
+table with abbreviated types and constraint flags, followed by a foreign-key edge list
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, TextIO
+from metrics import configure_logging, metrics
+from schema_graph import RelationshipCollector
+from schema_model import Column, ForeignKeyConstraint, normalize_schema_data, relationship_cardinality
+from schema_snapshot import SNAPSHOT_SUFFIX, load_snapshot
+from tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FORMAT_VERSION = 1
+COMPACT_SUFFIX = '.schema.txt'
+
+# Only types with a shorter spelling are listed; everything else is written as MySQL reports it
+TYPE_ABBREVIATIONS = {
+    'int': 'i', 'bigint': 'bi', 'smallint': 'si', 'tinyint': 'ti', 'mediumint': 'mi',
+    'varchar': 'vc', 'char': 'c', 'text': 'tx', 'mediumtext': 'mtx', 'longtext': 'ltx',
+    'datetime': 'dt', 'timestamp': 'ts', 'decimal': 'dec', 'double': 'dbl', 'varbinary': 'vb',
+}
+# Sizes implied by the type (integer precision is only a display width) are dropped
+IMPLIED_SIZE_TYPES = {'int', 'bigint', 'smallint', 'tinyint', 'mediumint',
+                      'tinytext', 'text', 'mediumtext', 'longtext',
+                      'tinyblob', 'blob', 'mediumblob', 'longblob', 'json'}
+DEFAULT_ABBREVIATIONS = {'CURRENT_TIMESTAMP': 'now'}
+# Characters that would make an unquoted default or comment ambiguous within a table line
+_SEPARATORS = (' ', ';', '"', ':')
+
+def _quote(text: str) -> str:
+    """JSON-quote text that contains a separator (or is empty)"""
+    if text and not any(separator in text for separator in _SEPARATORS):
+        return text
+    return json.dumps(text, ensure_ascii=False)
+
+def format_type(column: Column) -> str:
+    """Abbreviated type with its length or precision: vc255, dec10,2, i"""
+    data_type = TYPE_ABBREVIATIONS.get(column.data_type, column.data_type)
+    if column.data_type in IMPLIED_SIZE_TYPES:
+        pass
+    elif column.max_length:
+        data_type += str(column.max_length)
+    elif column.precision and column.scale:
+        data_type += f"{column.precision},{column.scale}"
+    elif column.precision:
+        data_type += str(column.precision)
+    elif column.datetime_precision:
+        data_type += str(column.datetime_precision)
+    return data_type
+
+def format_column(column: Column) -> str:
+    """name type[?] [flags] [=default] ["comment"], e.g. *id i A or email vc255 U"""
+    parts = [f"{'*' if column.is_primary_key else ''}{column.name}",
+             format_type(column) + ('?' if column.is_nullable else '')]
+    flags = ''
+    if column.is_unique and not column.is_primary_key:
+        flags += 'U'
+    if column.is_auto_increment:
+        flags += 'A'
+    if column.is_multiple:
+        flags += 'K'
+    if flags:
+        parts.append(flags)
+    if column.default is not None:
+        default = str(column.default)
+        parts.append('=' + DEFAULT_ABBREVIATIONS.get(default, _quote(default)))
+    comment = column.comment.strip()
+    if comment:
+        parts.append(json.dumps(comment, ensure_ascii=False))
+    return ' '.join(parts)
+
+def format_table(table_name: str, columns: List[Column]) -> str:
+    """table: col; col; ... on one line"""
+    return f"{table_name}: " + '; '.join(format_column(column) for column in columns)
+
+def format_foreign_key(constraint: ForeignKeyConstraint, cardinality: str) -> str:
+    """source.col>target.col followed by the source and target cardinality, e.g. orders.user_id>users.id *1"""
+    if len(constraint.columns) == 1:
+        source, target = constraint.columns[0], constraint.referenced_columns[0]
+    else:
+        source, target = f"({','.join(constraint.columns)})", f"({','.join(constraint.referenced_columns)})"
+    return (f"{constraint.table_name}.{source}>{constraint.referenced_table_name}.{target} "
+            f"{cardinality[0]}{cardinality[-1]}")
+
+class CompactSchemaWriter:
+    """Writes the compact serialization one table at a time, keeping a running token estimate"""
+
+    def __init__(self, schema_info: Dict[str, Any]):
+        self.schema_info = normalize_schema_data(schema_info)
+        self.relationships = RelationshipCollector(self.schema_info['relationships'])
+        self.tokens = 0
+
+    def _write(self, f: TextIO, text: str) -> None:
+        f.write(text)
+        self.tokens += estimate_tokens(text)
+
+    def write_header(self, f: TextIO, table_count: int) -> None:
+        """Write the source line and the legend"""
+        schema_info = self.schema_info
+        source_name = f"{schema_info['database']}.{schema_info.get('schema', schema_info['database'])}"
+        abbreviations = ' '.join(f"{short}={name}" for name, short in TYPE_ABBREVIATIONS.items())
+        self._write(f, f"# {source_name}: {table_count} tables, {len(self.relationships.constraints)} "
+                       f"foreign keys (erd-plus compact v{COMPACT_FORMAT_VERSION})\n"
+                       f"# table: col type; ... *=primary key ?=nullable U=unique A=auto_increment "
+                       f"K=indexed =default(now=CURRENT_TIMESTAMP) \"comment\"\n"
+                       f"# types: {abbreviations}\n")
+
+    def write_table(self, f: TextIO, table_name: str, table_data: Dict[str, Any]) -> None:
+        """Write one table line"""
+        self.relationships.note_table(table_name, table_data)
+        self._write(f, format_table(table_name, table_data['columns']) + '\n')
+
+    def write_relationships(self, f: TextIO) -> None:
+        """Write the foreign-key edge list (one line per constraint)"""
+        constraints = self.relationships.constraints
+        if not constraints:
+            return
+        lines = ["# fk: source>target, then source side (*=many ?=at most one) and target side "
+                 "(1=required ?=optional)"]
+        for constraint in constraints:
+            cardinality = relationship_cardinality(constraint, self.relationships.tables.get(constraint.table_name))
+            lines.append(format_foreign_key(constraint, cardinality))
+        self._write(f, '\n'.join(lines) + '\n')
+
+def write_compact_schema(schema_data: Dict[str, Any], f: TextIO) -> int:
+    """Serialize a complete schema_data dict; returns the estimated tokens"""
+    writer = CompactSchemaWriter(schema_data)
+    writer.write_header(f, len(schema_data['tables']))
+    for table_name, table_data in schema_data['tables'].items():
+        writer.write_table(f, table_name, table_data)
+    writer.write_relationships(f)
+    return writer.tokens
+
+def log_token_comparison(schema_name: str, compact_tokens: int, markdown_path: Path) -> None:
+    """Log and count the estimated tokens of the compact output against the Markdown document"""
+    metrics.count('compact_tokens', compact_tokens)
+    try:
+        markdown_tokens = estimate_tokens(markdown_path.read_text(encoding='utf-8'))
+    except OSError:
+        return
+    metrics.count('markdown_tokens', markdown_tokens)
+    ratio = compact_tokens / markdown_tokens if markdown_tokens else 0
+    logger.info(f"[{schema_name}] Estimated tokens: compact {compact_tokens}, Markdown {markdown_tokens} "
+                f"({ratio:.0%})")
+
+def main(argv: List[str] = None) -> int:
+    """Write the compact serialization of a schema snapshot without a database"""
+    parser = argparse.ArgumentParser(description="Serialize an ERD Plus schema snapshot in the compact format")
+    parser.add_argument('snapshot', type=Path, help="Schema snapshot ({schema}.snapshot.json.gz)")
+    parser.add_argument('--output', type=Path,
+                        help=f"Output file (default: next to the snapshot, {{schema}}{COMPACT_SUFFIX})")
+    parser.add_argument('--markdown', type=Path, help="Markdown document to compare the token estimate with")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    try:
+        schema_data = load_snapshot(args.snapshot)
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        return 1
+    output_path = args.output or args.snapshot.with_name(args.snapshot.name.removesuffix(SNAPSHOT_SUFFIX)
+                                                         + COMPACT_SUFFIX)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        tokens = write_compact_schema(schema_data, f)
+    logger.info(f"Compact schema generated: {output_path} (about {tokens} tokens)")
+    if args.markdown is not None:
+        log_token_comparison(schema_data['schema'], tokens, args.markdown)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
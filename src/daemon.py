@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+ERD Daemon
+Resident mode: keeps the connection pool warm, polls cheap schema fingerprints and regenerates
+only changed schemas, serving the latest artifacts over a small local HTTP endpoint with ETags
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 30
+DEFAULT_HTTP_HOST = '127.0.0.1'
+DEFAULT_HTTP_PORT = 8080
+
+# Metrics of a schema's last regeneration, written next to its artifacts and served with them
+METRICS_SUFFIX = '.metrics.json'
+
+CONTENT_TYPES = {
+    '.er': 'text/plain; charset=utf-8',
+    '.md': 'text/markdown; charset=utf-8',
+    '.txt': 'text/plain; charset=utf-8',
+    '.svg': 'image/svg+xml',
+    '.pdf': 'application/pdf',
+    '.png': 'image/png',
+    '.json': 'application/json',
+}
+
+def file_etag(path: Path) -> str:
+    """Strong ETag for a file: SHA-256 of its content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return f'"{digest.hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value covers etag (weak comparison, as RFC 9110 asks)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+class ArtifactStore:
+    """The latest published files and their ETags, shared by the poller and the HTTP threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = {}
+        self.schemas = {}
+
+    def publish(self, schema_name: str, paths: Dict[str, Path], fingerprint: str) -> None:
+        """Make a regenerated schema's top-level files visible (ETags are computed once, here)"""
+        files = {path.name: (path, file_etag(path)) for path in paths.values() if path.is_file()}
+        with self.lock:
+            for name in self.schemas.get(schema_name, {}).get('files', []):
+                self.files.pop(name, None)
+            self.files.update(files)
+            self.schemas[schema_name] = {'fingerprint': fingerprint, 'files': sorted(files),
+                                         'error': None}
+
+    def record_error(self, schema_name: str, error: Exception) -> None:
+        """Remember a failed regeneration; the previous files stay published"""
+        with self.lock:
+            self.schemas.setdefault(schema_name, {'fingerprint': None, 'files': []})['error'] = str(error)
+
+    def get(self, name: str) -> Optional[Tuple[Path, str]]:
+        with self.lock:
+            return self.files.get(name)
+
+    def index(self) -> Dict[str, Any]:
+        with self.lock:
+            return {schema_name: dict(status) for schema_name, status in self.schemas.items()}
+
+def make_handler(store: ArtifactStore) -> type:
+    """HTTP handler class serving store: / lists the schemas, /{file} returns an artifact"""
+    from http.server import BaseHTTPRequestHandler
+
+    class ArtifactHandler(BaseHTTPRequestHandler):
+        server_version = 'ERDPlus'
+
+        def do_GET(self) -> None:
+            self._respond(send_body=True)
+
+        def do_HEAD(self) -> None:
+            self._respond(send_body=False)
+
+        def _respond(self, send_body: bool) -> None:
+            name = self.path.split('?', 1)[0].lstrip('/')
+            if not name:
+                body = (json.dumps(store.index(), indent=2, ensure_ascii=False) + '\n').encode('utf-8')
+                self._send(200, CONTENT_TYPES['.json'], body, send_body)
+                return
+            entry = store.get(name)
+            if entry is None:
+                self._send(404, 'text/plain; charset=utf-8', b'Not found\n', send_body)
+                return
+            path, etag = entry
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                # Repeat requests are answered from the stored ETag without touching the file
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                return
+            try:
+                body = path.read_bytes()
+            except FileNotFoundError:
+                self._send(404, 'text/plain; charset=utf-8', b'Not found\n', send_body)
+                return
+            self._send(200, CONTENT_TYPES.get(path.suffix, 'application/octet-stream'), body, send_body, etag)
+
+        def _send(self, status: int, content_type: str, body: bytes, send_body: bool, etag: str = None) -> None:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            if etag is not None:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug("HTTP %s - %s", self.address_string(), format % args)
+
+    return ArtifactHandler
+
+def _replace_entry(source: Path, target: Path) -> None:
+    """Move a staged file or directory over target (files atomically, directories by swap)"""
+    if source.is_dir():
+        old = target.with_name(f".{target.name}.old")
+        if target.exists():
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(target, old)
+        os.replace(source, target)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.replace(source, target)
+
+class ERDDaemon:
+    def __init__(self, config: Dict[str, Any], pool, output_dir: Path,
+                 generate: Callable[[str, Path], Dict[str, Path]], interval: float = DEFAULT_INTERVAL):
+        """Initialize with the run config, a warm connection pool, the output directory,
+        generate(schema_name, target_dir) -> outputs and the polling interval in seconds"""
+        self.config = config
+        self.pool = pool
+        self.output_dir = output_dir
+        self.generate = generate
+        self.interval = interval
+        self.store = ArtifactStore()
+        self.fingerprints = {}
+        self.stop_event = threading.Event()
+
+    def schema_fingerprint(self, schema_name: str) -> str:
+        """Current metadata fingerprint of one schema (two aggregate queries)"""
+        from db_connector import MySQLSchemaExtractor
+
+        extractor = MySQLSchemaExtractor(dict(self.config, schema=schema_name), pool=self.pool)
+        return extractor.get_schema_fingerprint()
+
+    def regenerate(self, schema_name: str, fingerprint: str) -> None:
+        """Generate into a staging directory, then move the files into place and publish them
+
+        Readers never see half-written files: every file is replaced by a rename.
+        The run metrics are written to {schema}.metrics.json with the artifacts.
+        """
+        staging_dir = self.output_dir / '.staging' / schema_name
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        staging_dir.mkdir(parents=True)
+        try:
+            metrics.reset()
+            staged_outputs = dict(self.generate(schema_name, staging_dir))
+            metrics_path = staging_dir / f"{schema_name}{METRICS_SUFFIX}"
+            metrics.write(metrics_path, database=self.config['database'], schemas=[schema_name], failed=[])
+            staged_outputs['Metrics'] = metrics_path
+            for entry in staging_dir.iterdir():
+                _replace_entry(entry, self.output_dir / entry.name)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            try:
+                staging_dir.parent.rmdir()
+            except OSError:
+                pass
+        # Only top-level files are served; partition/neighbourhood directories stay on disk
+        outputs = {label: self.output_dir / path.name
+                   for label, path in staged_outputs.items() if path.parent == staging_dir}
+        self.store.publish(schema_name, outputs, fingerprint)
+        self.fingerprints[schema_name] = fingerprint
+
+    def poll(self) -> int:
+        """Regenerate every schema whose fingerprint changed; returns how many were regenerated"""
+        regenerated = 0
+        if self.config.get('query_guard') is not None:
+            # Query and time budgets apply to one poll
+            self.config['query_guard'].reset()
+        for schema_name in self.config['schemas']:
+            try:
+                fingerprint = self.schema_fingerprint(schema_name)
+                if fingerprint == self.fingerprints.get(schema_name):
+                    continue
+                if schema_name in self.fingerprints:
+                    logger.info(f"[{schema_name}] Schema changed, regenerating...")
+                self.regenerate(schema_name, fingerprint)
+                regenerated += 1
+            except Exception as e:
+                logger.error(f"Error [{schema_name}]: {e}")
+                self.store.record_error(schema_name, e)
+        return regenerated
+
+    def run(self, host: str = DEFAULT_HTTP_HOST, port: int = DEFAULT_HTTP_PORT) -> None:
+        """Serve artifacts over HTTP and poll until stop() or Ctrl+C"""
+        from http.server import ThreadingHTTPServer
+
+        server = ThreadingHTTPServer((host, port), make_handler(self.store))
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, name='http', daemon=True)
+        thread.start()
+        logger.info(f"Serving ERD artifacts on http://{host}:{server.server_address[1]}/ "
+                    f"(polling every {self.interval}s)")
+        try:
+            while True:
+                self.poll()
+                if self.stop_event.wait(self.interval):
+                    break
+        except KeyboardInterrupt:
+            logger.info("Stopping daemon...")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def stop(self) -> None:
+        """Ask run() to return after the current poll"""
+        self.stop_event.set()
@@ -4,16 +4,74 @@ MySQL Database Schema Extractor
 Connects to MySQL database and extracts table schema information
 """
 
+import hashlib
+import logging
+import time
 import mysql.connector
 from mysql.connector import Error
-from typing import Dict, List, Any
+from mysql.connector import pooling
+from typing import Dict, List, Any, Iterator, Tuple
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from metrics import metrics
+from query_guard import ER_QUERY_TIMEOUT, QueryGuard
+from schema_cache import SchemaCache
+from schema_model import Column, ForeignKey, IndexColumn
+from table_filter import TableFilter
+
+logger = logging.getLogger(__name__)
+
+# Rows held client-side at a time by the streaming (unbuffered) queries
+DEFAULT_FETCH_BATCH_SIZE = 1000
+
+def connection_targets(config: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """(host, port) pairs to connect to in order of preference: the replica first when configured"""
+    targets = []
+    if config.get('replica_host'):
+        targets.append((config['replica_host'], config.get('replica_port') or config['port']))
+    targets.append((config['host'], config['port']))
+    return targets
+
+def _connect_preferred(config: Dict[str, Any], connect):
+    """Call connect(host, port) for each target until one succeeds, falling back from the replica"""
+    targets = connection_targets(config)
+    for number, (host, port) in enumerate(targets, 1):
+        try:
+            connection = connect(host, port)
+        except Error:
+            if number == len(targets):
+                raise
+            logger.warning(f"Warning: Replica {host}:{port} is not reachable, falling back to the primary")
+            continue
+        if number < len(targets):
+            logger.debug(f"Reading metadata from replica {host}:{port}")
+        return connection
+
+def create_connection_pool(config: Dict[str, Any], pool_size: int = 4,
+                           pool_name: str = 'erd_plus') -> pooling.MySQLConnectionPool:
+    """Create a bounded MySQL connection pool shared by extractors and the connection test
+    
+    Connects to DB_REPLICA_HOST when one is configured and reachable, otherwise to DB_HOST.
+    """
+    # mysql.connector refuses pools larger than CNX_POOL_MAXSIZE
+    pool_size = max(1, min(pool_size, pooling.CNX_POOL_MAXSIZE))
+    try:
+        return _connect_preferred(config, lambda host, port: pooling.MySQLConnectionPool(
+            pool_name=pool_name,
+            pool_size=pool_size,
+            host=host,
+            port=port,
+            database=config['database'],
+            user=config['username'],
+            password=config['password']
+        ))
+    except Error as e:
+        raise Exception(f"Error creating MySQL connection pool: {e}")
 
 class MySQLSchemaExtractor:
-    def __init__(self, config: Dict[str, Any] = None):
-        """Initialize with database configuration"""
+    def __init__(self, config: Dict[str, Any] = None, pool: pooling.MySQLConnectionPool = None):
+        """Initialize with database configuration and an optional connection pool"""
         if config is None:
             # Load configuration from .env file
             env_path = Path(__file__).parent / '.env'
@@ -25,46 +83,139 @@ class MySQLSchemaExtractor:
                 'database': os.getenv('DB_DATABASE', ''),
                 'username': os.getenv('DB_USERNAME', ''),
                 'password': os.getenv('DB_PASSWORD', ''),
-                'schema': os.getenv('DB_SCHEMA', os.getenv('DB_DATABASE', ''))
+                'schema': os.getenv('DB_SCHEMA', os.getenv('DB_DATABASE', '')),
+                'fetch_batch_size': int(os.getenv('DB_FETCH_BATCH_SIZE', '0')) or None,
+                'table_filter': TableFilter.parse(os.getenv('ERD_INCLUDE_TABLES', ''),
+                                                  os.getenv('ERD_EXCLUDE_TABLES', ''),
+                                                  os.getenv('ERD_TABLE_TYPES', ''))
             }
         else:
             self.config = config
+        self.pool = pool
         self.connection = None
+        self.table_filter = self.config.get('table_filter') or TableFilter()
+        self.fetch_batch_size = max(1, self.config.get('fetch_batch_size') or DEFAULT_FETCH_BATCH_SIZE)
+        self.query_guard = self.config.get('query_guard') or QueryGuard()
+        # MAX_EXECUTION_TIME of the statement last run (for timeout messages)
+        self.execution_time_ms = 0
         
     def connect(self):
-        """Establish connection to MySQL database"""
+        """Establish connection to MySQL database, borrowing from the pool if one is set"""
         try:
-            self.connection = mysql.connector.connect(
-                host=self.config['host'],
-                port=self.config['port'],
-                database=self.config['database'],
-                user=self.config['username'],
-                password=self.config['password']
-            )
+            with metrics.phase('connect', self.config.get('schema')):
+                if self.pool is not None:
+                    self.connection = self.pool.get_connection()
+                else:
+                    self.connection = _connect_preferred(self.config, lambda host, port: mysql.connector.connect(
+                        host=host,
+                        port=port,
+                        database=self.config['database'],
+                        user=self.config['username'],
+                        password=self.config['password']
+                    ))
             if self.connection.is_connected():
-                print(f"Successfully connected to MySQL database: {self.config['database']}")
-                print(f"Target schema: {self.config.get('schema', self.config['database'])}")
+                logger.debug(f"Successfully connected to MySQL database: {self.config['database']}")
+                logger.debug(f"Target schema: {self.config.get('schema', self.config['database'])}")
         except Error as e:
             raise Exception(f"Error connecting to MySQL: {e}")
     
     def disconnect(self):
-        """Close database connection"""
+        """Close database connection (pooled connections are returned to the pool)"""
         if self.connection and self.connection.is_connected():
             self.connection.close()
-            print("MySQL connection closed")
+            if self.pool is not None:
+                logger.debug("MySQL connection returned to pool")
+            else:
+                logger.debug("MySQL connection closed")
+        self.connection = None
+    
+    def _execute(self, cursor, query: str, params: Tuple, label: str) -> float:
+        """Run a statement through the query guard; every query of the extractor goes through here
+        
+        Waits for the rate limit, enforces the query and time budgets and adds
+        the MAX_EXECUTION_TIME hint. Returns the seconds the statement took.
+        """
+        query, self.execution_time_ms = self.query_guard.prepare(query)
+        start = time.perf_counter()
+        try:
+            cursor.execute(query, params)
+        except Error as e:
+            self._raise_timeout(e, label)
+            raise
+        return time.perf_counter() - start
+    
+    def _raise_timeout(self, error: Error, label: str) -> None:
+        """Turn a MAX_EXECUTION_TIME interruption into a readable error"""
+        if getattr(error, 'errno', None) == ER_QUERY_TIMEOUT:
+            raise Exception(f"Query '{label}' exceeded MAX_EXECUTION_TIME ({self.execution_time_ms} ms, "
+                            f"the per-query limit or the remaining time budget)") from error
+    
+    def _record(self, label: str, seconds: float, rows: int) -> None:
+        """Report a finished query's latency to the run metrics and the time budget"""
+        self.query_guard.record(seconds)
+        metrics.add_query(label, seconds, rows)
+        logger.debug(f"Query {label}: {seconds * 1000:.1f} ms, {rows} rows")
+    
+    def _query(self, cursor, query: str, params: Tuple, label: str) -> List[Tuple]:
+        """Execute query and fetch every row, recording its latency and row count"""
+        seconds = self._execute(cursor, query, params, label)
+        start = time.perf_counter()
+        try:
+            rows = cursor.fetchall()
+        except Error as e:
+            self._raise_timeout(e, label)
+            raise
+        self._record(label, seconds + time.perf_counter() - start, len(rows))
+        return rows
+    
+    def _iter_rows(self, cursor, query: str, params: Tuple, label: str) -> Iterator[Tuple]:
+        """Execute query on an unbuffered cursor and yield its rows from fetchmany batches
+        
+        At most fetch_batch_size rows are held client-side at a time, so large
+        schema-wide result sets are never materialized as one list. The result
+        set is drained if the consumer stops early, keeping the connection usable.
+        Only the time spent executing and fetching counts as query latency; the
+        stream is aborted once it uses up the query guard's time budget.
+        """
+        row_count = 0
+        seconds = self._execute(cursor, query, params, label)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    rows = cursor.fetchmany(self.fetch_batch_size)
+                except Error as e:
+                    self._raise_timeout(e, label)
+                    raise
+                seconds += time.perf_counter() - start
+                if not rows:
+                    break
+                self.query_guard.check(seconds)
+                row_count += len(rows)
+                yield from rows
+        finally:
+            self._record(label, seconds, row_count)
+            if self.connection.unread_result:
+                self.connection.consume_results()
+    
+    def _selection(self, schema_name: str, column: str = 'TABLE_NAME', type_column: str = None):
+        """The table filter's 'AND ...' conditions on column, and their parameters"""
+        return self.table_filter.condition(schema_name, column, type_column)
     
     def get_tables(self) -> List[str]:
-        """Get all table names from the specified schema"""
-        cursor = self.connection.cursor()
+        """Get the names of the selected tables (all tables by default) from the specified schema"""
+        cursor = self.connection.cursor(buffered=False)
         schema_name = self.config.get('schema', self.config['database'])
-        cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = %s", (schema_name,))
-        tables = [table[0] for table in cursor.fetchall()]
+        selection, selection_params = self._selection(schema_name, type_column='TABLE_TYPE')
+        rows = self._iter_rows(cursor, f"SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = %s "
+                                       f"{selection}", (schema_name,) + selection_params, 'tables')
+        tables = [table[0] for table in rows]
         cursor.close()
         return tables
     
-    def get_table_columns(self, table_name: str) -> List[Dict[str, Any]]:
+    def get_table_columns(self, table_name: str) -> List[Column]:
         """Get column information for a specific table"""
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.connection.cursor()
         schema_name = self.config.get('schema', self.config['database'])
         query = """
         SELECT 
@@ -77,19 +228,26 @@ class MySQLSchemaExtractor:
             CHARACTER_MAXIMUM_LENGTH,
             NUMERIC_PRECISION,
             NUMERIC_SCALE,
-            COLUMN_COMMENT
+            COLUMN_COMMENT,
+            DATETIME_PRECISION
         FROM INFORMATION_SCHEMA.COLUMNS 
         WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
         ORDER BY ORDINAL_POSITION
         """
-        cursor.execute(query, (schema_name, table_name))
-        columns = cursor.fetchall()
+        columns = [Column.from_values(row)
+                   for row in self._query(cursor, query, (schema_name, table_name), 'table_columns')]
         cursor.close()
         return columns
     
-    def get_foreign_keys(self) -> List[Dict[str, Any]]:
-        """Get foreign key relationships"""
-        cursor = self.connection.cursor(dictionary=True)
+    def _foreign_key_selection(self, schema_name: str):
+        """Table filter conditions on both ends of a KEY_COLUMN_USAGE row, and their parameters"""
+        source, source_params = self._selection(schema_name)
+        target, target_params = self._selection(schema_name, 'REFERENCED_TABLE_NAME')
+        return ' '.join(filter(None, (source, target))), source_params + target_params
+    
+    def get_foreign_keys(self) -> List[ForeignKey]:
+        """Get foreign key relationships between the selected tables"""
+        cursor = self.connection.cursor(buffered=False)
         schema_name = self.config.get('schema', self.config['database'])
         query = """
         SELECT 
@@ -97,19 +255,23 @@ class MySQLSchemaExtractor:
             COLUMN_NAME,
             REFERENCED_TABLE_NAME,
             REFERENCED_COLUMN_NAME,
-            CONSTRAINT_NAME
+            CONSTRAINT_NAME,
+            ORDINAL_POSITION
         FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE 
         WHERE TABLE_SCHEMA = %s 
-        AND REFERENCED_TABLE_NAME IS NOT NULL
+        AND REFERENCED_TABLE_NAME IS NOT NULL {selection}
+        ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
         """
-        cursor.execute(query, (schema_name,))
-        foreign_keys = cursor.fetchall()
+        selection, selection_params = self._foreign_key_selection(schema_name)
+        foreign_keys = [ForeignKey.from_values(row)
+                        for row in self._iter_rows(cursor, query.format(selection=selection),
+                                                   (schema_name,) + selection_params, 'foreign_keys')]
         cursor.close()
         return foreign_keys
     
-    def get_indexes(self, table_name: str) -> List[Dict[str, Any]]:
+    def get_indexes(self, table_name: str) -> List[IndexColumn]:
         """Get index information for a specific table"""
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.connection.cursor()
         schema_name = self.config.get('schema', self.config['database'])
         query = """
         SELECT 
@@ -121,13 +283,298 @@ class MySQLSchemaExtractor:
         WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
         ORDER BY INDEX_NAME, SEQ_IN_INDEX
         """
-        cursor.execute(query, (schema_name, table_name))
-        indexes = cursor.fetchall()
+        indexes = [IndexColumn.from_values(row)
+                   for row in self._query(cursor, query, (schema_name, table_name), 'table_indexes')]
         cursor.close()
         return indexes
     
-    def extract_schema(self) -> Dict[str, Any]:
-        """Extract complete schema information"""
+    def _table_name_filter(self, table_names: List[str] = None):
+        """Build the table filter conditions plus an optional TABLE_NAME IN (...) clause, and their parameters"""
+        schema_name = self.config.get('schema', self.config['database'])
+        selection, selection_params = self._selection(schema_name)
+        if table_names is None:
+            return selection, selection_params
+        placeholders = ', '.join(['%s'] * len(table_names))
+        return f"AND TABLE_NAME IN ({placeholders}) {selection}", tuple(table_names) + selection_params
+    
+    def get_all_table_columns(self, table_names: List[str] = None) -> Dict[str, List[Column]]:
+        """Get column information for every table in the schema (or only table_names), grouped by table
+        
+        Rows are streamed in fetchmany batches and converted as they arrive.
+        """
+        cursor = self.connection.cursor(buffered=False)
+        schema_name = self.config.get('schema', self.config['database'])
+        query = """
+        SELECT 
+            TABLE_NAME,
+            COLUMN_NAME,
+            DATA_TYPE,
+            IS_NULLABLE,
+            COLUMN_KEY,
+            COLUMN_DEFAULT,
+            EXTRA,
+            CHARACTER_MAXIMUM_LENGTH,
+            NUMERIC_PRECISION,
+            NUMERIC_SCALE,
+            COLUMN_COMMENT,
+            DATETIME_PRECISION
+        FROM INFORMATION_SCHEMA.COLUMNS 
+        WHERE TABLE_SCHEMA = %s {table_filter}
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """
+        table_filter, table_params = self._table_name_filter(table_names)
+        columns_by_table = {}
+        rows = self._iter_rows(cursor, query.format(table_filter=table_filter), (schema_name,) + table_params,
+                               'columns')
+        for row in rows:
+            columns_by_table.setdefault(row[0], []).append(Column.from_values(row[1:]))
+        cursor.close()
+        return columns_by_table
+    
+    def get_all_indexes(self, table_names: List[str] = None,
+                        unique_only: bool = False) -> Dict[str, List[IndexColumn]]:
+        """Get index information for every table in the schema (or only table_names), grouped by table"""
+        cursor = self.connection.cursor(buffered=False)
+        schema_name = self.config.get('schema', self.config['database'])
+        query = """
+        SELECT 
+            TABLE_NAME,
+            INDEX_NAME,
+            COLUMN_NAME,
+            NON_UNIQUE,
+            SEQ_IN_INDEX
+        FROM INFORMATION_SCHEMA.STATISTICS 
+        WHERE TABLE_SCHEMA = %s {table_filter}
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """
+        table_filter, table_params = self._table_name_filter(table_names)
+        if unique_only:
+            table_filter += " AND NON_UNIQUE = 0"
+        indexes_by_table = {}
+        rows = self._iter_rows(cursor, query.format(table_filter=table_filter), (schema_name,) + table_params,
+                               'unique_indexes' if unique_only else 'indexes')
+        for row in rows:
+            indexes_by_table.setdefault(row[0], []).append(IndexColumn.from_values(row[1:]))
+        cursor.close()
+        return indexes_by_table
+    
+    def iter_table_columns(self, indexes: Dict[str, List[IndexColumn]] = None
+                           ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (table_name, {'columns': [...]}) for each table as its rows arrive
+        
+        Uses one unbuffered COLUMNS query ordered by table name, read in
+        fetchmany batches, so only the table currently being read (and one
+        batch of rows) is held in memory. Index rows are not read here; pass
+        prefetched ones (e.g. unique indexes only) to attach them.
+        """
+        cursor = self.connection.cursor(buffered=False)
+        schema_name = self.config.get('schema', self.config['database'])
+        query = """
+        SELECT 
+            TABLE_NAME,
+            COLUMN_NAME,
+            DATA_TYPE,
+            IS_NULLABLE,
+            COLUMN_KEY,
+            COLUMN_DEFAULT,
+            EXTRA,
+            CHARACTER_MAXIMUM_LENGTH,
+            NUMERIC_PRECISION,
+            NUMERIC_SCALE,
+            COLUMN_COMMENT,
+            DATETIME_PRECISION
+        FROM INFORMATION_SCHEMA.COLUMNS 
+        WHERE TABLE_SCHEMA = %s {table_filter}
+        ORDER BY CAST(TABLE_NAME AS BINARY), ORDINAL_POSITION
+        """
+        table_filter, table_params = self._table_name_filter()
+        rows = self._iter_rows(cursor, query.format(table_filter=table_filter), (schema_name,) + table_params,
+                               'columns_stream')
+        try:
+            current_table = None
+            columns = []
+            for row in rows:
+                table_name = row[0]
+                if table_name != current_table:
+                    if current_table is not None:
+                        yield current_table, self._table_data(current_table, columns, indexes)
+                    current_table = table_name
+                    columns = []
+                columns.append(Column.from_values(row[1:]))
+            if current_table is not None:
+                yield current_table, self._table_data(current_table, columns, indexes)
+        finally:
+            # Closing the row generator drains the result set if the consumer stopped early
+            rows.close()
+            cursor.close()
+    
+    def _table_data(self, table_name: str, columns: List[Column],
+                    indexes: Dict[str, List[IndexColumn]] = None) -> Dict[str, Any]:
+        """Table data dict for a streamed table"""
+        if indexes is None:
+            return {'columns': columns}
+        return {'columns': columns, 'indexes': indexes.get(table_name, [])}
+    
+    def stream_schema(self) -> Tuple[Dict[str, Any], Iterator[Tuple[str, Dict[str, Any]]]]:
+        """Start a streaming extraction
+        
+        Returns the schema metadata (table names and relationships, which are
+        small) together with a generator of (table_name, table_data) pairs.
+        Only unique indexes are attached to the tables; they are needed to
+        infer relationship cardinality. The connection is released once the
+        generator is exhausted or closed.
+        """
+        self.connect()
+        try:
+            schema_name = self.config.get('schema', self.config['database'])
+            tables = self.get_tables()
+            foreign_keys = self.get_foreign_keys()
+            unique_indexes = self.get_all_indexes(unique_only=True)
+            if self.table_filter.active:
+                logger.info(f"Table filter: {self.table_filter.describe()}")
+            logger.info(f"Streaming {len(tables)} tables with {len(foreign_keys)} relationships from schema '{schema_name}'")
+        except Exception:
+            self.disconnect()
+            raise
+        
+        schema_info = {
+            'database': self.config['database'],
+            'schema': schema_name,
+            'tables': {},
+            'table_names': tables,
+            'relationships': foreign_keys
+        }
+        
+        def tables_with_disconnect():
+            try:
+                yield from self.iter_table_columns(unique_indexes)
+            finally:
+                self.disconnect()
+        
+        return schema_info, tables_with_disconnect()
+    
+    def get_table_fingerprints(self) -> Dict[str, str]:
+        """Get a cheap per-table fingerprint used to detect metadata changes
+        
+        The fingerprint combines CREATE_TIME (changes on table rebuilds) with a
+        column count and CRC32 checksums of the column and index definitions,
+        aggregated server-side so only one row per table is transferred.
+        UPDATE_TIME is deliberately left out: it moves on every data write and
+        would invalidate busy tables whose structure never changed.
+        """
+        cursor = self.connection.cursor(buffered=False)
+        schema_name = self.config.get('schema', self.config['database'])
+        query = """
+        SELECT 
+            t.TABLE_NAME,
+            t.CREATE_TIME,
+            COALESCE(c.COLUMN_COUNT, 0),
+            COALESCE(c.COLUMN_CHECKSUM, 0),
+            COALESCE(s.INDEX_CHECKSUM, 0)
+        FROM INFORMATION_SCHEMA.TABLES t
+        LEFT JOIN (
+            SELECT 
+                TABLE_NAME,
+                COUNT(*) AS COLUMN_COUNT,
+                SUM(CRC32(CONCAT_WS('|', ORDINAL_POSITION, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE,
+                                    COLUMN_KEY, IFNULL(COLUMN_DEFAULT, '<null>'), EXTRA, COLUMN_COMMENT))) AS COLUMN_CHECKSUM
+            FROM INFORMATION_SCHEMA.COLUMNS 
+            WHERE TABLE_SCHEMA = %s {selection}
+            GROUP BY TABLE_NAME
+        ) c ON c.TABLE_NAME = t.TABLE_NAME
+        LEFT JOIN (
+            SELECT 
+                TABLE_NAME,
+                SUM(CRC32(CONCAT_WS('|', INDEX_NAME, SEQ_IN_INDEX, COLUMN_NAME, NON_UNIQUE))) AS INDEX_CHECKSUM
+            FROM INFORMATION_SCHEMA.STATISTICS 
+            WHERE TABLE_SCHEMA = %s {selection}
+            GROUP BY TABLE_NAME
+        ) s ON s.TABLE_NAME = t.TABLE_NAME
+        WHERE t.TABLE_SCHEMA = %s {table_selection}
+        """
+        selection, selection_params = self._selection(schema_name)
+        table_selection, table_selection_params = self._selection(schema_name, 't.TABLE_NAME', 't.TABLE_TYPE')
+        query = query.format(selection=selection, table_selection=table_selection)
+        params = ((schema_name,) + selection_params) * 2 + (schema_name,) + table_selection_params
+        fingerprints = {
+            row[0]: '|'.join(str(value) for value in row[1:])
+            for row in self._iter_rows(cursor, query, params, 'table_fingerprints')
+        }
+        cursor.close()
+        return fingerprints
+    
+    def get_schema_fingerprint(self) -> str:
+        """Digest of every table fingerprint plus the foreign keys, for cheap change polling
+        
+        Two aggregate queries; foreign keys are checksummed separately because
+        adding one does not always change the referencing table's indexes.
+        """
+        self.connect()
+        try:
+            fingerprints = self.get_table_fingerprints()
+            cursor = self.connection.cursor()
+            schema_name = self.config.get('schema', self.config['database'])
+            query = """
+            SELECT 
+                COUNT(*),
+                COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION, COLUMN_NAME,
+                                             REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME))), 0)
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE 
+            WHERE TABLE_SCHEMA = %s 
+            AND REFERENCED_TABLE_NAME IS NOT NULL {selection}
+            """
+            selection, selection_params = self._foreign_key_selection(schema_name)
+            foreign_key_count, foreign_key_checksum = self._query(cursor, query.format(selection=selection),
+                                                                  (schema_name,) + selection_params,
+                                                                  'foreign_key_fingerprint')[0]
+            cursor.close()
+        finally:
+            self.disconnect()
+        digest = hashlib.sha256()
+        for table_name in sorted(fingerprints):
+            digest.update(f"{table_name}={fingerprints[table_name]}\n".encode('utf-8'))
+        digest.update(f"foreign_keys={foreign_key_count}|{foreign_key_checksum}".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _fetch_tables(self, table_names: List[str], bulk: bool, all_tables: bool) -> Dict[str, Dict[str, Any]]:
+        """Fetch columns and indexes for the given tables"""
+        tables = {}
+        if not table_names:
+            return tables
+        
+        if bulk:
+            # One query per INFORMATION_SCHEMA view, grouped by table in Python
+            filter_names = None if all_tables else table_names
+            columns_by_table = self.get_all_table_columns(filter_names)
+            indexes_by_table = self.get_all_indexes(filter_names)
+            
+            for table_name in table_names:
+                tables[table_name] = {
+                    'columns': columns_by_table.get(table_name, []),
+                    'indexes': indexes_by_table.get(table_name, [])
+                }
+        else:
+            # Extract information for each table
+            for table_name in table_names:
+                logger.debug("Processing table: %s", table_name)
+                
+                columns = self.get_table_columns(table_name)
+                indexes = self.get_indexes(table_name)
+                
+                tables[table_name] = {
+                    'columns': columns,
+                    'indexes': indexes
+                }
+        return tables
+    
+    def extract_schema(self, bulk: bool = True, cache: SchemaCache = None) -> Dict[str, Any]:
+        """Extract complete schema information
+        
+        With bulk=True (default) columns and indexes are fetched for the whole
+        schema in one query each instead of two queries per table.
+        With a SchemaCache only new tables and tables whose fingerprint changed
+        are re-fetched; dropped tables are evicted from the cache.
+        """
         try:
             self.connect()
             
@@ -141,25 +588,44 @@ class MySQLSchemaExtractor:
             
             # Get all tables
             tables = self.get_tables()
-            print(f"Found {len(tables)} tables in schema '{schema_name}': {', '.join(tables)}")
+            if self.table_filter.active:
+                logger.info(f"Table filter: {self.table_filter.describe()}")
+            logger.info(f"Found {len(tables)} tables in schema '{schema_name}'")
+            logger.debug("Tables: %s", ', '.join(tables))
             
-            # Extract information for each table
-            for table_name in tables:
-                print(f"Processing table: {table_name}")
+            if cache is None:
+                fetched = self._fetch_tables(tables, bulk, all_tables=True)
+            else:
+                fingerprints = self.get_table_fingerprints()
+                cached = {}
+                for table_name in tables:
+                    table_data = cache.get(table_name, fingerprints.get(table_name))
+                    if table_data is not None:
+                        cached[table_name] = table_data
+                stale = [table_name for table_name in tables if table_name not in cached]
+                logger.info(f"Schema cache: {len(cached)} tables unchanged, {len(stale)} new or changed")
                 
-                columns = self.get_table_columns(table_name)
-                indexes = self.get_indexes(table_name)
+                fetched = self._fetch_tables(stale, bulk, all_tables=not cached)
+                for table_name, table_data in fetched.items():
+                    if table_name in fingerprints:
+                        cache.put(table_name, fingerprints[table_name],
+                                  table_data['columns'], table_data['indexes'])
+                fetched.update(cached)
                 
-                schema_data['tables'][table_name] = {
-                    'columns': columns,
-                    'indexes': indexes
-                }
+                evicted = cache.evict_missing(tables)
+                if evicted:
+                    logger.info(f"Schema cache: evicted {len(evicted)} dropped tables: {', '.join(evicted)}")
+                cache.save()
+            
+            # Keep INFORMATION_SCHEMA.TABLES order regardless of where the data came from
+            for table_name in tables:
+                schema_data['tables'][table_name] = fetched[table_name]
             
             # Get foreign key relationships
             foreign_keys = self.get_foreign_keys()
             schema_data['relationships'] = foreign_keys
             
-            print(f"Extracted schema for {len(tables)} tables with {len(foreign_keys)} relationships")
+            logger.info(f"Extracted schema for {len(tables)} tables with {len(foreign_keys)} relationships")
             return schema_data
             
         finally:
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+DDL Parser
+Builds the schema data extract_schema returns from mysqldump --no-data / SHOW CREATE TABLE
+output, streaming the dump line by line so multi-gigabyte files are read in bounded memory
+"""
+
+import argparse
+import gzip
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from metrics import configure_logging, metrics
+from schema_model import FSP_TYPES, Column, ForeignKey, IndexColumn
+from schema_snapshot import SNAPSHOT_SUFFIX, save_snapshot
+from table_filter import TableFilter
+
+logger = logging.getLogger(__name__)
+
+DDL_SUFFIXES = ('.gz', '.sql')
+# Longer lines (extended INSERTs of a full dump) are read in pieces of this size
+READ_LINE_LIMIT = 1024 * 1024
+
+# Statement and dump header lines; anything else outside a CREATE TABLE is skipped undecoded
+_CREATE_TABLE = re.compile(rb'^(?:Create Table: )?CREATE\s+(?:TEMPORARY\s+)?TABLE\s', re.I)
+_USE = re.compile(rb'^USE\s+`((?:[^`]|``)+)`', re.I)
+_HEADER = re.compile(rb'^-- Host: .*Database: (\S+)')
+_LINE_STARTS = (b'C', b'c', b'U', b'u', b'-')
+# Characters that change the quoting or nesting state of a statement
+_SPECIAL = re.compile(rb"[`'\"()\\]")
+
+# Backquoted identifiers, strings, parentheses, commas and bare words
+_TOKEN = re.compile(r"""`(?:[^`]|``)*`|'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|[(),]|[^\s`'"(),]+""", re.S)
+_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+TYPE_ALIASES = {'integer': 'int', 'bool': 'tinyint', 'boolean': 'tinyint', 'numeric': 'decimal',
+                'dec': 'decimal', 'fixed': 'decimal', 'real': 'double'}
+# NUMERIC_PRECISION of the integer types (signed, unsigned)
+INTEGER_PRECISION = {'tinyint': (3, 3), 'smallint': (5, 5), 'mediumint': (7, 8), 'int': (10, 10),
+                     'bigint': (19, 20)}
+FLOAT_PRECISION = {'float': 12, 'double': 22}
+# CHARACTER_MAXIMUM_LENGTH of the types without a length argument
+FIXED_LENGTHS = {'tinytext': 255, 'text': 65535, 'mediumtext': 16777215, 'longtext': 4294967295,
+                 'tinyblob': 255, 'blob': 65535, 'mediumblob': 16777215, 'longblob': 4294967295}
+LENGTH_TYPES = ('char', 'varchar', 'binary', 'varbinary')
+
+def _is_quoted(token: str) -> bool:
+    return token[:1] in ("'", '"')
+
+def _unquote(token: str) -> str:
+    """Value of a quoted string or backquoted identifier token"""
+    quote = token[0]
+    body = token[1:-1]
+    if quote == '`':
+        return body.replace('``', '`')
+    return re.sub(r"\\(.)|" + quote * 2,
+                  lambda m: _ESCAPES.get(m.group(1), m.group(1)) if m.group(1) else quote, body, flags=re.S)
+
+def _identifier(token: str) -> str:
+    return _unquote(token) if token[:1] == '`' else token
+
+def _join(tokens: List[str]) -> str:
+    """Expression text from tokens: rand ( ) * 2 -> rand() * 2"""
+    text = ''
+    for token in tokens:
+        if text and token not in (')', ',') and not text.endswith('(') and \
+                not (token == '(' and text[-1:].isalnum()):
+            text += ' '
+        text += token
+    return text
+
+def _split(tokens: List[str], start: int) -> Tuple[List[List[str]], int]:
+    """Split the tokens from start up to the matching ')' at top-level commas
+
+    Returns the parts and the index after the ')'.
+    """
+    parts = [[]]
+    depth = 0
+    index = start
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+        if token == ')':
+            if depth == 0:
+                return parts, index
+            depth -= 1
+        elif token == '(':
+            depth += 1
+        elif token == ',' and depth == 0:
+            parts.append([])
+            continue
+        parts[-1].append(token)
+    return parts, index
+
+def _qualified_name(tokens: List[str], index: int) -> Tuple[str, int]:
+    """Table name of db.table, `db`.`table` or `table` at index; returns it and the next index"""
+    name = tokens[index]
+    index += 1
+    while index < len(tokens) and tokens[index].startswith('.'):
+        # `db`.`table` tokenizes as `db`, ., `table`; db.table as one word
+        name = tokens[index][1:] or tokens[index + 1]
+        index += 1 if tokens[index] != '.' else 2
+    if name[:1] != '`' and '.' in name:
+        name = name.rsplit('.', 1)[1]
+    return _identifier(name), index
+
+def _key_columns(tokens: List[str], index: int) -> Tuple[List[str], int]:
+    """Column names of a (col, col(10), (expr)) key part list starting after its '('"""
+    parts, index = _split(tokens, index)
+    # Functional key parts have no column name
+    return [_identifier(part[0]) for part in parts if part and part[0] != '('], index
+
+def column_type(type_name: str, args: List[str], unsigned: bool) -> Tuple[str, Optional[int], Optional[int],
+                                                                           Optional[int]]:
+    """DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION and NUMERIC_SCALE of a column type"""
+    data_type = TYPE_ALIASES.get(type_name, type_name)
+    numbers = [int(arg) for arg in args if arg.isdigit()]
+    if data_type in INTEGER_PRECISION:
+        return data_type, None, INTEGER_PRECISION[data_type][unsigned], 0
+    if data_type == 'decimal':
+        return data_type, None, numbers[0] if numbers else 10, numbers[1] if len(numbers) > 1 else 0
+    if data_type in FLOAT_PRECISION:
+        if len(numbers) > 1:
+            return data_type, None, numbers[0], numbers[1]
+        return data_type, None, FLOAT_PRECISION[data_type], None
+    if data_type == 'bit':
+        return data_type, None, numbers[0] if numbers else 1, None
+    if data_type in LENGTH_TYPES:
+        return data_type, numbers[0] if numbers else 1, None, None
+    if data_type in FIXED_LENGTHS:
+        return data_type, FIXED_LENGTHS[data_type], None, None
+    if data_type in ('enum', 'set'):
+        values = [len(_unquote(arg)) for arg in args if _is_quoted(arg)]
+        if data_type == 'enum':
+            return data_type, max(values, default=0), None, None
+        return data_type, sum(values) + max(len(values) - 1, 0), None, None
+    return data_type, None, None, None
+
+class _ColumnDefinition:
+    """A column definition, completed into a Column once the table's keys are known"""
+    __slots__ = ('name', 'data_type', 'max_length', 'precision', 'scale', 'datetime_precision', 'not_null',
+                 'default', 'default_generated', 'auto_increment', 'on_update', 'generated', 'comment')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.datetime_precision = None
+        self.not_null = False
+        self.default = None
+        self.default_generated = False
+        self.auto_increment = False
+        self.on_update = None
+        self.generated = None
+        self.comment = ''
+
+    @property
+    def extra(self) -> str:
+        """EXTRA as MySQL 8 reports it, e.g. 'DEFAULT_GENERATED on update CURRENT_TIMESTAMP'"""
+        extra = []
+        if self.auto_increment:
+            extra.append('auto_increment')
+        if self.default_generated:
+            extra.append('DEFAULT_GENERATED')
+        if self.on_update:
+            extra.append(f"on update {self.on_update}")
+        if self.generated:
+            extra.append(f"{self.generated} GENERATED")
+        return ' '.join(extra)
+
+    def to_column(self, column_key: str) -> Column:
+        nullable = 'NO' if self.not_null or column_key == 'PRI' else 'YES'
+        return Column.from_values((self.name, self.data_type, nullable, column_key, self.default, self.extra,
+                                   self.max_length, self.precision, self.scale, self.comment,
+                                   self.datetime_precision))
+
+def _parse_default(tokens: List[str], index: int) -> Tuple[Optional[str], bool, int]:
+    """COLUMN_DEFAULT of the DEFAULT value at index
+
+    Returns the value, whether it is an expression (reported as
+    DEFAULT_GENERATED, like CURRENT_TIMESTAMP) and the next index.
+    """
+    token = tokens[index]
+    if _is_quoted(token):
+        return _unquote(token), False, index + 1
+    if token == '(':
+        # Expression default: INFORMATION_SCHEMA reports the expression without its parentheses
+        _, end = _split(tokens, index + 1)
+        return _join(tokens[index + 1:end - 1]), True, end
+    if token.upper() == 'NULL':
+        return None, False, index + 1
+    following = tokens[index + 1] if index + 1 < len(tokens) else ''
+    if _is_quoted(following):
+        if token.lower() in ('b', 'x'):
+            return f"{token.lower()}'{_unquote(following)}'", False, index + 2
+        if token.startswith('_'):
+            # Character set introducer: _utf8mb4'text'
+            return _unquote(following), False, index + 2
+    if following == '(':
+        _, end = _split(tokens, index + 2)
+        return _join(tokens[index:end]), True, end
+    # Bare words other than numbers and booleans are functions: CURRENT_TIMESTAMP, LOCALTIME, ...
+    literal = token.upper() in ('TRUE', 'FALSE') or re.fullmatch(r'[-+]?[0-9.]+(?:[eE][-+]?[0-9]+)?', token)
+    return token, not literal, index + 1
+
+def parse_column(tokens: List[str]) -> Tuple[_ColumnDefinition, bool, bool]:
+    """Parse a column definition; returns it and whether it is an inline PRIMARY KEY / UNIQUE"""
+    column = _ColumnDefinition(_identifier(tokens[0]))
+    type_name = tokens[1].lower()
+    index = 2
+    args = []
+    if index < len(tokens) and tokens[index] == '(':
+        parts, index = _split(tokens, index + 1)
+        args = [part[0] for part in parts if part]
+    unsigned = False
+    primary = unique = False
+    while index < len(tokens):
+        token = tokens[index]
+        word = token.upper()
+        index += 1
+        if token == '(':
+            # CHECK (...) and the expression of GENERATED ALWAYS AS (...)
+            _, index = _split(tokens, index)
+        elif word == 'UNSIGNED':
+            unsigned = True
+        elif word == 'PRECISION' and type_name == 'double':
+            continue
+        elif word == 'NOT' and index < len(tokens) and tokens[index].upper() == 'NULL':
+            column.not_null = True
+            index += 1
+        elif word == 'DEFAULT' and index < len(tokens):
+            column.default, column.default_generated, index = _parse_default(tokens, index)
+        elif word == 'AUTO_INCREMENT':
+            column.auto_increment = True
+        elif word == 'COMMENT' and index < len(tokens):
+            column.comment = _unquote(tokens[index])
+            index += 1
+        elif word == 'ON' and index + 1 < len(tokens) and tokens[index].upper() == 'UPDATE':
+            column.on_update, _, index = _parse_default(tokens, index + 1)
+        elif word == 'AS':
+            column.generated = column.generated or 'VIRTUAL'
+        elif word in ('VIRTUAL', 'STORED') and column.generated:
+            column.generated = word
+        elif word == 'PRIMARY' or (word == 'KEY' and not unique):
+            primary = True
+        elif word == 'UNIQUE':
+            unique = True
+        elif word in ('CHARACTER', 'CHARSET', 'COLLATE', 'SRID', 'COLUMN_FORMAT', 'STORAGE'):
+            # Skip the option's value (CHARACTER SET x)
+            if word == 'CHARACTER' and index < len(tokens) and tokens[index].upper() == 'SET':
+                index += 1
+            index += 1
+    column.data_type, column.max_length, column.precision, column.scale = column_type(type_name, args, unsigned)
+    if column.data_type in FSP_TYPES:
+        column.datetime_precision = int(args[0]) if args and args[0].isdigit() else 0
+    return column, primary, unique
+
+class TableDefinition:
+    """The columns, indexes and foreign keys of one CREATE TABLE statement"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.columns: List[_ColumnDefinition] = []
+        # (index name, column names, unique); the primary key first when present
+        self.indexes: List[Tuple[str, List[str], bool]] = []
+        # (constraint name, columns, referenced table, referenced columns)
+        self.foreign_keys: List[Tuple[Optional[str], List[str], str, List[str]]] = []
+
+    def _index_name(self, name: Optional[str], columns: List[str]) -> str:
+        """MySQL names an unnamed index after its first column, then first_column_2, ..."""
+        if name:
+            return name
+        taken = {index_name for index_name, _, _ in self.indexes}
+        base = columns[0] if columns else 'functional_index'
+        name = base
+        number = 2
+        while name in taken:
+            name = f"{base}_{number}"
+            number += 1
+        return name
+
+    def add_definition(self, tokens: List[str]) -> None:
+        """Add one column, key or constraint definition of the CREATE TABLE body"""
+        if not tokens:
+            return
+        word = tokens[0].upper() if tokens[0][:1] != '`' else ''
+        constraint = None
+        if word == 'CONSTRAINT':
+            if len(tokens) > 1 and tokens[1].upper() not in ('PRIMARY', 'UNIQUE', 'FOREIGN', 'CHECK'):
+                constraint = _identifier(tokens[1])
+                tokens = tokens[2:]
+            else:
+                tokens = tokens[1:]
+            word = tokens[0].upper() if tokens else ''
+        if word == 'CHECK':
+            return
+        if word == 'FOREIGN':
+            self._add_foreign_key(constraint, tokens)
+        elif word in ('PRIMARY', 'UNIQUE', 'KEY', 'INDEX', 'FULLTEXT', 'SPATIAL'):
+            self._add_index(word, constraint, tokens)
+        else:
+            column, primary, unique = parse_column(tokens)
+            self.columns.append(column)
+            if primary:
+                self.indexes.insert(0, ('PRIMARY', [column.name], True))
+            elif unique:
+                self.indexes.append((self._index_name(None, [column.name]), [column.name], True))
+
+    def _add_index(self, word: str, constraint: Optional[str], tokens: List[str]) -> None:
+        start = tokens.index('(')
+        # Between the keyword(s) and '(' come the optional index name and USING BTREE
+        names = [token for token in tokens[1:start]
+                 if token.upper() not in ('KEY', 'INDEX', 'USING', 'BTREE', 'HASH')]
+        columns, _ = _key_columns(tokens, start + 1)
+        if word == 'PRIMARY':
+            self.indexes.insert(0, ('PRIMARY', columns, True))
+            return
+        name = _identifier(names[0]) if names else constraint
+        self.indexes.append((self._index_name(name, columns), columns, word == 'UNIQUE'))
+
+    def _add_foreign_key(self, constraint: Optional[str], tokens: List[str]) -> None:
+        start = tokens.index('(')
+        names = [token for token in tokens[1:start] if token.upper() != 'KEY']
+        columns, index = _key_columns(tokens, start + 1)
+        if 'REFERENCES' not in (token.upper() for token in tokens[index:]):
+            return
+        index = next(i for i in range(index, len(tokens)) if tokens[i].upper() == 'REFERENCES')
+        referenced_table, index = _qualified_name(tokens, index + 1)
+        referenced_columns, _ = _key_columns(tokens, index + 1)
+        self.foreign_keys.append((constraint or (_identifier(names[0]) if names else None), columns,
+                                  referenced_table, referenced_columns))
+        # InnoDB adds an index for the referencing columns unless one already starts with them
+        if not any(index_columns[:len(columns)] == columns for _, index_columns, _ in self.indexes):
+            self.indexes.append((self._index_name(constraint, columns), columns, False))
+
+    def column_keys(self) -> Dict[str, str]:
+        """COLUMN_KEY of every indexed column, as INFORMATION_SCHEMA.COLUMNS reports it"""
+        not_null = {column.name for column in self.columns if column.not_null}
+        primary = next((columns for name, columns, _ in self.indexes if name == 'PRIMARY'), None)
+        if primary is None:
+            # Without a primary key the first NOT NULL unique key is shown as PRI
+            primary = next((columns for _, columns, unique in self.indexes
+                            if unique and columns and all(column in not_null for column in columns)), [])
+        keys = {column: 'PRI' for column in primary}
+        for name, columns, unique in self.indexes:
+            if not columns or name == 'PRIMARY' or columns[0] in keys:
+                continue
+            if unique and len(columns) == 1:
+                keys[columns[0]] = 'UNI'
+        for name, columns, unique in self.indexes:
+            if columns and columns[0] not in keys:
+                keys[columns[0]] = 'MUL'
+        return keys
+
+    def table_data(self) -> Dict[str, Any]:
+        """{'columns': [...], 'indexes': [...]} as extract_schema builds it"""
+        keys = self.column_keys()
+        columns = [column.to_column(keys.get(column.name, '')) for column in self.columns]
+        indexes = [IndexColumn(name, column_name, 0 if unique else 1, seq)
+                   for name, index_columns, unique in self.indexes
+                   for seq, column_name in enumerate(index_columns, 1)]
+        indexes.sort(key=lambda index: (index.index_name, index.seq_in_index))
+        return {'columns': columns, 'indexes': indexes}
+
+    def foreign_key_rows(self) -> List[ForeignKey]:
+        """One ForeignKey per column pair; unnamed constraints are named {table}_ibfk_N like InnoDB"""
+        rows = []
+        for number, (constraint, columns, referenced_table, referenced_columns) in enumerate(self.foreign_keys, 1):
+            constraint = constraint or f"{self.name}_ibfk_{number}"
+            for position, (column, referenced_column) in enumerate(zip(columns, referenced_columns), 1):
+                rows.append(ForeignKey(self.name, column, referenced_table, referenced_column, constraint, position))
+        return rows
+
+def parse_create_table(statement: str) -> Optional[TableDefinition]:
+    """Parse one CREATE TABLE statement (None for CREATE TABLE ... LIKE / AS SELECT)"""
+    tokens = _TOKEN.findall(statement)
+    index = next(i for i, token in enumerate(tokens) if token.upper() == 'TABLE') + 1
+    if [token.upper() for token in tokens[index:index + 3]] == ['IF', 'NOT', 'EXISTS']:
+        index += 3
+    name, index = _qualified_name(tokens, index)
+    if index >= len(tokens) or tokens[index] != '(':
+        return None
+    table = TableDefinition(name)
+    parts, _ = _split(tokens, index + 1)
+    for part in parts:
+        table.add_definition(part)
+    return table if table.columns else None
+
+class _StatementScanner:
+    """Tracks quotes and parentheses across the lines of a CREATE TABLE statement"""
+
+    def __init__(self):
+        self.quote = None
+        self.depth = 0
+        self.opened = False
+        self.skip_at = None
+
+    def feed(self, line: bytes) -> bool:
+        """Scan the next line; True once the table body's closing parenthesis has been seen"""
+        skip_at = self.skip_at
+        self.skip_at = None
+        for match in _SPECIAL.finditer(line):
+            position = match.start()
+            if position == skip_at:
+                continue
+            char = match.group()
+            if self.quote is not None:
+                if char == b'\\' and self.quote != b'`':
+                    skip_at = position + 1
+                elif char == self.quote:
+                    self.quote = None
+            elif char in (b'`', b"'", b'"'):
+                self.quote = char
+            elif char == b'(':
+                self.depth += 1
+                self.opened = True
+            elif char == b')':
+                self.depth -= 1
+        if skip_at == len(line):
+            # A backslash at the end of a piece escapes the first character of the next one
+            self.skip_at = 0
+        return self.opened and self.depth <= 0 and self.quote is None
+
+def _read_lines(f) -> Iterator[Tuple[bytes, bool]]:
+    """(line, starts a line) pairs; lines longer than READ_LINE_LIMIT come in several pieces"""
+    line_start = True
+    for piece in iter(lambda: f.readline(READ_LINE_LIMIT), b''):
+        yield piece, line_start
+        line_start = piece.endswith(b'\n')
+
+def _open(path: Path):
+    return gzip.open(path, 'rb') if path.suffix == '.gz' else open(path, 'rb')
+
+def dump_name(path: Path) -> str:
+    """File name without .sql / .gz: the database name used when the dump does not name one"""
+    name = path.name
+    for suffix in DDL_SUFFIXES:
+        name = name.removesuffix(suffix)
+    return name
+
+def iter_create_tables(path: Path) -> Iterator[Tuple[str, str]]:
+    """(database, CREATE TABLE statement) for every table of the dump, in file order
+
+    Lines outside CREATE TABLE statements are only matched against the
+    statement starts, never decoded, so data sections cost little more than
+    reading them. Views (/*!50001 ... */ placeholders) are not tables and are skipped.
+    """
+    database = dump_name(path)
+    statement = None
+    scanner = None
+    with _open(path) as f:
+        for line, line_start in _read_lines(f):
+            if statement is not None:
+                statement.append(line)
+                if scanner.feed(line):
+                    yield database, b''.join(statement).decode('utf-8', errors='replace')
+                    statement = None
+                continue
+            if not line_start or line[:1] not in _LINE_STARTS:
+                continue
+            if _CREATE_TABLE.match(line):
+                statement = [line]
+                scanner = _StatementScanner()
+                if scanner.feed(line):
+                    yield database, line.decode('utf-8', errors='replace')
+                    statement = None
+                continue
+            match = _USE.match(line) or _HEADER.match(line)
+            if match:
+                database = match.group(1).decode('utf-8', errors='replace').replace('``', '`')
+    if statement is not None:
+        logger.warning(f"Warning: {path} ends inside a CREATE TABLE statement; the table is skipped")
+
+def _schema_data(database: str, schema_name: str) -> Dict[str, Any]:
+    return {'database': database, 'schema': schema_name, 'tables': {}, 'relationships': []}
+
+def parse_ddl(path: Path, table_filter: TableFilter = None) -> List[Dict[str, Any]]:
+    """schema_data ({'database', 'schema', 'tables', 'relationships'}) of every database in the dump
+
+    The database is the dump's file name (its output directory); each
+    database dumped (USE `name`, or the -- Database: header) is a schema.
+    """
+    database = dump_name(path)
+    schemas = {}
+    skipped = 0
+    for schema_name, statement in iter_create_tables(path):
+        try:
+            table = parse_create_table(statement)
+        except (StopIteration, ValueError, IndexError) as e:
+            raise Exception(f"Cannot parse CREATE TABLE in {path}: {statement[:80]!r} ({e})")
+        if table is None:
+            continue
+        if table_filter is not None and not table_filter.matches(table.name):
+            skipped += 1
+            continue
+        schema_data = schemas.setdefault(schema_name, _schema_data(database, schema_name))
+        schema_data['tables'][table.name] = table.table_data()
+        schema_data['relationships'].extend(table.foreign_key_rows())
+        metrics.count('ddl_tables')
+
+    for schema_data in schemas.values():
+        relationships = schema_data['relationships']
+        if table_filter is not None and table_filter.active:
+            # The extraction queries filter both ends of a foreign key
+            relationships = [fk for fk in relationships if table_filter.matches(fk.referenced_table_name)
+                             and (not table_filter.table_types or fk.referenced_table_name in schema_data['tables'])]
+        relationships.sort(key=lambda fk: (fk.table_name, fk.constraint_name, fk.ordinal_position))
+        schema_data['relationships'] = relationships
+    if skipped:
+        logger.info(f"Table filter ({table_filter.describe()}) skipped {skipped} tables of {path}")
+    return list(schemas.values())
+
+def main(argv: List[str] = None) -> int:
+    """Convert dumps into schema snapshots, e.g. to diff two dumps with schema_diff.py"""
+    parser = argparse.ArgumentParser(description="Convert mysqldump --no-data output into ERD Plus schema snapshots")
+    parser.add_argument('dumps', nargs='+', type=Path, help="mysqldump / SHOW CREATE TABLE output (.sql or .sql.gz)")
+    parser.add_argument('--output-dir', type=Path,
+                        help=f"Directory for the {{schema}}{SNAPSHOT_SUFFIX} files (default: next to the dump)")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    for path in args.dumps:
+        try:
+            schemas = parse_ddl(path)
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            return 1
+        if not schemas:
+            logger.warning(f"Warning: No CREATE TABLE statements found in {path}")
+        output_dir = args.output_dir or path.parent
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for schema_data in schemas:
+            output_path = output_dir / f"{schema_data['schema']}{SNAPSHOT_SUFFIX}"
+            save_snapshot(schema_data, output_path)
+            logger.info(f"Schema snapshot generated: {output_path} ({len(schema_data['tables'])} tables, "
+                        f"{len(schema_data['relationships'])} foreign key columns)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
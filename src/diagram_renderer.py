@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Diagram Renderer
+Multi-format output: lay the graph out once, then render every requested format from that layout
+"""
+
+import logging
+import subprocess
+import tempfile
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ('pdf', 'svg', 'png')
+DEFAULT_FORMATS = ('pdf',)
+
+LAYOUT_ENGINES = ('dot', 'neato', 'fdp', 'sfdp')
+DEFAULT_LAYOUT_TIMEOUT = 300
+
+# Graph attributes per engine; dot keeps the original hierarchical page layout
+ENGINE_ATTRIBUTES = {
+    'dot': {'rankdir': 'TB', 'size': '12,8'},
+    'neato': {'overlap': 'prism', 'splines': 'true', 'sep': '+8', 'mode': 'major'},
+    'fdp': {'overlap': 'prism', 'splines': 'true', 'sep': '+8'},
+    'sfdp': {'overlap': 'prism', 'splines': 'line', 'outputorder': 'edgesfirst'},
+}
+
+# Used when the selected engine does not finish within the layout timeout
+FALLBACK_ENGINE = 'sfdp'
+
+# Runs one renderer command (cmd, timeout); unset means subprocess.run in the
+# calling thread. The asyncio pipeline sets it so commands run on its event loop.
+command_runner: ContextVar[Optional[Callable[[List[str], float], None]]] = ContextVar('command_runner',
+                                                                                     default=None)
+
+class DiagramOptions(NamedTuple):
+    """How diagrams are rendered: output formats, layout engine ('auto' or a name) and layout timeout"""
+    formats: Tuple[str, ...] = DEFAULT_FORMATS
+    layout_engine: str = 'auto'
+    layout_timeout: float = DEFAULT_LAYOUT_TIMEOUT
+
+def parse_formats(value: str) -> List[str]:
+    """Parse a comma separated format list such as "pdf,svg,png" (order kept, duplicates dropped)"""
+    formats = []
+    for name in (value or '').split(','):
+        name = name.strip().lower()
+        if not name or name in formats:
+            continue
+        if name not in SUPPORTED_FORMATS:
+            raise Exception(f"Unsupported diagram format '{name}' (supported: {', '.join(SUPPORTED_FORMATS)})")
+        formats.append(name)
+    return formats or list(DEFAULT_FORMATS)
+
+def format_paths(base_path: Path, formats: Iterable[str]) -> Dict[str, Path]:
+    """Output path per format, derived from base_path by swapping the suffix"""
+    return {output_format: base_path.with_suffix(f'.{output_format}') for output_format in formats}
+
+def parse_layout_engine(value: str) -> str:
+    """Validate a layout engine setting ('auto' or one of LAYOUT_ENGINES)"""
+    engine = (value or 'auto').strip().lower()
+    if engine != 'auto' and engine not in LAYOUT_ENGINES:
+        raise Exception(f"Unsupported layout engine '{engine}' (supported: auto, {', '.join(LAYOUT_ENGINES)})")
+    return engine
+
+def engine_attributes(engine: str, table_count: int) -> Dict[str, str]:
+    """Tuning attributes for engine on a graph of table_count nodes"""
+    attributes = dict(ENGINE_ATTRIBUTES[engine])
+    if engine == 'sfdp' and table_count > 2000:
+        # Barnes-Hut approximation of the repulsive forces keeps huge graphs near-linear
+        attributes['quadtree'] = 'fast'
+    return attributes
+
+def choose_layout_engine(table_count: int, edge_count: int) -> str:
+    """The 'auto' policy: dot for small graphs, neato up to a few hundred tables, sfdp beyond"""
+    if table_count <= 100 and edge_count <= 200:
+        return 'dot'
+    if table_count <= 400 and edge_count <= 800:
+        return 'neato'
+    return 'sfdp'
+
+def layout_plan(options: DiagramOptions, table_count: int, edge_count: int) -> List[Tuple[str, Dict[str, str]]]:
+    """Engines to try in order with their attributes: the selected one, then the fallback"""
+    engine = options.layout_engine
+    if engine == 'auto':
+        engine = choose_layout_engine(table_count, edge_count)
+    plan = [(engine, engine_attributes(engine, table_count))]
+    if engine != FALLBACK_ENGINE:
+        plan.append((FALLBACK_ENGINE, engine_attributes(FALLBACK_ENGINE, table_count)))
+    return plan
+
+def diagram_outputs(base_path: Path, formats: Iterable[str]) -> Dict[str, Path]:
+    """Diagram paths keyed by the label printed in the run summary"""
+    paths = format_paths(base_path, formats)
+    if len(paths) == 1:
+        return {'ER diagram': next(iter(paths.values()))}
+    return {f"ER diagram ({output_format})": path for output_format, path in paths.items()}
+
+def layout_command(engine: str, source_path: Path, layout_path: Path) -> List[str]:
+    """Command computing the layout once and writing it as positioned DOT"""
+    return [engine, '-Tdot', '-o', str(layout_path), str(source_path)]
+
+def render_command(layout_path: Path, output_format: str, output_path: Path) -> List[str]:
+    """Command rendering a positioned DOT file without re-running the layout
+
+    `neato -n2` keeps the node positions and edge splines already stored in
+    the file, so this is only the cost of drawing.
+    """
+    return ['neato', '-n2', f'-T{output_format}', '-o', str(output_path), str(layout_path)]
+
+def run_command(cmd: List[str], timeout: float = None) -> None:
+    """Run a renderer command, raising CalledProcessError or TimeoutExpired like subprocess.run"""
+    runner = command_runner.get()
+    if runner is not None:
+        runner(cmd, timeout or None)
+        return
+    subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=timeout or None)
+
+def render_layout(layout_path: Path, outputs: Dict[str, Path]) -> None:
+    """Render every requested format from one positioned DOT file"""
+    for output_format, output_path in outputs.items():
+        run_command(render_command(layout_path, output_format, output_path))
+        logger.info(f"ER diagram generated: {output_path}")
+
+def render_dot_source(source_for: Callable[[Dict[str, str]], str], outputs: Dict[str, Path],
+                      plan: List[Tuple[str, Dict[str, str]]], timeout: float = None) -> str:
+    """Lay out once with the first engine in plan that finishes within timeout and render every format
+
+    source_for(attributes) returns the DOT source with the engine's graph
+    attributes applied. A single format is rendered directly by the layout
+    engine; several formats go through one positioned DOT file. Returns the
+    engine that produced the layout.
+    """
+    with tempfile.TemporaryDirectory(prefix='erd_layout_') as tmp_dir:
+        source_path = Path(tmp_dir) / 'graph.gv'
+        layout_path = Path(tmp_dir) / 'layout.gv'
+        for attempt, (engine, attributes) in enumerate(plan, 1):
+            source_path.write_text(source_for(attributes), encoding='utf-8')
+            if len(outputs) == 1:
+                output_format, output_path = next(iter(outputs.items()))
+                cmd = [engine, f'-T{output_format}', '-o', str(output_path), str(source_path)]
+            else:
+                cmd = layout_command(engine, source_path, layout_path)
+            try:
+                run_command(cmd, timeout)
+                break
+            except subprocess.TimeoutExpired:
+                if attempt == len(plan):
+                    raise Exception(f"Layout with {engine} did not finish within {timeout}s")
+                logger.warning(f"Layout with {engine} exceeded {timeout}s, falling back to {plan[attempt][0]}...")
+
+        logger.info(f"Layout engine: {engine}")
+        if len(outputs) == 1:
+            logger.info(f"ER diagram generated: {output_path}")
+        else:
+            render_layout(layout_path, outputs)
+        return engine
+
+def render_with_cache(render_cache: RenderCache, renderer: str, version: str, normalized_source: str,
+                      outputs: Dict[str, Path], render: Callable[[Dict[str, Path]], bool]) -> None:
+    """Serve each format from the render cache and call render() once for the missing ones
+
+    render() returns whether its files may be cached; a layout produced by the
+    fallback engine after a timeout is not, so a later run tries the selected engine again.
+    """
+    if render_cache is None:
+        render(outputs)
+        return
+
+    keys = {}
+    missing = {}
+    for output_format, output_path in outputs.items():
+        keys[output_format] = render_cache.key(renderer, version, output_format, normalized_source)
+        if not render_cache.fetch(keys[output_format], output_format, output_path):
+            missing[output_format] = output_path
+    if not missing:
+        return
+
+    if not render(missing):
+        return
+    for output_format, output_path in missing.items():
+        render_cache.store(keys[output_format], output_format, output_path)
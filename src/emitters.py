@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Schema Emitters
+Feed the .er, Markdown and Graphviz outputs from one traversal of the extracted schema
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Collection, Dict, Any, List, Iterable, Tuple
+from column_format import column_comment, column_constraints, format_data_type, relationship_edges
+from diagram_renderer import DiagramOptions, diagram_outputs
+from erd_generator import ERDGenerator
+from markdown_converter import MarkdownConverter
+from metrics import metrics
+from render_cache import RenderCache
+from schema_graph import RelationshipCollector
+from schema_model import normalize_schema_data
+from schema_snapshot import SnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+class SchemaEmitter:
+    """Base class for outputs driven by emit_schema()"""
+
+    # Metrics phase the time spent in this emitter is reported under
+    phase = 'emit'
+
+    def begin(self, schema_info: Dict[str, Any], table_names: List[str]) -> None:
+        """Called once before any table, with the schema metadata and every table name"""
+        pass
+
+    def table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        """Called once per table, in output order"""
+        pass
+
+    def end(self) -> None:
+        """Called once after the last table; relationships are available in schema_info"""
+        pass
+
+    def close(self) -> None:
+        """Release open files; called after end() and also when the traversal fails"""
+        pass
+
+    def outputs(self) -> Dict[str, Path]:
+        """Return the files produced, keyed by a human readable label"""
+        return {}
+
+class ERDEmitter(SchemaEmitter):
+    """Writes the Haskell ERD .er file"""
+
+    phase = 'erd'
+
+    def __init__(self, output_path: Path):
+        self.output_path = output_path
+        self.generator = None
+        self.file = None
+
+    def begin(self, schema_info: Dict[str, Any], table_names: List[str]) -> None:
+        self.generator = ERDGenerator(schema_info)
+        self.file = open(self.output_path, 'w', encoding='utf-8')
+        self.generator.write_header(self.file)
+
+    def table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        self.generator.write_table(self.file, table_name, table_data)
+
+    def end(self) -> None:
+        self.generator.write_relationships(self.file)
+        self.close()
+        logger.info(f"ERD file generated: {self.output_path}")
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def outputs(self) -> Dict[str, Path]:
+        return {'ERD file': self.output_path}
+
+def _markdown_rows(table_data: Dict[str, Any],
+                   foreign_key_columns: Collection[str] = ()) -> List[Tuple[str, str, List[str], str]]:
+    """(name, type, constraints, comment) rows of one table, worded like the .er labels"""
+    return [
+        (column.name, format_data_type(column), column_constraints(column, foreign_key_columns),
+         column_comment(column))
+        for column in table_data['columns']
+    ]
+
+def _relationship_collector(schema_info: Dict[str, Any]) -> RelationshipCollector:
+    return RelationshipCollector(normalize_schema_data(schema_info)['relationships'])
+
+class MarkdownEmitter(SchemaEmitter):
+    """Writes the Markdown document directly from column metadata (no .er round trip)"""
+
+    phase = 'markdown'
+
+    def __init__(self, output_path: Path, reuse_sections: Dict[str, str] = None):
+        """reuse_sections maps unchanged tables to their section from the previous document,
+        which is copied instead of being formatted again"""
+        self.output_path = output_path
+        self.reuse_sections = reuse_sections or {}
+        self.converter = MarkdownConverter()
+        self.relationships = None
+        self.file = None
+
+    def begin(self, schema_info: Dict[str, Any], table_names: List[str]) -> None:
+        # column_format owns the type/constraint wording, so the .er and Markdown outputs agree
+        self.relationships = _relationship_collector(schema_info)
+        self.file = open(self.output_path, 'w', encoding='utf-8')
+        source_name = f"{schema_info['database']}.{schema_info.get('schema', schema_info['database'])}"
+        self.converter.write_header(self.file, schema_info.get('schema', schema_info['database']), source_name,
+                                    table_names, len(self.relationships.edges()))
+
+    def table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        self.relationships.note_table(table_name, table_data)
+        section = self.reuse_sections.get(table_name)
+        if section is not None:
+            self.file.write(section)
+            return
+        self.converter.write_table(self.file, table_name,
+                                  _markdown_rows(table_data, self.relationships.fk_columns.get(table_name, ())))
+
+    def end(self) -> None:
+        self.converter.write_footer(self.file, relationship_edges(self.relationships))
+        self.close()
+        logger.info(f"Markdown file generated: {self.output_path}")
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def outputs(self) -> Dict[str, Path]:
+        return {'Markdown': self.output_path}
+
+class MarkdownShardEmitter(SchemaEmitter):
+    """Writes token-budgeted Markdown shards with an index and manifest (see markdown_shards)"""
+
+    phase = 'markdown'
+
+    def __init__(self, output_dir: Path, mode: str = 'cluster', token_budget: int = None, workers: int = None):
+        from markdown_shards import DEFAULT_TOKEN_BUDGET
+
+        self.output_dir = output_dir
+        self.mode = mode
+        self.token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+        self.workers = workers
+        self.schema_info = None
+        self.relationships = None
+        self.tables = {}
+        self.index_path = None
+
+    def begin(self, schema_info: Dict[str, Any], table_names: List[str]) -> None:
+        self.schema_info = schema_info
+        self.relationships = _relationship_collector(schema_info)
+
+    def table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        # Shards are packed by size, so the rows are kept until every table is known
+        self.relationships.note_table(table_name, table_data)
+        self.tables[table_name] = _markdown_rows(table_data, self.relationships.fk_columns.get(table_name, ()))
+
+    def end(self) -> None:
+        from markdown_shards import MarkdownSharder
+
+        schema_info = self.schema_info
+        schema_name = schema_info.get('schema', schema_info['database'])
+        sharder = MarkdownSharder(self.mode, self.token_budget, self.workers)
+        self.index_path = sharder.write(self.output_dir, schema_name, f"{schema_info['database']}.{schema_name}",
+                                        self.tables, relationship_edges(self.relationships))
+        self.tables = {}
+
+    def outputs(self) -> Dict[str, Path]:
+        return {'Markdown shard index': self.index_path} if self.index_path else {}
+
+class CompactSchemaEmitter(SchemaEmitter):
+    """Writes the token-dense compact serialization (see compact_schema)"""
+
+    phase = 'compact'
+
+    def __init__(self, output_path: Path):
+        self.output_path = output_path
+        self.writer = None
+        self.file = None
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens written so far"""
+        return self.writer.tokens if self.writer else 0
+
+    def begin(self, schema_info: Dict[str, Any], table_names: List[str]) -> None:
+        from compact_schema import CompactSchemaWriter
+
+        self.writer = CompactSchemaWriter(schema_info)
+        self.file = open(self.output_path, 'w', encoding='utf-8')
+        self.writer.write_header(self.file, len(table_names))
+
+    def table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        self.writer.write_table(self.file, table_name, table_data)
+
+    def end(self) -> None:
+        self.writer.write_relationships(self.file)
+        self.close()
+        logger.info(f"Compact schema generated: {self.output_path} (about {self.tokens} tokens)")
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def outputs(self) -> Dict[str, Path]:
+        return {'Compact schema': self.output_path}
+
+class GraphvizEmitter(SchemaEmitter):
+    """Builds the Graphviz graph during the traversal and renders it at the end (or on render())
+
+    Every table node stays in the graph until it is rendered, because the layout
+    needs the whole graph; this fallback is therefore not bounded in memory
+    under --stream, unlike the .er and Markdown emitters.
+    """
+
+    phase = 'render'
+
+    def __init__(self, output_path: Path, render_cache: RenderCache = None,
+                 options: DiagramOptions = DiagramOptions(), defer_render: bool = False):
+        """With defer_render the graph is only built during the traversal; call render() afterwards"""
+        self.output_path = output_path
+        self.render_cache = render_cache
+        self.options = options
+        self.defer_render = defer_render
+        self.generator = None
+        self.dot = None
+
+    def begin(self, schema_info: Dict[str, Any], table_names: List[str]) -> None:
+        from graphviz_erd import GraphvizERDGenerator
+
+        self.generator = GraphvizERDGenerator(schema_info, render_cache=self.render_cache,
+                                              options=self.options)
+        self.dot = self.generator.new_digraph()
+
+    def table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        self.generator.relationships.note_table(table_name, table_data)
+        self.generator.add_table(self.dot, table_name, table_data['columns'])
+
+    def end(self) -> None:
+        self.generator.add_relationships(self.dot)
+        if not self.defer_render:
+            self.render()
+
+    def render(self) -> None:
+        """Lay out and draw the finished graph"""
+        self.generator.render(self.dot, self.output_path)
+
+    def outputs(self) -> Dict[str, Path]:
+        return diagram_outputs(self.output_path, self.options.formats)
+
+class SnapshotEmitter(SchemaEmitter):
+    """Writes the versioned schema snapshot used by --from-snapshot"""
+
+    phase = 'snapshot'
+
+    def __init__(self, output_path: Path):
+        self.output_path = output_path
+        self.writer = SnapshotWriter(output_path)
+        self.schema_info = None
+
+    def begin(self, schema_info: Dict[str, Any], table_names: List[str]) -> None:
+        self.schema_info = schema_info
+        self.writer.begin(schema_info['database'], schema_info.get('schema', schema_info['database']))
+
+    def table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        self.writer.table(table_name, table_data)
+
+    def end(self) -> None:
+        self.writer.end(self.schema_info['relationships'])
+        logger.info(f"Schema snapshot saved: {self.output_path}")
+
+    def close(self) -> None:
+        self.writer.close()
+
+    def outputs(self) -> Dict[str, Path]:
+        return {'Schema snapshot': self.output_path}
+
+def emit_schema(schema_info: Dict[str, Any], tables: Iterable[Tuple[str, Dict[str, Any]]],
+                emitters: List[SchemaEmitter], table_names: List[str] = None) -> Dict[str, Path]:
+    """Drive every emitter from a single pass over (table_name, table_data) pairs
+
+    tables may be a generator (streaming extraction); table_names must then be
+    given up front so headers and tables of contents can be written first.
+    Time spent in each emitter is added to its metrics phase, time spent
+    waiting for the next table to 'extract'.
+    """
+    if table_names is None:
+        table_names = list(schema_info['tables'].keys())
+
+    clock = time.perf_counter
+    timings = dict.fromkeys(['extract'] + [emitter.phase for emitter in emitters], 0.0)
+    try:
+        for emitter in emitters:
+            start = clock()
+            emitter.begin(schema_info, table_names)
+            timings[emitter.phase] += clock() - start
+        start = clock()
+        for table_name, table_data in tables:
+            timings['extract'] += clock() - start
+            for emitter in emitters:
+                start = clock()
+                emitter.table(table_name, table_data)
+                timings[emitter.phase] += clock() - start
+            start = clock()
+        timings['extract'] += clock() - start
+        for emitter in emitters:
+            start = clock()
+            emitter.end()
+            timings[emitter.phase] += clock() - start
+    finally:
+        for emitter in emitters:
+            emitter.close()
+        schema_name = schema_info.get('schema', schema_info['database'])
+        for phase, seconds in timings.items():
+            metrics.add_time(phase, seconds, schema_name)
+
+    outputs = {}
+    for emitter in emitters:
+        outputs.update(emitter.outputs())
+    return outputs
@@ -4,156 +4,179 @@ ERD Generator
 Converts MySQL schema data to Haskell ERD format and generates diagrams
 """
 
+import logging
 import subprocess
+import tempfile
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Collection, Dict, Any, List, Iterable, TextIO, Tuple
+from column_format import (column_cardinality, column_comment, column_constraints, format_data_type,
+                           relationship_edges)
+from diagram_renderer import (DiagramOptions, FALLBACK_ENGINE, format_paths, layout_plan, render_layout,
+                              render_with_cache, run_command)
+from erd_parser import escape_option
+from render_cache import RenderCache, normalize_erd_source, tool_version
+from schema_graph import RelationshipCollector
+from schema_model import Column, normalize_schema_data
+
+logger = logging.getLogger(__name__)
 
 class ERDGenerator:
-    def __init__(self, schema_data: Dict[str, Any]):
-        """Initialize with schema data"""
-        self.schema_data = schema_data
-    
-    def _get_column_cardinality(self, column: Dict[str, Any]) -> str:
-        """Determine ERD cardinality symbol for a column"""
-        if column['COLUMN_KEY'] == 'PRI':
-            return '*'  # Primary key
-        elif column['IS_NULLABLE'] == 'NO':
-            return '+'  # Required field (1 or more)
-        else:
-            return ''   # Optional field (0 or more)
+    def __init__(self, schema_data: Dict[str, Any], render_cache: RenderCache = None,
+                 options: DiagramOptions = DiagramOptions()):
+        """Initialize with schema data (plain row dicts are converted to model records),
+        an optional render cache used to skip unchanged diagram builds and the diagram options"""
+        self.schema_data = normalize_schema_data(schema_data)
+        self.render_cache = render_cache
+        self.options = options
+        self.relationships = RelationshipCollector(self.schema_data['relationships'], self.schema_data['tables'])
     
-    def _format_column_name(self, column: Dict[str, Any]) -> str:
+    def _format_column_name(self, column: Column, foreign_key_columns: Collection[str] = ()) -> str:
         """Format column name with cardinality symbol and label attribute"""
-        cardinality = self._get_column_cardinality(column)
-        column_name = f"{cardinality}{column['COLUMN_NAME']}"
+        cardinality = column_cardinality(column)
+        column_name = f"{cardinality}{column.name}"
         
         # Generate label attribute with detailed information
-        label_parts = []
-        
-        # Data type with length/precision
-        data_type = column['DATA_TYPE']
-        if column['CHARACTER_MAXIMUM_LENGTH']:
-            data_type += f"({column['CHARACTER_MAXIMUM_LENGTH']})"
-        elif column['NUMERIC_PRECISION'] and column['NUMERIC_SCALE']:
-            data_type += f"({column['NUMERIC_PRECISION']},{column['NUMERIC_SCALE']})"
-        elif column['NUMERIC_PRECISION']:
-            data_type += f"({column['NUMERIC_PRECISION']})"
-        
-        label_parts.append(data_type)
-        
-        # Constraints
-        if column['EXTRA'] and 'auto_increment' in column['EXTRA'].lower():
-            label_parts.append('auto_increment')
-        
-        if column['COLUMN_KEY'] == 'PRI':
-            label_parts.append('primary key')
-        elif column['COLUMN_KEY'] == 'UNI':
-            label_parts.append('unique')
-        elif column['COLUMN_KEY'] == 'MUL':
-            label_parts.append('foreign key')
-        
-        if column['IS_NULLABLE'] == 'NO':
-            label_parts.append('not null')
-        
-        if column['COLUMN_DEFAULT'] is not None:
-            default_value = column['COLUMN_DEFAULT']
-            if default_value == 'CURRENT_TIMESTAMP':
-                label_parts.append('default current_timestamp')
-            else:
-                label_parts.append(f"default {default_value}")
+        label_parts = [format_data_type(column)]
+        label_parts.extend(column_constraints(column, foreign_key_columns))
         
         # Add Japanese comment if exists
-        if column['COLUMN_COMMENT'] and column['COLUMN_COMMENT'].strip():
-            label_parts.append(column['COLUMN_COMMENT'].strip())
+        comment = column_comment(column)
+        if comment:
+            label_parts.append(comment)
         
         # Format with label attribute
-        if label_parts:
-            label_content = ', '.join(label_parts)
-            return f'{column_name} {{label: "{label_content}"}}'
-        else:
-            return column_name
+        label_content = escape_option(', '.join(label_parts))
+        return f'{column_name} {{label: "{label_content}"}}'
     
     def _generate_table_definition(self, table_name: str, table_data: Dict[str, Any]) -> str:
         """Generate ERD table definition"""
         lines = [f"[{table_name}]"]
+        foreign_key_columns = self.relationships.fk_columns.get(table_name, ())
         
         for column in table_data['columns']:
-            formatted_column = self._format_column_name(column)
+            formatted_column = self._format_column_name(column, foreign_key_columns)
             lines.append(formatted_column)
         
         return '\n'.join(lines)
     
     def _generate_relationships(self) -> List[str]:
         """Generate ERD relationship definitions"""
-        relationships = []
-        
-        for fk in self.schema_data['relationships']:
-            source_table = fk['TABLE_NAME']
-            target_table = fk['REFERENCED_TABLE_NAME']
-            
-            # Default relationship: many-to-one (foreign key side is many, referenced side is one)
-            relationship = f"{source_table} *--1 {target_table}"
-            relationships.append(relationship)
-        
-        return relationships
+        return [f"{source} {cardinality} {target}"
+                for source, cardinality, target in relationship_edges(self.relationships)]
+    
+    def write_header(self, f: TextIO) -> None:
+        """Write the header comment block of the .er file"""
+        f.write("# Generated ERD file from MySQL schema\n")
+        f.write(f"# Database: {self.schema_data['database']}\n")
+        if 'schema' in self.schema_data:
+            f.write(f"# Schema: {self.schema_data['schema']}\n")
+        f.write("\n")
+    
+    def write_table(self, f: TextIO, table_name: str, table_data: Dict[str, Any]) -> None:
+        """Write one table definition followed by a blank line"""
+        self.relationships.note_table(table_name, table_data)
+        f.write(self._generate_table_definition(table_name, table_data))
+        f.write("\n\n")
+    
+    def write_relationships(self, f: TextIO) -> None:
+        """Write the relationship section of the .er file"""
+        relationships = self._generate_relationships()
+        if relationships:
+            f.write("# Relationships\n")
+            f.write('\n'.join(relationships))
+            f.write("\n")
     
     def generate_erd_file(self, output_path: Path) -> None:
         """Generate .er file from schema data"""
-        erd_content = []
+        with open(output_path, 'w', encoding='utf-8') as f:
+            self.generate_erd_stream(f, self.schema_data['tables'].items())
         
-        # Add header comment
-        erd_content.append("# Generated ERD file from MySQL schema")
-        erd_content.append(f"# Database: {self.schema_data['database']}")
-        if 'schema' in self.schema_data:
-            erd_content.append(f"# Schema: {self.schema_data['schema']}")
-        erd_content.append("")
+        logger.info(f"ERD file generated: {output_path}")
+    
+    def generate_erd_stream(self, f: TextIO, tables: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Write the .er content table by table as (table_name, table_data) pairs arrive"""
+        self.write_header(f)
         
         # Generate table definitions
-        for table_name, table_data in self.schema_data['tables'].items():
-            table_def = self._generate_table_definition(table_name, table_data)
-            erd_content.append(table_def)
-            erd_content.append("")  # Empty line between tables
+        for table_name, table_data in tables:
+            self.write_table(f, table_name, table_data)
         
         # Generate relationships
-        relationships = self._generate_relationships()
-        if relationships:
-            erd_content.append("# Relationships")
-            erd_content.extend(relationships)
-        
-        # Write to file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(erd_content))
-        
-        print(f"ERD file generated: {output_path}")
+        self.write_relationships(f)
+    
+    @staticmethod
+    def haskell_erd_available() -> bool:
+        """Check whether the Haskell erd binary is on PATH"""
+        return tool_version('erd') is not None
+    
+    @staticmethod
+    def haskell_erd_suitable(options: DiagramOptions, table_count: int, edge_count: int) -> bool:
+        """Haskell ERD always lays out with dot, so only use it when dot is the selected engine"""
+        return layout_plan(options, table_count, edge_count)[0][0] == 'dot'
     
     def generate_diagram(self, erd_file_path: Path, output_image_path: Path) -> None:
         """Generate ER diagram using Haskell ERD tool or fallback to Graphviz"""
-        print(f"Debug: generate_diagram called with output_image_path = {output_image_path}")
+        logger.debug(f"generate_diagram called with output_image_path = {output_image_path}")
+        if not self.haskell_erd_suitable(self.options, len(self.schema_data['tables']),
+                                         len(self.relationships.edges())):
+            logger.info("Layout engine other than dot selected, using Graphviz...")
+            self._generate_with_graphviz(output_image_path)
+            return
         try:
             # Try Haskell ERD first
-            print("Debug: Attempting Haskell ERD...")
+            logger.debug("Attempting Haskell ERD...")
             self._generate_with_haskell_erd(erd_file_path, output_image_path)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Haskell ERD layout exceeded {self.options.layout_timeout}s, "
+                           f"falling back to Graphviz {FALLBACK_ENGINE}...")
+            self._generate_with_graphviz(output_image_path, self.options._replace(layout_engine=FALLBACK_ENGINE))
         except Exception as e:
-            print(f"Haskell ERD not available ({e}), using Graphviz fallback...")
-            print(f"Debug: Switching to Graphviz with path = {output_image_path}")
+            logger.info(f"Haskell ERD not available ({e}), using Graphviz fallback...")
+            logger.debug(f"Switching to Graphviz with path = {output_image_path}")
             self._generate_with_graphviz(output_image_path)
     
     def _generate_with_haskell_erd(self, erd_file_path: Path, output_image_path: Path) -> None:
         """Generate ER diagram using Haskell ERD tool"""
-        # Run erd command to generate PDF
+        version = tool_version('erd')
+        if version is None:
+            raise FileNotFoundError("erd command not found")
+        
+        normalized = None
+        if self.render_cache is not None:
+            with open(erd_file_path, 'r', encoding='utf-8') as f:
+                normalized = normalize_erd_source(f.read())
+        
+        def render(outputs: Dict[str, Path]) -> bool:
+            if len(outputs) == 1:
+                output_format, output_path = next(iter(outputs.items()))
+                self._run_haskell_erd(erd_file_path, output_path, output_format)
+                return True
+            # Several formats: let erd lay the graph out once as positioned DOT
+            with tempfile.TemporaryDirectory(prefix='erd_layout_') as tmp_dir:
+                layout_path = Path(tmp_dir) / 'layout.gv'
+                self._run_haskell_erd(erd_file_path, layout_path, 'dot')
+                render_layout(layout_path, outputs)
+            return True
+        
+        render_with_cache(self.render_cache, 'erd', version, normalized,
+                          format_paths(output_image_path, self.options.formats), render)
+    
+    def _run_haskell_erd(self, erd_file_path: Path, output_path: Path, output_format: str) -> None:
+        """Run the erd command for one output format"""
         cmd = [
             'erd',
             '-i', str(erd_file_path),
-            '-o', str(output_image_path),
-            '-f', 'pdf'
+            '-o', str(output_path),
+            '-f', output_format
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        print(f"ER diagram generated with Haskell ERD: {output_image_path}")
+        run_command(cmd, self.options.layout_timeout)
+        logger.info(f"ER diagram generated with Haskell ERD: {output_path}")
     
-    def _generate_with_graphviz(self, output_image_path: Path) -> None:
+    def _generate_with_graphviz(self, output_image_path: Path, options: DiagramOptions = None) -> None:
         """Generate ER diagram using Graphviz as fallback"""
         from graphviz_erd import GraphvizERDGenerator
         
-        graphviz_generator = GraphvizERDGenerator(self.schema_data)
+        graphviz_generator = GraphvizERDGenerator(self.schema_data, render_cache=self.render_cache,
+                                                  options=options or self.options)
         graphviz_generator.generate_diagram(output_image_path)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+ERD Parser
+Single-pass streaming parser for Haskell ERD (.er) files producing a typed AST
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+# erd cardinality symbols: '?' zero or one, '1' exactly one, '*' zero or more, '+' one or more
+# ('0' is also accepted for zero or one)
+CARDINALITIES = frozenset('?01*+')
+
+# Label parts written by ERDGenerator after the data type
+CONSTRAINT_KEYWORDS = frozenset(['primary key', 'foreign key', 'unique', 'not null', 'auto_increment'])
+
+class ERDParseError(ValueError):
+    """Raised for lines that are not valid ERD syntax"""
+
+    def __init__(self, message: str, line_number: int):
+        super().__init__(f"line {line_number}: {message}")
+        self.message = message
+        self.line_number = line_number
+
+    def __reduce__(self):
+        # Rebuilt from both arguments, so errors survive the converter's process pool
+        return type(self), (self.message, self.line_number)
+
+class Attribute(NamedTuple):
+    """Entity attribute with its key markers and parsed label"""
+    name: str
+    primary_key: bool
+    foreign_key: bool
+    data_type: str
+    constraints: Tuple[str, ...]
+    comment: str
+    options: Dict[str, str]
+
+class Entity(NamedTuple):
+    """Entity ([Name] block) with its attributes in file order"""
+    name: str
+    attributes: Tuple[Attribute, ...]
+    options: Dict[str, str]
+
+class Relationship(NamedTuple):
+    """Relationship line such as `Person *--1 Location`"""
+    source: str
+    source_cardinality: str
+    target: str
+    target_cardinality: str
+    options: Dict[str, str]
+
+    @property
+    def cardinality(self) -> str:
+        """Cardinality in ERD notation, e.g. '*--1'"""
+        return f"{self.source_cardinality}--{self.target_cardinality}"
+
+class Directive(NamedTuple):
+    """Global directive such as `title {label: "..."}`"""
+    name: str
+    options: Dict[str, str]
+
+Node = Union[Entity, Relationship, Directive]
+
+DIRECTIVES = frozenset(['title', 'header', 'entity', 'relationship'])
+
+# A quote closes an option value only when the block ends or another `key: "` follows;
+# older .er files wrote quotes in comments unescaped, and those stay part of the value
+_CLOSING_QUOTE = re.compile(r'\s*(?:,\s*[^\s:,"{}]+\s*:\s*"|,?\s*$)')
+
+def escape_option(value: str) -> str:
+    """Escape backslashes and double quotes for a quoted option value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+def split_label(label: str) -> Tuple[str, Tuple[str, ...], str]:
+    """Split an ERD Plus label into (data type, constraints, comment)
+
+    Commas inside parentheses (decimal(10,2)) do not split. The first part is
+    the data type, known constraint keywords follow, and everything from the
+    first other part onwards is the comment.
+    """
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(label):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(0, depth - 1)
+        elif char == ',' and depth == 0:
+            parts.append(label[start:i].strip())
+            start = i + 1
+    parts.append(label[start:].strip())
+
+    data_type = parts[0]
+    constraints = []
+    index = 1
+    while index < len(parts):
+        lowered = parts[index].lower()
+        if lowered in CONSTRAINT_KEYWORDS or lowered.startswith('default '):
+            constraints.append(parts[index])
+            index += 1
+        else:
+            break
+    comment = ', '.join(part for part in parts[index:] if part)
+    return data_type, tuple(constraints), comment
+
+def _read_name(text: str, pos: int, line_number: int) -> Tuple[str, int]:
+    """Read a bare or quoted (backtick/double quote) identifier starting at pos"""
+    if pos < len(text) and text[pos] in '`"':
+        quote = text[pos]
+        end = text.find(quote, pos + 1)
+        if end == -1:
+            raise ERDParseError(f"unterminated quoted name: {text}", line_number)
+        return text[pos + 1:end], end + 1
+    end = pos
+    while end < len(text) and not text[end].isspace() and text[end] not in '{[]':
+        end += 1
+    if end == pos:
+        raise ERDParseError(f"expected a name: {text}", line_number)
+    return text[pos:end], end
+
+def _parse_options(text: str, line_number: int) -> Dict[str, str]:
+    """Parse an option block `{key: "value", ...}`; empty text gives no options"""
+    text = text.strip()
+    if not text:
+        return {}
+    if not (text.startswith('{') and text.endswith('}')):
+        raise ERDParseError(f"expected an option block: {text}", line_number)
+
+    options = {}
+    pos = 1
+    end = len(text) - 1
+    while pos < end:
+        while pos < end and text[pos] in ' \t,':
+            pos += 1
+        if pos >= end:
+            break
+        colon = text.find(':', pos, end)
+        if colon == -1:
+            raise ERDParseError(f"expected 'key: \"value\"' in options: {text}", line_number)
+        key = text[pos:colon].strip()
+        pos = colon + 1
+        while pos < end and text[pos] in ' \t':
+            pos += 1
+        if pos >= end or text[pos] != '"':
+            raise ERDParseError(f"option '{key}' must be a quoted string: {text}", line_number)
+        pos += 1
+        value = []
+        while pos < end and (text[pos] != '"' or not _CLOSING_QUOTE.match(text, pos + 1, end)):
+            if text[pos] == '\\' and pos + 1 < end:
+                pos += 1
+            value.append(text[pos])
+            pos += 1
+        if pos >= end:
+            raise ERDParseError(f"unterminated string in options: {text}", line_number)
+        options[key] = ''.join(value)
+        pos += 1
+    return options
+
+def _parse_attribute(text: str, line_number: int) -> Attribute:
+    """Parse an attribute line such as `*+id {label: "int(10), primary key"}`"""
+    pos = 0
+    primary_key = foreign_key = False
+    while pos < len(text) and text[pos] in '*+':
+        if text[pos] == '*':
+            primary_key = True
+        else:
+            foreign_key = True
+        pos += 1
+    name, pos = _read_name(text, pos, line_number)
+    options = _parse_options(text[pos:], line_number)
+
+    if 'label' in options:
+        data_type, constraints, comment = split_label(options['label'])
+    else:
+        data_type, constraints, comment = '', (), ''
+    return Attribute(name, primary_key, foreign_key, data_type, constraints, comment, options)
+
+def _parse_relationship(text: str, line_number: int) -> Optional[Relationship]:
+    """Parse `A c--c B {options}`; returns None if the line is not a relationship"""
+    source, pos = _read_name(text, 0, line_number)
+    rest = text[pos:].lstrip()
+    # Cardinality token is exactly <card>--<card> followed by whitespace
+    if (len(rest) < 5 or rest[1:3] != '--' or rest[0] not in CARDINALITIES
+            or rest[3] not in CARDINALITIES or not rest[4].isspace()):
+        return None
+    source_cardinality = rest[0]
+    target_cardinality = rest[3]
+    rest = rest[4:].lstrip()
+    target, pos = _read_name(rest, 0, line_number)
+    options = _parse_options(rest[pos:], line_number)
+    return Relationship(source, source_cardinality, target, target_cardinality, options)
+
+def iter_erd(lines: Iterable[str]) -> Iterator[Node]:
+    """Yield directives, entities and relationships from .er lines in one pass
+
+    Each entity is yielded as soon as the next entity, relationship or end of
+    input closes it, so only one entity is held in memory at a time.
+    """
+    entity_name = None
+    entity_options = {}
+    attributes = []
+
+    for line_number, raw_line in enumerate(lines, 1):
+        line = raw_line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        if line.startswith('['):
+            if entity_name is not None:
+                yield Entity(entity_name, tuple(attributes), entity_options)
+            close = line.find(']')
+            if close == -1:
+                raise ERDParseError(f"unterminated entity header: {line}", line_number)
+            entity_name = line[1:close].strip()
+            if len(entity_name) >= 2 and entity_name[0] == entity_name[-1] and entity_name[0] in '`"':
+                entity_name = entity_name[1:-1]
+            entity_options = _parse_options(line[close + 1:], line_number)
+            attributes = []
+            continue
+
+        first_word = line.split(None, 1)[0]
+        if entity_name is None and first_word in DIRECTIVES and '{' in line:
+            yield Directive(first_word, _parse_options(line[len(first_word):], line_number))
+            continue
+
+        # Relationships are recognised by their `c--c` token, not by any `--`
+        # substring, so labels such as "free -- text" stay attributes
+        if line[0] not in '*+':
+            relationship = _parse_relationship(line, line_number)
+            if relationship is not None:
+                if entity_name is not None:
+                    yield Entity(entity_name, tuple(attributes), entity_options)
+                    entity_name = None
+                yield relationship
+                continue
+
+        if entity_name is None:
+            raise ERDParseError(f"attribute outside of an entity: {line}", line_number)
+        attributes.append(_parse_attribute(line, line_number))
+
+    if entity_name is not None:
+        yield Entity(entity_name, tuple(attributes), entity_options)
+
+def iter_erd_file(erd_file_path: Path) -> Iterator[Node]:
+    """Stream-parse a .er file line by line"""
+    with open(erd_file_path, 'r', encoding='utf-8') as f:
+        yield from iter_erd(f)
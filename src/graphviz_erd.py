@@ -4,60 +4,121 @@ Graphviz ERD Generator
 Alternative to Haskell ERD using Python Graphviz
 """
 
+import logging
 from graphviz import Digraph
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Collection, Dict, Any, List
+from diagram_renderer import DiagramOptions, format_paths, layout_plan, render_dot_source, render_with_cache
+from render_cache import RenderCache, normalize_dot_source, tool_version
+from schema_graph import RelationshipCollector
+from schema_model import Column, normalize_schema_data
+
+logger = logging.getLogger(__name__)
+
+# Graphviz arrow shapes for the erd cardinality symbols
+CROWS_FOOT_ARROWS = {'1': 'teetee', '?': 'teeodot', '0': 'teeodot', '*': 'crowodot', '+': 'crowtee'}
 
 class GraphvizERDGenerator:
-    def __init__(self, schema_data: Dict[str, Any]):
-        """Initialize with schema data"""
-        self.schema_data = schema_data
+    def __init__(self, schema_data: Dict[str, Any], render_cache: RenderCache = None,
+                 options: DiagramOptions = DiagramOptions()):
+        """Initialize with schema data (plain row dicts are converted to model records),
+        an optional render cache used to skip unchanged diagram builds and the diagram options"""
+        self.schema_data = normalize_schema_data(schema_data)
+        self.render_cache = render_cache
+        self.options = options
+        self.relationships = RelationshipCollector(self.schema_data['relationships'], self.schema_data['tables'])
+        # Graph size, used to pick the layout engine
+        self.table_count = 0
+        self.edge_count = 0
     
-    def generate_diagram(self, output_path: Path) -> None:
-        """Generate ER diagram using Graphviz"""
+    def new_digraph(self) -> Digraph:
+        """Create an empty ERD graph (layout attributes are added per engine at render time)
+
+        Starts the table and edge counts again, so a generator can build several graphs.
+        """
+        self.table_count = 0
+        self.edge_count = 0
         dot = Digraph(comment='Database ERD')
-        dot.attr(rankdir='TB', size='12,8')
         dot.attr('node', shape='plaintext')
+        return dot
+    
+    def add_table(self, dot: Digraph, table_name: str, columns: List[Column]) -> None:
+        """Add one table node to the graph"""
+        table_html = self._generate_table_html(table_name, columns, self.relationships.fk_columns.get(table_name, ()))
+        dot.node(table_name, table_html)
+        self.table_count += 1
+    
+    def add_relationships(self, dot: Digraph) -> None:
+        """Add foreign key edges to the graph (one per table pair, crow's foot ends from the cardinality)"""
+        for edge in self.relationships.edges():
+            source_cardinality, target_cardinality = edge.cardinality.split('--')
+            
+            # One line per constraint (\n is the DOT line break escape)
+            label = '\\n'.join(constraint.label for constraint in edge.constraints)
+            dot.edge(edge.source, edge.target, label=label, dir='both',
+                    arrowtail=CROWS_FOOT_ARROWS[source_cardinality],
+                    arrowhead=CROWS_FOOT_ARROWS[target_cardinality])
+            self.edge_count += 1
+    
+    def render(self, dot: Digraph, output_path: Path) -> None:
+        """Render the graph to every configured format (output_path's suffix is replaced per format)"""
+        base_path = str(output_path.with_suffix(''))
+        logger.debug(f"output_path = {output_path}")
+        logger.debug(f"base_path = {base_path}")
+        logger.debug(f"Rendering with formats={list(self.options.formats)}")
+        
+        plan = layout_plan(self.options, self.table_count, self.edge_count)
+        logger.debug(f"Layout plan = {[engine for engine, _ in plan]} "
+                     f"({self.table_count} tables, {self.edge_count} edges)")
+        
+        def source_for(attributes: Dict[str, str]) -> str:
+            graph = dot.copy()
+            graph.attr(**attributes)
+            return graph.source
+        
+        def render_formats(outputs: Dict[str, Path]) -> bool:
+            engine = render_dot_source(source_for, outputs, plan, self.options.layout_timeout)
+            if engine != plan[0][0]:
+                logger.info(f"Not caching the {engine} fallback layout")
+                return False
+            return True
+        
+        normalized = normalize_dot_source(dot.source) if self.render_cache is not None else None
+        render_with_cache(self.render_cache, f"graphviz-{self.options.layout_engine}",
+                          tool_version('dot') or 'unknown', normalized,
+                          format_paths(output_path, self.options.formats), render_formats)
+    
+    def generate_diagram(self, output_path: Path) -> None:
+        """Generate ER diagram using Graphviz"""
+        dot = self.new_digraph()
         
         # Generate table nodes
         for table_name, table_data in self.schema_data['tables'].items():
-            table_html = self._generate_table_html(table_name, table_data['columns'])
-            dot.node(table_name, table_html)
+            self.add_table(dot, table_name, table_data['columns'])
         
         # Generate relationships
-        for relationship in self.schema_data['relationships']:
-            source_table = relationship['TABLE_NAME']
-            target_table = relationship['REFERENCED_TABLE_NAME']
-            label = f"{relationship['COLUMN_NAME']} -> {relationship['REFERENCED_COLUMN_NAME']}"
-            
-            dot.edge(source_table, target_table, label=label, 
-                    arrowhead='crow', arrowtail='none')
-        
-        # Render to PDF
-        base_path = str(output_path.with_suffix(''))
-        print(f"Debug: output_path = {output_path}")
-        print(f"Debug: base_path = {base_path}")
-        print(f"Debug: Rendering with format='pdf'")
+        self.add_relationships(dot)
         
-        dot.render(base_path, format='pdf', cleanup=True)
-        print(f"ER diagram generated: {output_path}")
+        # Render every configured format
+        self.render(dot, output_path)
     
-    def _generate_table_html(self, table_name: str, columns: List[Dict[str, Any]]) -> str:
+    def _generate_table_html(self, table_name: str, columns: List[Column],
+                             foreign_key_columns: Collection[str] = ()) -> str:
         """Generate HTML table representation for Graphviz"""
         html = f'<<TABLE BORDER="1" CELLBORDER="0" CELLSPACING="0">'
         html += f'<TR><TD BGCOLOR="lightblue"><B>{table_name}</B></TD></TR>'
         
         for column in columns:
-            column_name = column['COLUMN_NAME']
-            data_type = column['DATA_TYPE']
+            column_name = column.name
+            data_type = column.data_type
             
             # Format column with indicators
             indicators = []
-            if column['COLUMN_KEY'] == 'PRI':
+            if column.is_primary_key:
                 indicators.append('🔑')  # Primary key
-            if column['COLUMN_KEY'] == 'MUL':
+            if column_name in foreign_key_columns:
                 indicators.append('🔗')  # Foreign key
-            if column['IS_NULLABLE'] == 'NO':
+            if not column.is_nullable:
                 indicators.append('*')   # Required
             
             indicator_str = ' '.join(indicators)
@@ -6,95 +6,785 @@ Main entry point for the application
 
 import os
 import sys
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any, Callable, Dict, List
 from dotenv import load_dotenv
-from db_connector import MySQLSchemaExtractor
+from daemon import DEFAULT_HTTP_HOST, DEFAULT_HTTP_PORT, DEFAULT_INTERVAL
 from erd_generator import ERDGenerator
 from markdown_converter import MarkdownConverter
-from test_simple import test_mysql_connection
+from markdown_shards import DEFAULT_TOKEN_BUDGET, parse_shard_mode
+from metrics import configure_logging, metrics, parse_log_level, parse_profiler
+from diagram_renderer import DiagramOptions, diagram_outputs, parse_formats, parse_layout_engine
+from compact_schema import COMPACT_SUFFIX, log_token_comparison
+from ddl_parser import dump_name, parse_ddl
+from emitters import (ERDEmitter, MarkdownEmitter, MarkdownShardEmitter, CompactSchemaEmitter, GraphvizEmitter,
+                      SnapshotEmitter, emit_schema)
+from partition_renderer import NeighbourhoodRenderer, PartitionRenderer
+from render_cache import RenderCache
+from schema_cache import SchemaCache
+from schema_diff import changed_tables, diff_schemas, has_changes, write_diff_reports
+from schema_graph import RelationshipCollector
+from schema_snapshot import SNAPSHOT_SUFFIX, load_snapshot
+from query_guard import QueryGuard, footprint_summary
+from table_filter import TableFilter
 
-def load_config():
+logger = logging.getLogger(__name__)
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line options (each one falls back to .env)"""
+    parser = argparse.ArgumentParser(description="ERD Plus - MySQL Schema to ERD Generator")
+    parser.add_argument('--schemas',
+                        help="Comma separated list of schemas to document (overrides DB_SCHEMAS / DB_SCHEMA)")
+    parser.add_argument('--concurrency', type=int,
+                        help="Number of schemas extracted in parallel (overrides DB_CONCURRENCY, default 4)")
+    parser.add_argument('--safe-mode', action='store_true',
+                        help="Production-safe extraction: MAX_EXECUTION_TIME per query, query and time budgets "
+                             "and a pause between queries (or set ERD_SAFE_MODE=1)")
+    parser.add_argument('--replica-host',
+                        help="Read the metadata from this replica when reachable (overrides DB_REPLICA_HOST)")
+    parser.add_argument('--max-execution-time', type=int,
+                        help="MAX_EXECUTION_TIME of each metadata query in milliseconds "
+                             "(overrides DB_MAX_EXECUTION_TIME, safe mode default 10000)")
+    parser.add_argument('--query-budget', type=int,
+                        help="Maximum number of metadata queries per run (overrides DB_QUERY_BUDGET, "
+                             "safe mode default 1000)")
+    parser.add_argument('--time-budget', type=float,
+                        help="Maximum seconds spent in metadata queries per run (overrides DB_TIME_BUDGET, "
+                             "safe mode default 120)")
+    parser.add_argument('--query-interval', type=int,
+                        help="Minimum milliseconds between the starts of two metadata queries "
+                             "(overrides DB_QUERY_INTERVAL, safe mode default 100)")
+    parser.add_argument('--fetch-batch-size', type=int,
+                        help="Rows fetched per batch by the streaming metadata queries "
+                             "(overrides DB_FETCH_BATCH_SIZE, default 1000)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Run extract, emit (.er + Markdown) and render as separate asyncio stages so "
+                             "one schema is extracted while another renders (overrides ERD_PIPELINE)")
+    parser.add_argument('--emit-concurrency', type=int,
+                        help="Schemas written in parallel by the pipeline's emit stage "
+                             "(overrides ERD_EMIT_CONCURRENCY, default 2)")
+    parser.add_argument('--render-concurrency', type=int,
+                        help="Schemas rendered in parallel by the pipeline's render stage "
+                             "(overrides ERD_RENDER_CONCURRENCY, default CPU count)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream tables straight into the .er and Markdown files (bounded memory, "
+                             "except for the Graphviz fallback diagram; no schema snapshot, "
+                             "overrides ERD_STREAM)")
+    parser.add_argument('--partition-size', type=int,
+                        help="Split the diagram into parts of at most N tables rendered in parallel "
+                             "(overrides ERD_PARTITION_SIZE, 0 renders one diagram)")
+    parser.add_argument('--neighbourhood-hops', type=int,
+                        help="Render one diagram per table with its neighbours up to K foreign keys away "
+                             "instead of one diagram (overrides ERD_NEIGHBOURHOOD_HOPS, 0 disables)")
+    parser.add_argument('--neighbourhood-max-tables', type=int,
+                        help="Maximum tables in one neighbourhood diagram, nearest first "
+                             "(overrides ERD_NEIGHBOURHOOD_MAX_TABLES, default 30)")
+    parser.add_argument('--include-tables',
+                        help="Comma separated table name globs to extract, e.g. 'order*,user*' "
+                             "(overrides ERD_INCLUDE_TABLES, default all)")
+    parser.add_argument('--exclude-tables',
+                        help="Comma separated table name globs to skip, e.g. 'tmp_*,*_bak' "
+                             "(overrides ERD_EXCLUDE_TABLES)")
+    parser.add_argument('--table-types',
+                        help="Comma separated table types to extract: 'BASE TABLE' (or table), VIEW "
+                             "(overrides ERD_TABLE_TYPES, default all)")
+    parser.add_argument('--markdown-shards',
+                        help="Also write {schema}_md/ for LLM ingestion: 'table' (one file per table) or "
+                             "'cluster' (foreign-key clusters packed up to the token budget) "
+                             "(overrides ERD_MARKDOWN_SHARDS)")
+    parser.add_argument('--token-budget', type=int,
+                        help=f"Estimated tokens per Markdown shard (overrides ERD_MARKDOWN_TOKEN_BUDGET, "
+                             f"default {DEFAULT_TOKEN_BUDGET})")
+    parser.add_argument('--compact', action='store_true',
+                        help="Also write {schema}.schema.txt, a token-dense serialization for LLM context, "
+                             "and compare its estimated tokens with the Markdown (or set ERD_COMPACT=1)")
+    parser.add_argument('--render-workers', type=int,
+                        help="Number of processes rendering diagram parts (overrides ERD_RENDER_WORKERS)")
+    parser.add_argument('--formats',
+                        help="Comma separated diagram formats: pdf, svg, png (overrides ERD_FORMATS, default pdf)")
+    parser.add_argument('--layout-engine',
+                        help="Graphviz layout engine: auto, dot, neato, fdp or sfdp "
+                             "(overrides ERD_LAYOUT_ENGINE, default auto picks by schema size)")
+    parser.add_argument('--layout-timeout', type=float,
+                        help="Seconds a layout may run before falling back to sfdp "
+                             "(overrides ERD_LAYOUT_TIMEOUT, default 300, 0 disables)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore the per-table schema cache and re-read every table")
+    parser.add_argument('--no-render-cache', action='store_true',
+                        help="Always re-run the diagram renderer instead of reusing cached diagrams")
+    parser.add_argument('--full', action='store_true',
+                        help="Rebuild every Markdown section and diagram part even when the diff against the "
+                             "previous snapshot shows the table unchanged (overrides ERD_INCREMENTAL)")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help=f"Do not save the {{schema}}{SNAPSHOT_SUFFIX} schema snapshot (overrides ERD_SNAPSHOT)")
+    parser.add_argument('--from-snapshot', nargs='+', metavar='SNAPSHOT',
+                        help="Render .er, Markdown and diagrams from saved schema snapshots without "
+                             "connecting to MySQL (no .env database settings needed)")
+    parser.add_argument('--from-ddl', nargs='+', metavar='DUMP',
+                        help="Render from mysqldump --no-data / SHOW CREATE TABLE output (.sql or .sql.gz) "
+                             "without connecting to MySQL; each dumped database becomes a schema")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Stay resident: poll schema fingerprints, regenerate changed schemas and serve "
+                             "the latest files over HTTP (overrides ERD_DAEMON)")
+    parser.add_argument('--poll-interval', type=float,
+                        help=f"Seconds between fingerprint polls in daemon mode "
+                             f"(overrides ERD_DAEMON_INTERVAL, default {DEFAULT_INTERVAL})")
+    parser.add_argument('--http-host',
+                        help=f"Address the daemon's HTTP endpoint listens on "
+                             f"(overrides ERD_HTTP_HOST, default {DEFAULT_HTTP_HOST})")
+    parser.add_argument('--http-port', type=int,
+                        help=f"Port of the daemon's HTTP endpoint "
+                             f"(overrides ERD_HTTP_PORT, default {DEFAULT_HTTP_PORT})")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('--quiet', action='store_true',
+                           help="Only log warnings and errors (overrides ERD_LOG_LEVEL)")
+    verbosity.add_argument('--verbose', action='store_true',
+                           help="Log debug details such as every table read (overrides ERD_LOG_LEVEL)")
+    parser.add_argument('--profile',
+                        help="Profile the run: cprofile writes {schema}.pstats, tracemalloc adds the top "
+                             "allocations to metrics.json (overrides ERD_PROFILE)")
+    return parser.parse_args(argv)
+
+def load_config(args: argparse.Namespace = None):
     """Load database configuration from .env file"""
     # Load .env file from the same directory as this script
     env_path = Path(__file__).parent / '.env'
-    
-    if not env_path.exists():
-        print(f"Error: Configuration file {env_path} not found")
-        print("Please copy .env.example to .env and configure your database settings")
+    # Rendering from snapshots or DDL dumps needs no database, so .env is optional there
+    from_snapshot = args is not None and bool(args.from_snapshot)
+    from_ddl = args is not None and bool(args.from_ddl)
+    if from_snapshot and from_ddl:
+        logger.error("Error: --from-snapshot and --from-ddl cannot be combined")
         sys.exit(1)
-    
+
+    if not env_path.exists() and not (from_snapshot or from_ddl):
+        logger.error(f"Error: Configuration file {env_path} not found")
+        logger.error("Please copy .env.example to .env and configure your database settings")
+        sys.exit(1)
+
     load_dotenv(env_path)
-    
+
     config = {
         'host': os.getenv('DB_HOST'),
         'port': int(os.getenv('DB_PORT', '3306')),
         'database': os.getenv('DB_DATABASE'),
         'username': os.getenv('DB_USERNAME'),
         'password': os.getenv('DB_PASSWORD', ''),
-        'schema': os.getenv('DB_SCHEMA')
+        'schema': os.getenv('DB_SCHEMA'),
+        'concurrency': int(os.getenv('DB_CONCURRENCY', '4')),
+        'fetch_batch_size': int(os.getenv('DB_FETCH_BATCH_SIZE', '0')) or None,
+        'replica_host': os.getenv('DB_REPLICA_HOST', ''),
+        'replica_port': int(os.getenv('DB_REPLICA_PORT', '0')) or None,
+        'safe_mode': os.getenv('ERD_SAFE_MODE', '').lower() in ('1', 'true', 'yes'),
+        'max_execution_time_ms': int(os.getenv('DB_MAX_EXECUTION_TIME', '0')),
+        'query_budget': int(os.getenv('DB_QUERY_BUDGET', '0')),
+        'time_budget': float(os.getenv('DB_TIME_BUDGET', '0')),
+        'query_interval_ms': int(os.getenv('DB_QUERY_INTERVAL', '0')),
+        'include_tables': os.getenv('ERD_INCLUDE_TABLES', ''),
+        'exclude_tables': os.getenv('ERD_EXCLUDE_TABLES', ''),
+        'table_types': os.getenv('ERD_TABLE_TYPES', ''),
+        'pipeline': os.getenv('ERD_PIPELINE', '').lower() in ('1', 'true', 'yes'),
+        'emit_concurrency': int(os.getenv('ERD_EMIT_CONCURRENCY', '2')),
+        'render_concurrency': int(os.getenv('ERD_RENDER_CONCURRENCY', '0')) or os.cpu_count() or 1,
+        'pipeline_queue_size': int(os.getenv('ERD_PIPELINE_QUEUE_SIZE', '0')) or None,
+        'cache_dir': os.getenv('ERD_CACHE_DIR', '/data/cache'),
+        'snapshot': os.getenv('ERD_SNAPSHOT', '1').lower() in ('1', 'true', 'yes'),
+        'incremental': os.getenv('ERD_INCREMENTAL', '1').lower() in ('1', 'true', 'yes'),
+        'stream': os.getenv('ERD_STREAM', '').lower() in ('1', 'true', 'yes'),
+        'partition_size': int(os.getenv('ERD_PARTITION_SIZE', '0')),
+        'neighbourhood_hops': int(os.getenv('ERD_NEIGHBOURHOOD_HOPS', '0')),
+        'neighbourhood_max_tables': int(os.getenv('ERD_NEIGHBOURHOOD_MAX_TABLES', '30')),
+        'render_workers': int(os.getenv('ERD_RENDER_WORKERS', '0')) or None,
+        'markdown_shards': os.getenv('ERD_MARKDOWN_SHARDS', ''),
+        'markdown_token_budget': int(os.getenv('ERD_MARKDOWN_TOKEN_BUDGET', str(DEFAULT_TOKEN_BUDGET))),
+        'compact': os.getenv('ERD_COMPACT', '').lower() in ('1', 'true', 'yes'),
+        'formats': os.getenv('ERD_FORMATS', 'pdf'),
+        'layout_engine': os.getenv('ERD_LAYOUT_ENGINE', 'auto'),
+        'layout_timeout': float(os.getenv('ERD_LAYOUT_TIMEOUT', '300')),
+        'render_cache_dir': os.getenv('ERD_RENDER_CACHE_DIR', '/data/cache/render'),
+        'render_cache_max_mb': int(os.getenv('ERD_RENDER_CACHE_MAX_MB', '512')),
+        'render_cache_max_age_days': float(os.getenv('ERD_RENDER_CACHE_MAX_AGE_DAYS', '30')),
+        'daemon': os.getenv('ERD_DAEMON', '').lower() in ('1', 'true', 'yes'),
+        'daemon_interval': float(os.getenv('ERD_DAEMON_INTERVAL', str(DEFAULT_INTERVAL))),
+        'http_host': os.getenv('ERD_HTTP_HOST', DEFAULT_HTTP_HOST),
+        'http_port': int(os.getenv('ERD_HTTP_PORT', str(DEFAULT_HTTP_PORT))),
+        'log_level': os.getenv('ERD_LOG_LEVEL', 'info'),
+        'profile': os.getenv('ERD_PROFILE', '')
     }
-    
+
+    # Multi-schema mode: DB_SCHEMAS (or --schemas) lists several schemas per run
+    schemas = os.getenv('DB_SCHEMAS', '')
+    if args is not None and args.schemas:
+        schemas = args.schemas
+    config['schemas'] = [name.strip() for name in schemas.split(',') if name.strip()]
+    if not config['schemas'] and config['schema']:
+        config['schemas'] = [config['schema']]
+    if config['schemas'] and not config['schema']:
+        config['schema'] = config['schemas'][0]
+
+    if args is not None and args.concurrency:
+        config['concurrency'] = args.concurrency
+    config['concurrency'] = max(1, config['concurrency'])
+    if args is not None and args.fetch_batch_size:
+        config['fetch_batch_size'] = args.fetch_batch_size
+    if args is not None and args.replica_host:
+        config['replica_host'] = args.replica_host
+    if args is not None and args.safe_mode:
+        config['safe_mode'] = True
+    if args is not None and args.max_execution_time is not None:
+        config['max_execution_time_ms'] = args.max_execution_time
+    if args is not None and args.query_budget is not None:
+        config['query_budget'] = args.query_budget
+    if args is not None and args.time_budget is not None:
+        config['time_budget'] = args.time_budget
+    if args is not None and args.query_interval is not None:
+        config['query_interval_ms'] = args.query_interval
+    config['query_guard'] = QueryGuard.from_settings(config['safe_mode'], config['max_execution_time_ms'],
+                                                     config['query_budget'], config['time_budget'],
+                                                     config['query_interval_ms'])
+    if args is not None and args.pipeline:
+        config['pipeline'] = True
+    if args is not None and args.emit_concurrency:
+        config['emit_concurrency'] = args.emit_concurrency
+    if args is not None and args.render_concurrency:
+        config['render_concurrency'] = args.render_concurrency
+    if args is not None and args.stream:
+        config['stream'] = True
+    if args is not None and args.partition_size is not None:
+        config['partition_size'] = args.partition_size
+    if args is not None and args.neighbourhood_hops is not None:
+        config['neighbourhood_hops'] = args.neighbourhood_hops
+    if args is not None and args.neighbourhood_max_tables:
+        config['neighbourhood_max_tables'] = args.neighbourhood_max_tables
+    if args is not None and args.render_workers:
+        config['render_workers'] = args.render_workers
+    if args is not None and args.include_tables is not None:
+        config['include_tables'] = args.include_tables
+    if args is not None and args.exclude_tables is not None:
+        config['exclude_tables'] = args.exclude_tables
+    if args is not None and args.table_types is not None:
+        config['table_types'] = args.table_types
+    if args is not None and args.markdown_shards:
+        config['markdown_shards'] = args.markdown_shards
+    if args is not None and args.token_budget:
+        config['markdown_token_budget'] = args.token_budget
+    if args is not None and args.compact:
+        config['compact'] = True
+    if config['stream'] and config['partition_size'] > 0:
+        logger.error("Error: --partition-size needs the whole schema in memory and cannot be combined with --stream")
+        sys.exit(1)
+    if config['stream'] and config['neighbourhood_hops'] > 0:
+        logger.error("Error: --neighbourhood-hops needs the whole schema in memory and cannot be combined with --stream")
+        sys.exit(1)
+    if config['partition_size'] > 0 and config['neighbourhood_hops'] > 0:
+        logger.error("Error: --partition-size and --neighbourhood-hops cannot be combined")
+        sys.exit(1)
+    if args is not None and args.formats:
+        config['formats'] = args.formats
+    if args is not None and args.layout_engine:
+        config['layout_engine'] = args.layout_engine
+    if args is not None and args.layout_timeout is not None:
+        config['layout_timeout'] = args.layout_timeout
+    if args is not None and args.daemon:
+        config['daemon'] = True
+    if args is not None and args.poll_interval:
+        config['daemon_interval'] = args.poll_interval
+    if args is not None and args.http_host:
+        config['http_host'] = args.http_host
+    if args is not None and args.http_port:
+        config['http_port'] = args.http_port
+    if args is not None and args.quiet:
+        config['log_level'] = 'quiet'
+    if args is not None and args.verbose:
+        config['log_level'] = 'verbose'
+    if args is not None and args.profile:
+        config['profile'] = args.profile
+    try:
+        config['formats'] = parse_formats(config['formats'])
+        config['layout_engine'] = parse_layout_engine(config['layout_engine'])
+        config['markdown_shards'] = parse_shard_mode(config['markdown_shards'])
+        config['table_filter'] = TableFilter.parse(config['include_tables'], config['exclude_tables'],
+                                                   config['table_types'])
+        config['log_level'] = parse_log_level(config['log_level'])
+        config['profile'] = parse_profiler(config['profile'])
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        sys.exit(1)
+    if args is not None and args.no_cache:
+        config['cache_dir'] = ''
+    if args is not None and args.no_render_cache:
+        config['render_cache_dir'] = ''
+    if args is not None and args.no_snapshot:
+        config['snapshot'] = False
+    if args is not None and args.full:
+        config['incremental'] = False
+    if from_snapshot or from_ddl:
+        # The files are the input; the database settings are not used. Snapshots of a
+        # DDL dump are still saved, so that the next dump is diffed against this one
+        if from_snapshot:
+            config['snapshot'] = False
+        if config['daemon']:
+            logger.error(f"Error: {'--from-snapshot' if from_snapshot else '--from-ddl'} "
+                         f"cannot be combined with --daemon")
+            sys.exit(1)
+        return config
+
+    if config['stream'] and config['snapshot']:
+        # Streaming attaches only the unique indexes to the tables, so a snapshot would lack the others
+        logger.info("--stream extracts only unique indexes; no schema snapshot is saved")
+        config['snapshot'] = False
+
     # Validate required fields
     required_fields = ['host', 'database', 'username', 'schema']
     missing_fields = [field for field in required_fields if not config[field]]
-    
+
     if missing_fields:
-        print(f"Error: Missing required configuration fields in .env: {', '.join(missing_fields)}")
+        logger.error(f"Error: Missing required configuration fields in .env: {', '.join(missing_fields)}")
         sys.exit(1)
-    
+
     return config
 
-def main():
+def create_render_cache(config: Dict[str, Any]) -> RenderCache:
+    """Build the diagram render cache from config (None when disabled)"""
+    if not config.get('render_cache_dir'):
+        return None
+    return RenderCache(Path(config['render_cache_dir']),
+                       max_bytes=config['render_cache_max_mb'] * 1024 * 1024,
+                       max_age_days=config['render_cache_max_age_days'])
+
+def diagram_options(config: Dict[str, Any]) -> DiagramOptions:
+    """Diagram formats, layout engine and layout timeout from config"""
+    return DiagramOptions(formats=tuple(config.get('formats', ['pdf'])),
+                          layout_engine=config.get('layout_engine', 'auto'),
+                          layout_timeout=config.get('layout_timeout', 300))
+
+class SchemaJob:
+    """One schema moving through the extract -> emit -> render stages"""
+    __slots__ = ('schema_name', 'output_dir', 'previous_dir', 'schema_info', 'tables', 'table_names', 'outputs',
+                 'changed_tables', 'renderer', 'graph')
+
+    def __init__(self, schema_name: str, output_dir: Path, previous_dir: Path = None):
+        """previous_dir holds the previous run's files when they are not in output_dir (daemon staging)"""
+        self.schema_name = schema_name
+        self.output_dir = output_dir
+        self.previous_dir = previous_dir or output_dir
+        self.schema_info = None
+        self.tables = None
+        self.table_names = None
+        self.outputs = {}
+        # Tables added, dropped or altered since the previous snapshot (None: regenerate everything)
+        self.changed_tables = None
+        # How the render stage draws the diagram: 'partition', 'neighbourhood', 'erd' or
+        # 'graphviz' (the graph built during the emit stage, kept in graph)
+        self.renderer = None
+        self.graph = None
+
+def _use_schema_data(job: SchemaJob, schema_data: Dict[str, Any]) -> None:
+    """Feed the emit stage from a schema held in memory, tables in name order"""
+    tables = schema_data['tables']
+    job.schema_info = schema_data
+    job.table_names = list(tables.keys())
+    job.tables = ((table_name, tables[table_name]) for table_name in sorted(job.table_names))
+
+def extract_stage(config: Dict[str, Any], job: SchemaJob, pool=None) -> SchemaJob:
+    """1. Extract the schema from MySQL (streaming leaves the tables as a generator holding the connection)"""
+    from db_connector import MySQLSchemaExtractor
+
+    schema_name = job.schema_name
+    extractor = MySQLSchemaExtractor(dict(config, schema=schema_name), pool=pool)
+    if config['stream']:
+        # Tables arrive from a generator and are written as soon as they are read
+        logger.info(f"1. [{schema_name}] Connecting to MySQL database and streaming schema...")
+        with metrics.phase('extract', schema_name):
+            job.schema_info, job.tables = extractor.stream_schema()
+        job.table_names = job.schema_info['table_names']
+    else:
+        logger.info(f"1. [{schema_name}] Connecting to MySQL database and extracting schema...")
+        cache = None
+        if config.get('cache_dir'):
+            cache = SchemaCache(Path(config['cache_dir']) / config['database'] / f"{schema_name}.json")
+        with metrics.phase('extract', schema_name):
+            schema_data = extractor.extract_schema(cache=cache)
+        _use_schema_data(job, schema_data)
+    return job
+
+def load_snapshot_stage(job: SchemaJob, snapshot_path: Path) -> SchemaJob:
+    """1. Load the schema from a snapshot instead of MySQL"""
+    logger.info(f"1. [{job.schema_name}] Loading schema snapshot {snapshot_path}...")
+    with metrics.phase('load_snapshot', job.schema_name):
+        schema_data = load_snapshot(snapshot_path)
+    _use_schema_data(job, schema_data)
+    return job
+
+def load_ddl_stage(config: Dict[str, Any], dump_path: Path, output_base_dir: Path) -> List[SchemaJob]:
+    """1. Parse the schemas of a mysqldump --no-data file instead of MySQL (one job per dumped database)"""
+    logger.info(f"1. [{dump_name(dump_path)}] Parsing DDL dump {dump_path}...")
+    with metrics.phase('load_ddl', dump_name(dump_path)):
+        schemas = parse_ddl(dump_path, config.get('table_filter'))
+    if not schemas:
+        raise Exception(f"No CREATE TABLE statements found in {dump_path}")
+    jobs = []
+    for schema_data in schemas:
+        job = SchemaJob(schema_data['schema'], output_base_dir)
+        _use_schema_data(job, schema_data)
+        jobs.append(job)
+    return jobs
+
+def diff_previous_snapshot(config: Dict[str, Any], job: SchemaJob) -> Dict[str, Path]:
+    """Compare the extracted schema with the previous run's snapshot and write {schema}.diff.md/.json
+
+    Unless incremental regeneration is off, the changed tables are recorded
+    on the job so that only their Markdown sections and diagram parts are rebuilt.
+    """
+    schema_name = job.schema_name
+    previous_path = job.previous_dir / f"{schema_name}{SNAPSHOT_SUFFIX}"
+    if not previous_path.exists():
+        return {}
+    try:
+        previous = load_snapshot(previous_path)
+    except Exception as e:
+        logger.warning(f"Warning: Ignoring previous snapshot: {e}")
+        return {}
+    with metrics.phase('diff', schema_name):
+        diff = diff_schemas(previous, job.schema_info)
+    summary = diff['summary']
+    if has_changes(diff):
+        logger.info(f"[{schema_name}] Schema diff: {summary['added_tables']} added, {summary['dropped_tables']} "
+                    f"dropped, {summary['altered_tables']} altered, {summary['unchanged_tables']} unchanged")
+    else:
+        logger.info(f"[{schema_name}] No schema changes since the previous run")
+    outputs = {'Schema diff': job.output_dir / f"{schema_name}.diff.md",
+               'Schema diff (JSON)': job.output_dir / f"{schema_name}.diff.json"}
+    write_diff_reports(diff, outputs['Schema diff'], outputs['Schema diff (JSON)'])
+    if config.get('incremental', True):
+        job.changed_tables = changed_tables(diff)
+    return outputs
+
+def emit_stage(config: Dict[str, Any], job: SchemaJob, render_cache: RenderCache = None) -> SchemaJob:
+    """2. Write the .er file and Markdown (and build the Graphviz graph when erd will not draw it) in one pass"""
+    schema_name = job.schema_name
+    options = diagram_options(config)
+    pdf_path = job.output_dir / f"{schema_name}.pdf"
+    diff_outputs = {}
+    reuse_sections = None
+    if config.get('snapshot') and not config['stream']:
+        # The previous snapshot is about to be replaced, so compare against it first
+        diff_outputs = diff_previous_snapshot(config, job)
+        if job.changed_tables is not None:
+            sections = MarkdownConverter().read_table_sections(job.previous_dir / f"{schema_name}.md")
+            reuse_sections = {table_name: section for table_name, section in sections.items()
+                              if table_name not in job.changed_tables}
+    logger.info(f"2. [{schema_name}] Generating ERD and Markdown files...")
+    emitters = [ERDEmitter(job.output_dir / f"{schema_name}.er"),
+                MarkdownEmitter(job.output_dir / f"{schema_name}.md", reuse_sections=reuse_sections)]
+    if config.get('markdown_shards'):
+        emitters.append(MarkdownShardEmitter(job.output_dir / f"{schema_name}_md", config['markdown_shards'],
+                                             config['markdown_token_budget'], config.get('render_workers')))
+    compact = None
+    if config.get('compact'):
+        compact = CompactSchemaEmitter(job.output_dir / f"{schema_name}{COMPACT_SUFFIX}")
+        emitters.append(compact)
+    if config.get('snapshot'):
+        emitters.append(SnapshotEmitter(job.output_dir / f"{schema_name}{SNAPSHOT_SUFFIX}"))
+    if config.get('partition_size', 0) > 0:
+        job.renderer = 'partition'
+    elif config.get('neighbourhood_hops', 0) > 0:
+        job.renderer = 'neighbourhood'
+    else:
+        # Without Haskell ERD (or when the layout policy picks an engine other than dot)
+        # the diagram is drawn by Graphviz, which is fed by the same pass
+        haskell_erd_available = ERDGenerator.haskell_erd_available()
+        edge_count = len(RelationshipCollector(job.schema_info['relationships']).edges())
+        if haskell_erd_available and ERDGenerator.haskell_erd_suitable(options, len(job.table_names), edge_count):
+            job.renderer = 'erd'
+        else:
+            if haskell_erd_available:
+                logger.info("Layout engine other than dot selected, using Graphviz...")
+            else:
+                logger.info("Haskell ERD not available, using Graphviz fallback...")
+            job.renderer = 'graphviz'
+            job.graph = GraphvizEmitter(pdf_path, render_cache=render_cache, options=options, defer_render=True)
+            emitters.append(job.graph)
+    job.outputs = emit_schema(job.schema_info, job.tables, emitters, table_names=job.table_names)
+    job.outputs.update(diff_outputs)
+    if compact is not None:
+        log_token_comparison(schema_name, compact.tokens, job.output_dir / f"{schema_name}.md")
+    # The generator is exhausted; drop it so the job holds no connection
+    job.tables = None
+    return job
+
+def render_stage(config: Dict[str, Any], job: SchemaJob, render_cache: RenderCache = None) -> SchemaJob:
+    """3. Draw the ER diagram(s)"""
+    schema_name = job.schema_name
+    options = diagram_options(config)
+    previous_dir = job.previous_dir if job.previous_dir != job.output_dir else None
+    render_start = time.perf_counter()
+    if job.renderer == 'partition':
+        logger.info(f"3. [{schema_name}] Generating partitioned ER diagrams...")
+        renderer = PartitionRenderer(job.schema_info, max_tables=config['partition_size'],
+                                     workers=config.get('render_workers'), render_cache=render_cache,
+                                     options=options, changed_tables=job.changed_tables,
+                                     previous_dir=previous_dir)
+        job.outputs['ER diagram index'] = renderer.render(job.output_dir)
+    elif job.renderer == 'neighbourhood':
+        logger.info(f"3. [{schema_name}] Generating per-table neighbourhood diagrams...")
+        renderer = NeighbourhoodRenderer(job.schema_info, hops=config['neighbourhood_hops'],
+                                         max_tables=config['neighbourhood_max_tables'],
+                                         workers=config.get('render_workers'), render_cache=render_cache,
+                                         options=options, changed_tables=job.changed_tables,
+                                         previous_dir=previous_dir)
+        job.outputs['Table diagram index'] = renderer.render(job.output_dir)
+    elif job.renderer == 'erd':
+        logger.info(f"3. [{schema_name}] Generating ER diagram...")
+        pdf_path = job.output_dir / f"{schema_name}.pdf"
+        erd_generator = ERDGenerator(job.schema_info, render_cache=render_cache, options=options)
+        erd_generator.generate_diagram(job.output_dir / f"{schema_name}.er", pdf_path)
+        job.outputs.update(diagram_outputs(pdf_path, options.formats))
+    elif job.renderer == 'graphviz':
+        logger.info(f"3. [{schema_name}] Generating ER diagram with Graphviz...")
+        job.graph.render()
+        job.graph = None
+    metrics.add_time('render', time.perf_counter() - render_start, schema_name)
+
+    metrics.count('bytes_written', sum(path.stat().st_size for path in job.outputs.values() if path.is_file()))
+    return job
+
+def generate_schema_outputs(config: Dict[str, Any], schema_name: str, output_dir: Path,
+                            pool=None, render_cache: RenderCache = None, previous_dir: Path = None) -> Dict[str, Path]:
+    """Run extract -> .er + Markdown (+ Graphviz) -> diagram for a single schema"""
+    job = SchemaJob(schema_name, output_dir, previous_dir)
+    extract_stage(config, job, pool)
+    emit_stage(config, job, render_cache)
+    render_stage(config, job, render_cache)
+    return job.outputs
+
+def profiled_schema_outputs(config: Dict[str, Any], schema_name: str, output_dir: Path,
+                            pool=None, render_cache: RenderCache = None) -> Dict[str, Path]:
+    """generate_schema_outputs under cProfile when enabled (cProfile only sees the calling thread)"""
+    with metrics.profiled(output_dir / f"{schema_name}.pstats"):
+        return generate_schema_outputs(config, schema_name, output_dir, pool, render_cache)
+
+def pipeline_stages(config: Dict[str, Any], pool=None, render_cache: RenderCache = None,
+                    concurrency: int = 1) -> List['Stage']:
+    """Stages of the pipelined batch run; each stage call is profiled on its own when enabled
+
+    Streaming extraction holds its pooled connection until the tables have
+    been written, so in that mode extract and emit run as one stage to keep
+    connections from being handed on to another worker.
+    """
+    from pipeline import Stage
+
+    def profiled(stage_name: str, handler: Callable[[SchemaJob], SchemaJob]) -> Callable[[SchemaJob], SchemaJob]:
+        def run(job: SchemaJob) -> SchemaJob:
+            with metrics.profiled(job.output_dir / f"{job.schema_name}.{stage_name}.pstats"):
+                return handler(job)
+        return run
+
+    def extract(job: SchemaJob) -> SchemaJob:
+        extract_stage(config, job, pool)
+        if config['stream']:
+            emit_stage(config, job, render_cache)
+        return job
+
+    stages = [Stage('extract', profiled('extract', extract), concurrency)]
+    if not config['stream']:
+        stages.append(Stage('emit', profiled('emit', lambda job: emit_stage(config, job, render_cache)),
+                            config['emit_concurrency']))
+    stages.append(Stage('render', profiled('render', lambda job: render_stage(config, job, render_cache)),
+                        config['render_concurrency']))
+    return stages
+
+def run_daemon(config: Dict[str, Any], pool, output_dir: Path, render_cache: RenderCache = None) -> None:
+    """Daemon mode: regenerate schemas when their fingerprint changes and serve the latest files"""
+    from daemon import ERDDaemon
+
+    # The endpoint serves both the PDF and the SVG; one layout renders every format
+    config = dict(config, formats=list(dict.fromkeys(list(config['formats']) + ['pdf', 'svg'])))
+
+    def generate(schema_name: str, target_dir: Path) -> Dict[str, Path]:
+        # Unchanged parts and sections are taken from the published files
+        outputs = generate_schema_outputs(config, schema_name, target_dir, pool, render_cache,
+                                          previous_dir=output_dir)
+        if render_cache is not None:
+            render_cache.evict()
+        return outputs
+
+    daemon = ERDDaemon(config, pool, output_dir, generate, interval=config['daemon_interval'])
+    daemon.run(config['http_host'], config['http_port'])
+
+def render_offline(config: Dict[str, Any], source_paths: List[Path],
+                   load: Callable[[Path, Path], List[SchemaJob]], source_kind: str,
+                   render_cache: RenderCache = None) -> None:
+    """Offline mode: render the schemas loaded from files into /data/output/{database}/ without MySQL
+
+    load(path, output_base_dir) returns the jobs of one file with their
+    schema loaded; source_kind names the files in metrics.json and the log.
+    """
+    output_base_dir = Path("/data/output")
+
+    def render(source_path: Path) -> List[SchemaJob]:
+        jobs = load(source_path, output_base_dir)
+        for job in jobs:
+            job.schema_name = job.schema_info['schema']
+            job.output_dir = job.previous_dir = output_base_dir / job.schema_info['database']
+            job.output_dir.mkdir(parents=True, exist_ok=True)
+            with metrics.profiled(job.output_dir / f"{job.schema_name}.pstats"):
+                emit_stage(config, job, render_cache)
+                render_stage(config, job, render_cache)
+        return jobs
+
+    jobs = []
+    failures = {}
+    with ThreadPoolExecutor(max_workers=min(config['concurrency'], len(source_paths))) as executor:
+        futures = {executor.submit(render, source_path): source_path for source_path in source_paths}
+        for future in as_completed(futures):
+            source_path = futures[future]
+            try:
+                jobs.extend(future.result())
+            except Exception as e:
+                logger.error(f"Error [{source_path}]: {e}")
+                failures[str(source_path)] = e
+
+    if render_cache is not None:
+        render_cache.evict()
+
+    for output_dir in sorted({job.output_dir for job in jobs}):
+        metrics.write(output_dir / 'metrics.json', database=output_dir.name,
+                      schemas=sorted(job.schema_name for job in jobs if job.output_dir == output_dir),
+                      failed=sorted(failures), **{source_kind: [str(path) for path in source_paths]})
+        logger.info(f"Run metrics: {output_dir / 'metrics.json'}")
+    for job in sorted(jobs, key=lambda job: (str(job.output_dir), job.schema_name)):
+        logger.info(f"Success! Generated files for '{job.schema_name}' in {job.output_dir}:")
+        for label, path in job.outputs.items():
+            logger.info(f"  - {label}: {path}")
+
+    if failures:
+        logger.error(f"Error: {len(failures)} of {len(source_paths)} {source_kind} failed: "
+                     f"{', '.join(sorted(failures))}")
+        sys.exit(1)
+
+def render_snapshots(config: Dict[str, Any], snapshot_paths: List[Path], render_cache: RenderCache = None) -> None:
+    """Snapshot mode: render every snapshot without connecting to MySQL"""
+    def load(snapshot_path: Path, output_base_dir: Path) -> List[SchemaJob]:
+        job = SchemaJob(snapshot_path.name.removesuffix(SNAPSHOT_SUFFIX), output_base_dir)
+        return [load_snapshot_stage(job, snapshot_path)]
+
+    render_offline(config, snapshot_paths, load, 'snapshots', render_cache)
+
+def render_ddl(config: Dict[str, Any], dump_paths: List[Path], render_cache: RenderCache = None) -> None:
+    """DDL mode: render every database of the mysqldump files without connecting to MySQL"""
+    if config['table_filter'].active:
+        logger.info(f"Table filter: {config['table_filter'].describe()}")
+
+    def load(dump_path: Path, output_base_dir: Path) -> List[SchemaJob]:
+        return load_ddl_stage(config, dump_path, output_base_dir)
+
+    render_offline(config, dump_paths, load, 'dumps', render_cache)
+
+def main(argv: List[str] = None):
     """Main application logic"""
-    print("ERD Plus - Starting MySQL Schema to ERD Generation")
-    
     # Load configuration
-    config = load_config()
-    
+    args = parse_args(argv)
+    configure_logging()
+    config = load_config(args)
+    configure_logging(config['log_level'])
+    metrics.reset()
+    metrics.start_profiling(config['profile'])
+    logger.info("ERD Plus - Starting MySQL Schema to ERD Generation")
+
+    if args.from_snapshot:
+        render_snapshots(config, [Path(path) for path in args.from_snapshot], create_render_cache(config))
+        return
+    if args.from_ddl:
+        render_ddl(config, [Path(path) for path in args.from_ddl], create_render_cache(config))
+        return
+
+    from db_connector import create_connection_pool
+    from test_simple import test_mysql_connection
+
+    schemas = config['schemas']
+    concurrency = min(config['concurrency'], len(schemas))
+
+    # One bounded pool serves the connection test and every extraction worker
+    try:
+        pool = create_connection_pool(config, pool_size=concurrency)
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        logger.error("❌ Database connection test failed. Please check your configuration.")
+        sys.exit(1)
+
+    if config['query_guard'].active:
+        logger.info(f"Safe mode: {config['query_guard'].describe()}")
+
     # 0. Test database connection first
-    print("0. Testing database connection...")
-    if not test_mysql_connection(config, verbose=True):
-        print("❌ Database connection test failed. Please check your configuration.")
+    logger.info("0. Testing database connection...")
+    if not test_mysql_connection(config, verbose=config['log_level'] <= logging.INFO, pool=pool):
+        logger.error("❌ Database connection test failed. Please check your configuration.")
         sys.exit(1)
-    print("✅ Database connection test passed!\n")
-    
+    logger.info("✅ Database connection test passed!\n")
+
     # Create output directory structure: /data/output/{database}/
     database_name = config['database']
-    schema_name = config['schema']
     output_base_dir = Path("/data/output")
     output_dir = output_base_dir / database_name
     output_dir.mkdir(parents=True, exist_ok=True)
-    
-    try:
-        # 1. Extract schema from MySQL database
-        print("1. Connecting to MySQL database and extracting schema...")
-        extractor = MySQLSchemaExtractor(config)
-        schema_data = extractor.extract_schema()
-        
-        # 2. Generate ERD file
-        print("2. Generating ERD file...")
-        erd_generator = ERDGenerator(schema_data)
-        erd_file_path = output_dir / f"{schema_name}.er"
-        erd_generator.generate_erd_file(erd_file_path)
-        
-        # 3. Generate ER diagram using Haskell ERD
-        print("3. Generating ER diagram...")
-        pdf_path = output_dir / f"{schema_name}.pdf"
-        erd_generator.generate_diagram(erd_file_path, pdf_path)
-        
-        # 4. Convert ERD to Markdown
-        print("4. Converting ERD to Markdown...")
-        converter = MarkdownConverter()
-        markdown_path = output_dir / f"{schema_name}.md"
-        converter.convert_erd_to_markdown(erd_file_path, markdown_path)
-        
-        print(f"Success! Generated files in {output_dir}:")
-        print(f"  - ERD file: {erd_file_path}")
-        print(f"  - ER diagram: {pdf_path}")
-        print(f"  - Markdown: {markdown_path}")
-        
-    except Exception as e:
-        print(f"Error: {e}")
+
+    render_cache = create_render_cache(config)
+
+    if config['daemon']:
+        run_daemon(config, pool, output_dir, render_cache)
+        return
+
+    if len(schemas) > 1:
+        logger.info(f"Processing {len(schemas)} schemas with concurrency {concurrency}")
+
+    results = {}
+    failures = {}
+    if config['pipeline']:
+        from pipeline import DEFAULT_QUEUE_SIZE, run_pipeline
+
+        # Bounded queues between the stages keep at most a few extracted schemas in memory
+        jobs = ((schema_name, SchemaJob(schema_name, output_dir)) for schema_name in schemas)
+        stages = pipeline_stages(config, pool, render_cache, concurrency)
+        logger.info("Pipeline stages: " + ', '.join(f"{stage.name} x{stage.concurrency}" for stage in stages))
+        done, failures = run_pipeline(jobs, stages, config['pipeline_queue_size'] or DEFAULT_QUEUE_SIZE)
+        results = {schema_name: job.outputs for schema_name, job in done.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(profiled_schema_outputs, config, schema_name, output_dir, pool,
+                                render_cache): schema_name
+                for schema_name in schemas
+            }
+            for future in as_completed(futures):
+                schema_name = futures[future]
+                try:
+                    results[schema_name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error [{schema_name}]: {e}")
+                    failures[schema_name] = e
+
+    if render_cache is not None:
+        render_cache.evict()
+
+    metrics_path = output_dir / 'metrics.json'
+    metrics.write(metrics_path, database=database_name, schemas=schemas, failed=sorted(failures))
+
+    for schema_name in schemas:
+        if schema_name not in results:
+            continue
+        logger.info(f"Success! Generated files for '{schema_name}' in {output_dir}:")
+        for label, path in results[schema_name].items():
+            logger.info(f"  - {label}: {path}")
+    logger.info(f"Run metrics: {metrics_path}")
+    if config['query_guard'].active:
+        logger.info(f"Query footprint: {footprint_summary(metrics.snapshot()['queries'])}")
+
+    if failures:
+        logger.error(f"Error: {len(failures)} of {len(schemas)} schemas failed: {', '.join(sorted(failures))}")
         sys.exit(1)
 
 if __name__ == "__main__":
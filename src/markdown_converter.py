@@ -4,210 +4,260 @@ Markdown Converter
 Converts ERD files to Markdown format for LLM consumption
 """
 
+import argparse
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any
-import re
+from typing import Dict, List, Optional, TextIO, Tuple
+from erd_parser import Attribute, Entity, Relationship, iter_erd_file
+from metrics import configure_logging
+
+logger = logging.getLogger(__name__)
 
 class MarkdownConverter:
     def __init__(self):
         """Initialize Markdown converter"""
         pass
     
-    def _parse_erd_file(self, erd_file_path: Path) -> Dict[str, Any]:
-        """Parse ERD file and extract tables and relationships"""
-        with open(erd_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        tables = {}
-        relationships = []
-        current_table = None
-        
-        lines = content.split('\n')
-        for line in lines:
-            line = line.strip()
-            
-            # Skip comments and empty lines
-            if line.startswith('#') or not line:
-                continue
-            
-            # Table definition
-            if line.startswith('[') and line.endswith(']'):
-                current_table = line[1:-1]  # Remove brackets
-                tables[current_table] = []
-            
-            # Column definition
-            elif current_table and not '--' in line:
-                tables[current_table].append(line)
-            
-            # Relationship definition
-            elif '--' in line:
-                relationships.append(line)
-                current_table = None
-        
-        return {
-            'tables': tables,
-            'relationships': relationships
-        }
+    def _attribute_row(self, attribute: Attribute) -> Tuple[str, str, List[str], str]:
+        """Build a (name, type, constraints, comment) row from a parsed .er attribute"""
+        constraints = list(attribute.constraints)
+        lowered = [constraint.lower() for constraint in constraints]
+        # Key markers only add information the label does not already carry;
+        # '+' is trusted only without a label because ERD Plus labels mark
+        # foreign keys explicitly and use '+' for required columns
+        if attribute.primary_key and 'primary key' not in lowered:
+            constraints.insert(0, 'primary key')
+        if attribute.foreign_key and 'label' not in attribute.options:
+            constraints.insert(0, 'foreign key')
+        return attribute.name, attribute.data_type, constraints, attribute.comment
     
-    def _parse_column_info(self, column_text: str) -> Dict[str, str]:
-        """Parse column information from ERD format"""
-        column_info = {
-            'name': '',
-            'type': '',
-            'constraints': [],
-            'comment': ''
-        }
-        
-        # Extract column name (before {label:)
-        if '{label:' in column_text:
-            column_info['name'] = column_text.split('{label:')[0].strip()
-            
-            # Extract label content
-            label_match = re.search(r'\{label:\s*"([^"]+)"\}', column_text)
-            if label_match:
-                label_content = label_match.group(1)
-                
-                # Split label by comma and process each part
-                parts = [part.strip() for part in label_content.split(',')]
-                
-                for i, part in enumerate(parts):
-                    if i == 0:
-                        # First part is usually the data type
-                        column_info['type'] = part
-                    elif any(constraint in part.lower() for constraint in 
-                           ['primary key', 'foreign key', 'unique', 'not null', 'auto_increment', 'default']):
-                        # Constraint keywords
-                        column_info['constraints'].append(part)
-                    else:
-                        # Assume it's a comment (especially if it contains Japanese characters)
-                        if re.search(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]', part):
-                            column_info['comment'] = part
-                        else:
-                            column_info['constraints'].append(part)
-        else:
-            # Fallback: use the whole text as column name
-            column_info['name'] = column_text.strip()
-        
-        # Remove cardinality symbols from name
-        if column_info['name'].startswith('*'):
-            column_info['name'] = column_info['name'][1:].strip()
-            if 'primary key' not in ' '.join(column_info['constraints']).lower():
-                column_info['constraints'].insert(0, 'Primary Key')
-        elif column_info['name'].startswith('+'):
-            column_info['name'] = column_info['name'][1:].strip()
-            if 'foreign key' not in ' '.join(column_info['constraints']).lower():
-                column_info['constraints'].insert(0, 'Foreign Key')
-        
-        return column_info
-    
-    def _format_table_markdown(self, table_name: str, columns: List[str]) -> str:
-        """Format table as Markdown"""
+    def _format_table_rows(self, table_name: str, rows: List[Tuple[str, str, List[str], str]]) -> str:
+        """Format table as Markdown from (name, type, constraints, comment) rows"""
         markdown = [f"## {table_name}"]
         markdown.append("")
         
-        if columns:
+        if rows:
             markdown.append("| Column | Type | Constraints | Comment |")
             markdown.append("|--------|------|-------------|---------|")
             
-            for column in columns:
-                col_info = self._parse_column_info(column)
-                
+            for name, data_type, constraints, comment in rows:
                 # Format constraints
-                constraints_text = ', '.join(col_info['constraints']) if col_info['constraints'] else '-'
+                constraints_text = ', '.join(constraints) if constraints else '-'
                 
                 # Format comment
-                comment_text = col_info['comment'] if col_info['comment'] else '-'
+                comment_text = comment if comment else '-'
                 
-                markdown.append(f"| {col_info['name']} | {col_info['type']} | {constraints_text} | {comment_text} |")
+                markdown.append(f"| {name} | {data_type} | {constraints_text} | {comment_text} |")
         
         markdown.append("")
         return '\n'.join(markdown)
     
-    def _format_relationships_markdown(self, relationships: List[str]) -> str:
-        """Format relationships as Markdown"""
-        if not relationships:
+    def _format_relationship_edges(self, edges: List[Tuple[str, str, str]]) -> str:
+        """Format (source, cardinality, target) relationships as Markdown"""
+        if not edges:
             return ""
         
         markdown = ["# Relationships", ""]
         markdown.append("| Relationship | Type | Description |")
         markdown.append("|--------------|------|-------------|")
         
-        for relationship in relationships:
-            # Parse relationship format: Table1 *--1 Table2
-            parts = relationship.split()
-            if len(parts) >= 3:
-                source = parts[0]
-                relation_type = parts[1]
-                target = parts[2]
-                
-                # Convert ERD notation to readable format
-                cardinality_map = {
-                    '*--1': ("Many-to-One", f"Many {source} records can relate to one {target} record"),
-                    '1--*': ("One-to-Many", f"One {source} record can relate to many {target} records"), 
-                    '1--1': ("One-to-One", f"One {source} record relates to one {target} record"),
-                    '*--*': ("Many-to-Many", f"Many {source} records can relate to many {target} records"),
-                    '0--1': ("Zero-or-One", f"{source} may optionally relate to one {target} record"),
-                    '1--0': ("One-to-Zero", f"One {source} record may optionally relate to {target}"),
-                    '+--1': ("One-or-More to One", f"One or more {source} records relate to one {target} record"),
-                    '1--+': ("One to One-or-More", f"One {source} record relates to one or more {target} records")
-                }
-                
-                readable_type, description = cardinality_map.get(relation_type, (relation_type, f"{source} relates to {target}"))
-                relationship_display = f"{source} → {target}"
-                markdown.append(f"| {relationship_display} | {readable_type} | {description} |")
+        for source, relation_type, target in edges:
+            # Convert ERD notation to readable format
+            cardinality_map = {
+                '*--1': ("Many-to-One", f"Many {source} records can relate to one {target} record"),
+                '*--?': ("Many-to-Zero-or-One", f"Many {source} records can optionally relate to one {target} record"),
+                '?--1': ("One-to-One (optional)", f"At most one {source} record relates to one {target} record"),
+                '?--?': ("Zero-or-One to Zero-or-One", f"At most one {source} record can optionally relate to one {target} record"),
+                '1--*': ("One-to-Many", f"One {source} record can relate to many {target} records"), 
+                '1--1': ("One-to-One", f"One {source} record relates to one {target} record"),
+                '*--*': ("Many-to-Many", f"Many {source} records can relate to many {target} records"),
+                '0--1': ("Zero-or-One", f"{source} may optionally relate to one {target} record"),
+                '1--0': ("One-to-Zero", f"One {source} record may optionally relate to {target}"),
+                '+--1': ("One-or-More to One", f"One or more {source} records relate to one {target} record"),
+                '1--+': ("One to One-or-More", f"One {source} record relates to one or more {target} records")
+            }
+            
+            readable_type, description = cardinality_map.get(relation_type, (relation_type, f"{source} relates to {target}"))
+            relationship_display = f"{source} → {target}"
+            markdown.append(f"| {relationship_display} | {readable_type} | {description} |")
         
         markdown.append("")
         return '\n'.join(markdown)
     
-    def convert_erd_to_markdown(self, erd_file_path: Path, output_path: Path) -> None:
-        """Convert ERD file to Markdown format"""
-        # Parse ERD file
-        erd_data = self._parse_erd_file(erd_file_path)
-        
-        # Generate Markdown content
-        markdown_content = []
+    def write_header(self, f: TextIO, title: str, source_name: str, table_names: List[str],
+                     relationship_count: int) -> None:
+        """Write title, metadata and table of contents"""
+        header = []
         
         # Title and metadata
-        database_name = erd_file_path.stem
-        markdown_content.append(f"# Database Schema: {database_name}")
-        markdown_content.append("")
-        markdown_content.append(f"**Generated from:** `{erd_file_path.name}`")
-        markdown_content.append(f"**Tables:** {len(erd_data['tables'])}")
-        markdown_content.append(f"**Relationships:** {len(erd_data['relationships'])}")
-        markdown_content.append("")
+        header.append(f"# Database Schema: {title}")
+        header.append("")
+        header.append(f"**Generated from:** `{source_name}`")
+        header.append(f"**Tables:** {len(table_names)}")
+        header.append(f"**Relationships:** {relationship_count}")
+        header.append("")
         
         # Table of Contents
-        if erd_data['tables']:
-            markdown_content.append("## Table of Contents")
-            markdown_content.append("")
-            for table_name in sorted(erd_data['tables'].keys()):
-                markdown_content.append(f"- [{table_name}](#{table_name.lower()})")
-            markdown_content.append("")
-        
-        # Tables
-        if erd_data['tables']:
-            markdown_content.append("# Tables")
-            markdown_content.append("")
-            
-            # Sort tables alphabetically for better readability
-            for table_name in sorted(erd_data['tables'].keys()):
-                columns = erd_data['tables'][table_name]
-                table_md = self._format_table_markdown(table_name, columns)
-                markdown_content.append(table_md)
+        if table_names:
+            header.append("## Table of Contents")
+            header.append("")
+            for table_name in sorted(table_names):
+                header.append(f"- [{table_name}](#{table_name.lower()})")
+            header.append("")
+            header.append("# Tables")
+            header.append("")
         
+        f.write('\n'.join(header) + '\n')
+    
+    def write_table(self, f: TextIO, table_name: str, rows: List[Tuple[str, str, List[str], str]]) -> None:
+        """Write one table section from (name, type, constraints, comment) rows"""
+        f.write(self._format_table_rows(table_name, rows) + '\n')
+    
+    def read_table_sections(self, markdown_path: Path) -> Dict[str, str]:
+        """Read the table sections of a Markdown file written by write_table, keyed by table name
+
+        Each value is the section exactly as written, so it can be copied into a new
+        document instead of being formatted again. A missing file yields no sections.
+        """
+        sections = {}
+        try:
+            f = open(markdown_path, encoding='utf-8')
+        except FileNotFoundError:
+            return sections
+        with f:
+            in_tables = False
+            table_name = None
+            lines = []
+            for line in f:
+                if not in_tables:
+                    in_tables = line == '# Tables\n'
+                    continue
+                if line.startswith('## ') or line.startswith('# ') or line.startswith('---'):
+                    if table_name is not None:
+                        sections[table_name] = ''.join(lines)
+                    if not line.startswith('## '):
+                        break
+                    table_name = line[3:].rstrip('\n')
+                    lines = [line]
+                elif table_name is not None:
+                    lines.append(line)
+        return sections
+    
+    def write_footer(self, f: TextIO, edges: List[Tuple[str, str, str]]) -> None:
+        """Write the relationship section and closing metadata from (source, cardinality, target) edges"""
         # Relationships
-        if erd_data['relationships']:
-            relationships_md = self._format_relationships_markdown(erd_data['relationships'])
-            markdown_content.append(relationships_md)
+        if edges:
+            f.write(self._format_relationship_edges(edges) + '\n')
         
+        self._write_closing(f)
+    
+    def _write_closing(self, f: TextIO) -> None:
+        """Write the closing metadata"""
         # Additional metadata
-        markdown_content.append("---")
-        markdown_content.append("")
-        markdown_content.append("*Generated by ERD Plus - MySQL Schema to ERD Generation System*")
-        markdown_content.append("")
+        f.write("---\n")
+        f.write("\n")
+        f.write("*Generated by ERD Plus - MySQL Schema to ERD Generation System*\n")
+    
+    def _read_erd(self, erd_file_path: Path) -> Tuple[Dict[str, List[Tuple[str, str, List[str], str]]],
+                                                      List[Tuple[str, str, str]]]:
+        """Stream-parse an ERD file into {table: rows} and (source, cardinality, target) edges"""
+        tables = {}
+        edges = []
+        for node in iter_erd_file(erd_file_path):
+            if isinstance(node, Entity):
+                tables[node.name] = [self._attribute_row(attribute) for attribute in node.attributes]
+            elif isinstance(node, Relationship):
+                edges.append((node.source, node.cardinality, node.target))
+        return tables, edges
+    
+    def convert_erd_to_markdown(self, erd_file_path: Path, output_path: Path) -> None:
+        """Convert ERD file to Markdown format"""
+        # Entities are kept as compact rows for sorting
+        tables, edges = self._read_erd(erd_file_path)
         
-        # Write to file
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(markdown_content))
+            self.write_header(f, erd_file_path.stem, erd_file_path.name, list(tables.keys()), len(edges))
+            
+            # Sort tables alphabetically for better readability
+            for table_name in sorted(tables.keys()):
+                self.write_table(f, table_name, tables[table_name])
+            
+            self.write_footer(f, edges)
+        
+        logger.info(f"Markdown file generated: {output_path}")
+    
+    def convert_erd_to_shards(self, erd_file_path: Path, output_dir: Path, mode: str = 'cluster',
+                              token_budget: int = None, workers: int = None) -> Path:
+        """Convert ERD file to token-budgeted Markdown shards in output_dir; returns the index path"""
+        from markdown_shards import DEFAULT_TOKEN_BUDGET, MarkdownSharder
         
-        print(f"Markdown file generated: {output_path}")
+        tables, edges = self._read_erd(erd_file_path)
+        sharder = MarkdownSharder(mode, token_budget or DEFAULT_TOKEN_BUDGET, workers)
+        return sharder.write(output_dir, erd_file_path.stem, erd_file_path.name, tables, edges)
+
+def _find_erd_files(paths: List[Path], recursive: bool) -> List[Path]:
+    """Expand files and directories into the list of .er files to convert"""
+    erd_files = []
+    for path in paths:
+        if path.is_dir():
+            pattern = '**/*.er' if recursive else '*.er'
+            erd_files.extend(sorted(path.glob(pattern)))
+        else:
+            erd_files.append(path)
+    return erd_files
+
+def _convert_one(erd_file_path: Path, output_dir: Optional[Path], shard_mode: str = '',
+                 token_budget: int = None) -> Path:
+    """Convert a single .er file (process pool worker)"""
+    target_dir = output_dir if output_dir is not None else erd_file_path.parent
+    if shard_mode:
+        # Files are already converted in parallel, so each one formats its shards in-process
+        return MarkdownConverter().convert_erd_to_shards(erd_file_path, target_dir / f"{erd_file_path.stem}_md",
+                                                         shard_mode, token_budget, workers=1)
+    output_path = target_dir / erd_file_path.with_suffix('.md').name
+    MarkdownConverter().convert_erd_to_markdown(erd_file_path, output_path)
+    return output_path
+
+def main(argv: List[str] = None):
+    """Batch-convert .er files and directories of .er files to Markdown without a database"""
+    parser = argparse.ArgumentParser(description="Convert ERD (.er) files to Markdown")
+    parser.add_argument('paths', nargs='+', type=Path, help=".er files or directories containing them")
+    parser.add_argument('-o', '--output-dir', type=Path,
+                        help="Directory for the Markdown files (default: next to each .er file)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Search directories recursively")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="Number of files converted in parallel")
+    parser.add_argument('--shards', choices=['table', 'cluster'],
+                        help="Write {name}_md/ with one file per table, or per foreign-key cluster packed "
+                             "up to the token budget, plus index.md and manifest.json")
+    parser.add_argument('--token-budget', type=int,
+                        help="Estimated tokens per shard in cluster mode (default 8000)")
+    args = parser.parse_args(argv)
+    configure_logging()
+    
+    erd_files = _find_erd_files(args.paths, args.recursive)
+    if not erd_files:
+        logger.error("Error: No .er files found")
+        sys.exit(1)
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = {executor.submit(_convert_one, erd_file, args.output_dir, args.shards or '', args.token_budget): erd_file
+                   for erd_file in erd_files}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except (OSError, ValueError) as e:
+                # ValueError covers ERDParseError and files that are not valid UTF-8
+                logger.error(f"Error converting {futures[future]}: {e}")
+                failures += 1
+    
+    logger.info(f"Converted {len(erd_files) - failures} of {len(erd_files)} .er files")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Markdown Shards
+Splits the schema Markdown into files that fit a token budget (one per table, or tables
+packed along foreign-key clusters) plus an index and a manifest with per-shard token estimates
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from markdown_converter import MarkdownConverter
+from partition_renderer import file_stem
+from schema_graph import ForeignKeyIndex, _build_adjacency, connected_components
+from schema_model import ForeignKey
+from tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SHARD_MODES = ('table', 'cluster')
+DEFAULT_TOKEN_BUDGET = 8000
+MANIFEST_VERSION = 1
+# Headings of the relationships and related tables sections of a shard
+RELATIONSHIP_HEADER_TOKENS = 28
+# Smaller schemas are formatted in-process; a pool would cost more than it saves
+PARALLEL_MIN_TABLES = 200
+
+# (name, type, constraints, comment) rows and (source, cardinality, target) edges
+Row = Tuple[str, str, List[str], str]
+Edge = Tuple[str, str, str]
+
+def parse_shard_mode(value: str) -> str:
+    """Validate a shard mode ('' disables sharding)"""
+    mode = value.strip().lower()
+    if mode and mode not in SHARD_MODES:
+        raise Exception(f"Unknown Markdown shard mode '{value}' (supported: {', '.join(SHARD_MODES)})")
+    return mode
+
+def _format_chunk(chunk: List[Tuple[str, List[Row]]]) -> List[Tuple[str, str, int]]:
+    """Format table sections and estimate their tokens (process pool worker)"""
+    converter = MarkdownConverter()
+    results = []
+    for table_name, rows in chunk:
+        section = converter._format_table_rows(table_name, rows) + '\n'
+        results.append((table_name, section, estimate_tokens(section)))
+    return results
+
+def format_sections(tables: Dict[str, List[Row]], workers: int = None) -> Dict[str, Tuple[str, int]]:
+    """{table_name: (section, estimated tokens)}, formatted in a process pool for large schemas"""
+    items = sorted(tables.items())
+    if workers == 1 or len(items) < PARALLEL_MIN_TABLES:
+        return {table_name: (section, tokens) for table_name, section, tokens in _format_chunk(items)}
+    workers = workers or os.cpu_count() or 1
+    chunk_size = -(-len(items) // (workers * 4))
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+    sections = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_format_chunk, chunks):
+            for table_name, section, tokens in results:
+                sections[table_name] = (section, tokens)
+    return sections
+
+def _split_by_tokens(component: List[str], adjacency: Dict[str, set], tokens: Dict[str, int],
+                     budget: int) -> List[List[str]]:
+    """Split a component into BFS clusters from hub tables, each within budget (or one table)"""
+    remaining = set(component)
+    clusters = []
+    while remaining:
+        start = max(sorted(remaining), key=lambda name: len(adjacency[name] & remaining))
+        cluster = []
+        size = 0
+        queue = deque([start])
+        queued = {start}
+        while queue:
+            table_name = queue.popleft()
+            if cluster and size + tokens[table_name] > budget:
+                continue
+            cluster.append(table_name)
+            size += tokens[table_name]
+            for neighbour in sorted(adjacency[table_name] & remaining):
+                if neighbour not in queued:
+                    queued.add(neighbour)
+                    queue.append(neighbour)
+        remaining.difference_update(cluster)
+        clusters.append(sorted(cluster))
+    return clusters
+
+def pack_tables(table_names: List[str], edges: List[Edge], tokens: Dict[str, int],
+                budget: int) -> List[List[str]]:
+    """Group tables into shards of at most budget estimated tokens
+
+    Connected components of the foreign-key graph stay together when they
+    fit, larger ones are split breadth-first so related tables share a
+    shard, and the clusters are then packed first-fit decreasing.
+    """
+    fk_index = ForeignKeyIndex([ForeignKey(source, '', target, '', '') for source, _, target in edges])
+    adjacency = _build_adjacency(table_names, fk_index)
+    clusters = []
+    for component in connected_components(adjacency.keys(), fk_index):
+        if sum(tokens[table_name] for table_name in component) <= budget:
+            clusters.append(component)
+        else:
+            clusters.extend(_split_by_tokens(component, adjacency, tokens, budget))
+
+    shards = []
+    for cluster in sorted(clusters, key=lambda cluster: (-sum(tokens[name] for name in cluster), cluster[0])):
+        size = sum(tokens[table_name] for table_name in cluster)
+        for shard in shards:
+            if shard[0] + size <= budget:
+                shard[0] += size
+                shard[1].extend(cluster)
+                break
+        else:
+            shards.append([size, list(cluster)])
+    return [sorted(tables) for _, tables in shards]
+
+class MarkdownSharder:
+    def __init__(self, mode: str = 'cluster', token_budget: int = DEFAULT_TOKEN_BUDGET, workers: int = None):
+        """Initialize with the shard mode ('table' or 'cluster'), the token budget per shard
+        and the number of processes formatting table sections"""
+        self.mode = mode
+        self.token_budget = max(1, token_budget)
+        self.workers = workers
+        self.converter = MarkdownConverter()
+
+    def _edge_tokens(self, edges: List[Edge]) -> List[int]:
+        """Estimated tokens of each edge's row in a relationships table"""
+        lines = self.converter._format_relationship_edges(edges).split('\n')
+        # Lines 0-3 are the heading, a blank line and the table header
+        return [estimate_tokens(line) + 1 for line in lines[4:4 + len(edges)]]
+
+    def write(self, output_dir: Path, title: str, source_name: str, tables: Dict[str, List[Row]],
+              edges: List[Edge]) -> Path:
+        """Write the shards, index.md and manifest.json into output_dir; returns the index path"""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        sections = format_sections(tables, self.workers)
+
+        # Each shard repeats the relationships touching its tables (and links the tables at
+        # their other end), so count those per table; the shard header comes off the budget
+        tokens = {table_name: section_tokens for table_name, (_, section_tokens) in sections.items()}
+        for (source, _, target), edge_tokens in zip(edges, self._edge_tokens(edges)):
+            for table_name, other in {(source, target), (target, source)}:
+                if table_name in tokens:
+                    tokens[table_name] += edge_tokens
+                    if other != table_name:
+                        tokens[table_name] += estimate_tokens(f"- [{other}](shard_000.md#{other})")
+        overhead = estimate_tokens(self._shard_text(title, "shard 000 of 000", source_name, [], {}, [], {}))
+        overhead += RELATIONSHIP_HEADER_TOKENS
+
+        if self.mode == 'table':
+            shards = [(f"{file_stem(table_name)}.md", [table_name]) for table_name in sorted(sections)]
+        else:
+            packed = pack_tables(sorted(sections), edges, tokens, max(1, self.token_budget - overhead))
+            shards = [(f"shard_{number:03d}.md", shard_tables) for number, shard_tables in enumerate(packed, 1)]
+        shard_of = {table_name: file_name for file_name, shard_tables in shards for table_name in shard_tables}
+
+        entries = []
+        for number, (file_name, shard_tables) in enumerate(shards, 1):
+            label = shard_tables[0] if self.mode == 'table' else f"shard {number} of {len(shards)}"
+            text = self._shard_text(title, label, source_name, shard_tables, sections, edges, shard_of)
+            (output_dir / file_name).write_text(text, encoding='utf-8')
+            shard_tokens = estimate_tokens(text)
+            entry = {'file': file_name, 'tables': shard_tables, 'tokens': shard_tokens}
+            if shard_tokens > self.token_budget:
+                entry['over_budget'] = True
+                logger.warning(f"Warning: {file_name} is estimated at {shard_tokens} tokens, "
+                               f"over the budget of {self.token_budget}")
+            entries.append(entry)
+
+        self._remove_stale_shards(output_dir, {file_name for file_name, _ in shards})
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'title': title,
+            'source': source_name,
+            'mode': self.mode,
+            'token_budget': self.token_budget,
+            'total_tokens': sum(entry['tokens'] for entry in entries),
+            'shards': entries,
+            'tables': shard_of,
+        }
+        (output_dir / 'manifest.json').write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + '\n',
+                                                  encoding='utf-8')
+        index_path = output_dir / 'index.md'
+        self._write_index(index_path, manifest)
+        logger.info(f"Markdown shards generated: {len(entries)} files, about {manifest['total_tokens']} tokens "
+                    f"({index_path})")
+        return index_path
+
+    def _shard_text(self, title: str, label: str, source_name: str, shard_tables: List[str],
+                    sections: Dict[str, Tuple[str, int]], edges: List[Edge], shard_of: Dict[str, str]) -> str:
+        """One self-contained shard: its tables, the relationships touching them and links to related shards"""
+        selected = set(shard_tables)
+        lines = [f"# Database Schema: {title} ({label})", ""]
+        lines.append(f"**Generated from:** `{source_name}`")
+        lines.append(f"**Tables:** {len(shard_tables)}")
+        lines.append("**Index:** [index.md](index.md)")
+        lines.append("")
+        lines.append("# Tables")
+        lines.append("")
+        text = '\n'.join(lines) + '\n' + ''.join(sections[table_name][0] for table_name in shard_tables)
+
+        shard_edges = [edge for edge in edges if edge[0] in selected or edge[2] in selected]
+        if shard_edges:
+            text += self.converter._format_relationship_edges(shard_edges) + '\n'
+        related = sorted({table_name for source, _, target in shard_edges for table_name in (source, target)
+                          if table_name not in selected and table_name in shard_of})
+        if related:
+            text += "# Related Tables\n\n"
+            text += ''.join(f"- [{table_name}]({shard_of[table_name]}#{table_name.lower()})\n"
+                            for table_name in related)
+            text += "\n"
+        return text
+
+    def _remove_stale_shards(self, output_dir: Path, file_names: set) -> None:
+        """Delete shards listed by the previous manifest that this run did not write"""
+        try:
+            previous = json.loads((output_dir / 'manifest.json').read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        for entry in previous.get('shards', []):
+            if entry.get('file') not in file_names:
+                (output_dir / entry['file']).unlink(missing_ok=True)
+
+    def _write_index(self, index_path: Path, manifest: Dict[str, Any]) -> None:
+        """Write the shard list with token estimates and the table -> shard lookup"""
+        lines = [f"# Markdown Shards: {manifest['title']}", ""]
+        lines.append(f"**Generated from:** `{manifest['source']}`")
+        lines.append(f"**Mode:** {manifest['mode']} (token budget {manifest['token_budget']})")
+        lines.append(f"**Tables:** {len(manifest['tables'])} / **Shards:** {len(manifest['shards'])} / "
+                     f"**Estimated tokens:** {manifest['total_tokens']}")
+        lines.append("")
+        lines.append("## Shards")
+        lines.append("")
+        lines.append("| Shard | Tables | Estimated tokens |")
+        lines.append("|-------|--------|------------------|")
+        for entry in manifest['shards']:
+            tables = ', '.join(entry['tables']) if len(entry['tables']) <= 5 else \
+                f"{', '.join(entry['tables'][:5])}, ... ({len(entry['tables'])})"
+            lines.append(f"| [{entry['file']}]({entry['file']}) | {tables} | {entry['tokens']} |")
+        lines.append("")
+        lines.append("## Tables")
+        lines.append("")
+        lines.append("| Table | Shard |")
+        lines.append("|-------|-------|")
+        for table_name, file_name in sorted(manifest['tables'].items()):
+            lines.append(f"| {table_name} | [{file_name}]({file_name}#{table_name.lower()}) |")
+        lines.append("")
+        index_path.write_text('\n'.join(lines), encoding='utf-8')
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Run Metrics
+Phase timings, query and row counters, peak memory and optional profiling for one run,
+written as JSON next to the generated files
+"""
+
+import cProfile
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+PROFILERS = ('cprofile', 'tracemalloc')
+LOG_FORMATS = {
+    logging.DEBUG: '%(asctime)s %(threadName)s %(name)s: %(message)s',
+    logging.INFO: '%(message)s',
+    logging.WARNING: '%(message)s',
+}
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """Send log records to stdout; INFO and WARNING look like the plain progress output"""
+    logging.basicConfig(level=level, format=LOG_FORMATS.get(level, '%(message)s'),
+                        stream=sys.stdout, force=True)
+
+def parse_log_level(value: str) -> int:
+    """Validate a log level name (quiet, info, verbose or a logging level name)"""
+    aliases = {'quiet': logging.WARNING, 'verbose': logging.DEBUG}
+    name = value.strip().lower()
+    if name in aliases:
+        return aliases[name]
+    level = logging.getLevelName(name.upper())
+    if not isinstance(level, int):
+        raise Exception(f"Unknown log level '{value}' (use quiet, info or verbose)")
+    return level
+
+def parse_profiler(value: str) -> str:
+    """Validate a profiler name ('' disables profiling)"""
+    profiler = value.strip().lower()
+    if profiler and profiler not in PROFILERS:
+        raise Exception(f"Unknown profiler '{value}' (supported: {', '.join(PROFILERS)})")
+    return profiler
+
+def peak_rss_kib() -> Dict[str, int]:
+    """Peak resident set size of this process and of its waited-for children (renderers, workers)"""
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 1024 if sys.platform == 'darwin' else 1
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale,
+    }
+
+class RunMetrics:
+    """Thread-safe accumulator shared by every schema worker of a run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new run"""
+        with self.lock:
+            self.started_at = datetime.now(timezone.utc)
+            self.started = time.perf_counter()
+            self.phases = {}
+            self.schema_phases = {}
+            self.counters = {'queries': 0, 'rows_fetched': 0, 'bytes_written': 0}
+            self.queries = {}
+            self.profiler = ''
+
+    def add_time(self, phase: str, seconds: float, schema: str = None) -> None:
+        """Add seconds spent in phase (also under schema when given)"""
+        with self.lock:
+            totals = self.phases.setdefault(phase, {'seconds': 0.0, 'count': 0})
+            totals['seconds'] += seconds
+            totals['count'] += 1
+            if schema is not None:
+                schema_totals = self.schema_phases.setdefault(schema, {})
+                schema_totals[phase] = schema_totals.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, phase: str, schema: str = None) -> Iterator[None]:
+        """Time the enclosed block as one occurrence of phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start, schema)
+
+    def count(self, counter: str, value: int = 1) -> None:
+        """Increase a counter such as queries, rows_fetched or bytes_written"""
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def add_query(self, label: str, seconds: float, rows: int) -> None:
+        """Record one database query: its latency and row count under label, and the counters"""
+        with self.lock:
+            totals = self.queries.setdefault(label, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0})
+            totals['count'] += 1
+            totals['seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+            totals['rows'] += rows
+            self.counters['queries'] += 1
+            self.counters['rows_fetched'] += rows
+
+    def start_profiling(self, profiler: str) -> None:
+        """Enable the process-wide profiler; cProfile is per thread, see profiled()"""
+        self.profiler = profiler
+        if profiler == 'tracemalloc':
+            tracemalloc.start(25)
+
+    @contextmanager
+    def profiled(self, output_path: Path) -> Iterator[None]:
+        """Run the enclosed block under cProfile when enabled and dump the stats to output_path"""
+        if self.profiler != 'cprofile':
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(output_path)
+            logging.getLogger(__name__).info(f"Profile written: {output_path}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The metrics collected so far as a JSON-serializable dict"""
+        with self.lock:
+            data = {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'duration_seconds': round(time.perf_counter() - self.started, 3),
+                'phases': {
+                    phase: {'seconds': round(totals['seconds'], 3), 'count': totals['count']}
+                    for phase, totals in self.phases.items()
+                },
+                'schema_phases': {
+                    schema: {phase: round(seconds, 3) for phase, seconds in phases.items()}
+                    for schema, phases in self.schema_phases.items()
+                },
+                'counters': dict(self.counters),
+                'queries': {
+                    label: dict(totals, seconds=round(totals['seconds'], 4),
+                                max_seconds=round(totals['max_seconds'], 4))
+                    for label, totals in sorted(self.queries.items())
+                },
+                'peak_rss_kib': peak_rss_kib(),
+            }
+        if self.profiler == 'tracemalloc' and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:20]
+            data['tracemalloc'] = {
+                'current_kib': round(current / 1024, 1),
+                'peak_kib': round(peak / 1024, 1),
+                'top': [{'location': str(stat.traceback[0]), 'kib': round(stat.size / 1024, 1),
+                         'count': stat.count} for stat in top],
+            }
+        return data
+
+    def write(self, output_path: Path, **extra: Any) -> None:
+        """Write the snapshot (plus extra top-level fields) as JSON"""
+        data = dict(extra, **self.snapshot())
+        output_path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+
+# One accumulator per process; main() resets it at the start of a run
+metrics = RunMetrics()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Partition Renderer
+Splits large schemas along the foreign-key graph (or into per-table neighbourhoods)
+and renders the parts in parallel
+"""
+
+import hashlib
+import json
+import logging
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, List, Set, Tuple
+from diagram_renderer import DiagramOptions, format_paths
+from erd_generator import ERDGenerator
+from render_cache import RenderCache
+from schema_graph import ForeignKeyIndex, partition_tables, subschema
+
+logger = logging.getLogger(__name__)
+
+def _render_part(part_schema: Dict[str, Any], erd_path: Path, pdf_path: Path,
+                 render_cache: RenderCache = None, options: DiagramOptions = DiagramOptions()) -> Path:
+    """Write the .er file and diagrams for one part (process pool worker)"""
+    erd_generator = ERDGenerator(part_schema, render_cache=render_cache, options=options)
+    erd_generator.generate_erd_file(erd_path)
+    erd_generator.generate_diagram(erd_path, pdf_path)
+    return pdf_path
+
+def render_parts(jobs: List[Tuple[Dict[str, Any], Path, Path]], workers: int = None,
+                 render_cache: RenderCache = None, options: DiagramOptions = DiagramOptions()) -> List[Path]:
+    """Render (part_schema, erd_path, pdf_path) jobs in a process pool; returns the failed diagram paths"""
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_render_part, part_schema, erd_path, pdf_path, render_cache, options): pdf_path
+            for part_schema, erd_path, pdf_path in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error rendering {futures[future].name}: {e}")
+                failures.append(futures[future])
+    return failures
+
+MANIFEST_NAME = '.manifest.json'
+INDEX_NAME = 'index.md'
+
+def _read_manifest(directory: Path) -> Dict[str, Any]:
+    """The part manifest written by the previous run ({} when missing or unreadable)"""
+    try:
+        return json.loads((directory / MANIFEST_NAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def scope_parts(jobs: List[Tuple[Dict[str, Any], Path, Path]], options: DiagramOptions,
+                changed_tables: Set[str] = None,
+                previous_dir: Path = None) -> Tuple[List[Tuple[Dict[str, Any], Path, Path]], Dict[str, Any]]:
+    """Split off the parts that need no rendering; returns the jobs to render and the new manifest
+
+    A part is kept from the previous run when it has the same tables and
+    diagram options, none of its tables is in changed_tables and its files
+    still exist (in previous_dir, from where they are copied, when given).
+    Without changed_tables (no schema diff) every part is rendered.
+    """
+    manifest = {}
+    if not jobs:
+        return jobs, manifest
+    target_dir = jobs[0][1].parent
+    previous_dir = previous_dir or target_dir
+    previous_manifest = _read_manifest(previous_dir) if changed_tables is not None else {}
+
+    pending = []
+    reused = 0
+    for part_schema, erd_path, pdf_path in jobs:
+        paths = [erd_path] + list(format_paths(pdf_path, options.formats).values())
+        entry = {'tables': sorted(part_schema['tables']),
+                 'options': dict(options._asdict(), formats=list(options.formats)),
+                 'files': [path.name for path in paths]}
+        manifest[pdf_path.name] = entry
+        previous_paths = [previous_dir / path.name for path in paths]
+        if (previous_manifest.get(pdf_path.name) == entry and changed_tables.isdisjoint(entry['tables'])
+                and all(path.exists() for path in previous_paths)):
+            if previous_dir != target_dir:
+                for previous_path, path in zip(previous_paths, paths):
+                    shutil.copy2(previous_path, path)
+            reused += 1
+        else:
+            pending.append((part_schema, erd_path, pdf_path))
+    if changed_tables is not None:
+        logger.info(f"Reusing {reused} unchanged of {len(jobs)} diagrams, rendering {len(pending)}")
+    return pending, manifest
+
+def _write_manifest(directory: Path, manifest: Dict[str, Any], failures: List[Path]) -> None:
+    """Record the rendered parts and delete every other file of the directory
+
+    Failed parts are left out so they are retried next time. Files of parts
+    that no longer exist (fewer parts, dropped tables) are deleted with them.
+    """
+    for pdf_path in failures:
+        manifest.pop(pdf_path.name, None)
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=False) + '\n', encoding='utf-8')
+    keep = {MANIFEST_NAME, INDEX_NAME}.union(*(entry['files'] for entry in manifest.values()))
+    for path in directory.iterdir():
+        if path.is_file() and path.name not in keep:
+            logger.debug(f"Removing stale diagram file {path}")
+            path.unlink()
+
+def file_stem(table_name: str) -> str:
+    """File name stem for a table, unique per table name
+
+    Characters unsafe in file names are replaced by _, and a short hash of the
+    raw name is appended whenever that changed the name (so 'a b' and 'a_b'
+    get different files) or the stem would shadow the index or manifest.
+    """
+    stem = re.sub(r'[^A-Za-z0-9_.-]', '_', table_name)
+    if stem != table_name or stem.lower() in ('index', 'manifest'):
+        digest = hashlib.sha1(table_name.encode('utf-8')).hexdigest()[:8]
+        stem = f"{stem}-{digest}"
+    return stem
+
+class PartitionRenderer:
+    def __init__(self, schema_data: Dict[str, Any], max_tables: int = 50, workers: int = None,
+                 render_cache: RenderCache = None, options: DiagramOptions = DiagramOptions(),
+                 changed_tables: Set[str] = None, previous_dir: Path = None):
+        """Initialize with schema data, the maximum tables per part, the process count,
+        an optional render cache shared by the workers and the diagram options; with
+        changed_tables only the parts containing them are rendered again (previous_dir
+        holds the previous run's output when it differs from the output directory)"""
+        self.schema_data = schema_data
+        self.max_tables = max(1, max_tables)
+        self.workers = workers
+        self.render_cache = render_cache
+        self.options = options
+        self.changed_tables = changed_tables
+        self.previous_dir = previous_dir
+
+    def render(self, output_dir: Path) -> Path:
+        """Render every part into {schema}_parts/ and return the index page path"""
+        schema_name = self.schema_data.get('schema', self.schema_data['database'])
+        parts_dir = output_dir / f"{schema_name}_parts"
+        parts_dir.mkdir(parents=True, exist_ok=True)
+
+        fk_index = ForeignKeyIndex(self.schema_data['relationships'])
+        parts = partition_tables(self.schema_data['tables'].keys(), fk_index, self.max_tables)
+        logger.info(f"Rendering {len(self.schema_data['tables'])} tables as {len(parts)} parts "
+                    f"(max {self.max_tables} tables per part)")
+
+        part_files = []
+        for number, tables in enumerate(parts, 1):
+            stem = f"{schema_name}_part{number:03d}"
+            part_files.append((tables, parts_dir / f"{stem}.er", parts_dir / f"{stem}.pdf"))
+
+        jobs = [(subschema(self.schema_data, tables, fk_index), erd_path, pdf_path)
+                for tables, erd_path, pdf_path in part_files]
+        previous_parts_dir = self.previous_dir / parts_dir.name if self.previous_dir else None
+        jobs, manifest = scope_parts(jobs, self.options, self.changed_tables, previous_parts_dir)
+        failures = render_parts(jobs, self.workers, self.render_cache, self.options)
+        _write_manifest(parts_dir, manifest, failures)
+
+        index_path = parts_dir / INDEX_NAME
+        self._write_index(index_path, schema_name, part_files)
+        if failures:
+            raise Exception(f"{len(failures)} of {len(parts)} diagram parts failed to render")
+        return index_path
+
+    def _write_index(self, index_path: Path, schema_name: str, part_files: List[Any]) -> None:
+        """Write a Markdown index linking every part and listing FKs that cross parts"""
+        part_of = {}
+        for number, (tables, _, _) in enumerate(part_files, 1):
+            for table_name in tables:
+                part_of[table_name] = number
+
+        lines = [f"# ER Diagram Parts: {schema_name}", ""]
+        lines.append(f"**Tables:** {len(part_of)}")
+        lines.append(f"**Parts:** {len(part_files)}")
+        lines.append("")
+
+        for number, (tables, erd_path, pdf_path) in enumerate(part_files, 1):
+            lines.append(f"## Part {number}")
+            lines.append("")
+            diagrams = ', '.join(f"[{path.name}]({path.name})"
+                                 for path in format_paths(pdf_path, self.options.formats).values())
+            lines.append(f"- Diagram: {diagrams}")
+            lines.append(f"- ERD file: [{erd_path.name}]({erd_path.name})")
+            lines.append(f"- Tables ({len(tables)}): {', '.join(tables)}")
+            lines.append("")
+
+        cross_edges = sorted({
+            (fk.table_name, part_of[fk.table_name], fk.referenced_table_name, part_of[fk.referenced_table_name])
+            for fk in self.schema_data['relationships']
+            if fk.table_name in part_of and fk.referenced_table_name in part_of
+            and part_of[fk.table_name] != part_of[fk.referenced_table_name]
+        })
+        if cross_edges:
+            lines.append("## Relationships Between Parts")
+            lines.append("")
+            lines.append("| Relationship | From Part | To Part |")
+            lines.append("|--------------|-----------|---------|")
+            for source, source_part, target, target_part in cross_edges:
+                lines.append(f"| {source} → {target} | {source_part} | {target_part} |")
+            lines.append("")
+
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+        logger.info(f"Diagram index generated: {index_path}")
+
+class NeighbourhoodRenderer:
+    def __init__(self, schema_data: Dict[str, Any], hops: int = 1, max_tables: int = 30, workers: int = None,
+                 render_cache: RenderCache = None, options: DiagramOptions = DiagramOptions(),
+                 changed_tables: Set[str] = None, previous_dir: Path = None):
+        """Initialize with schema data, the neighbourhood radius in FK hops, the maximum tables
+        per diagram, the process count, an optional render cache and the diagram options;
+        changed_tables and previous_dir work as in PartitionRenderer"""
+        self.schema_data = schema_data
+        self.hops = max(1, hops)
+        self.max_tables = max(1, max_tables)
+        self.workers = workers
+        self.render_cache = render_cache
+        self.options = options
+        self.changed_tables = changed_tables
+        self.previous_dir = previous_dir
+
+    def render(self, output_dir: Path) -> Path:
+        """Render one diagram per table into {schema}_tables/ and return the index page path"""
+        schema_name = self.schema_data.get('schema', self.schema_data['database'])
+        tables_dir = output_dir / f"{schema_name}_tables"
+        tables_dir.mkdir(parents=True, exist_ok=True)
+
+        fk_index = ForeignKeyIndex(self.schema_data['relationships'])
+        table_names = sorted(self.schema_data['tables'])
+        logger.info(f"Rendering {len(table_names)} table neighbourhood diagrams "
+                    f"({self.hops} hop(s), max {self.max_tables} tables each)")
+
+        neighbourhoods = []
+        jobs = []
+        for table_name in table_names:
+            tables = fk_index.neighbourhood(table_name, self.hops, self.max_tables)
+            stem = file_stem(table_name)
+            erd_path = tables_dir / f"{stem}.er"
+            pdf_path = tables_dir / f"{stem}.pdf"
+            neighbourhoods.append((table_name, tables, pdf_path))
+            jobs.append((subschema(self.schema_data, tables, fk_index), erd_path, pdf_path))
+
+        previous_tables_dir = self.previous_dir / tables_dir.name if self.previous_dir else None
+        all_jobs = len(jobs)
+        jobs, manifest = scope_parts(jobs, self.options, self.changed_tables, previous_tables_dir)
+        failures = render_parts(jobs, self.workers, self.render_cache, self.options)
+        _write_manifest(tables_dir, manifest, failures)
+
+        index_path = tables_dir / INDEX_NAME
+        self._write_index(index_path, schema_name, neighbourhoods, fk_index)
+        if failures:
+            raise Exception(f"{len(failures)} of {all_jobs} table diagrams failed to render")
+        return index_path
+
+    def _write_index(self, index_path: Path, schema_name: str, neighbourhoods: List[Any],
+                     fk_index: ForeignKeyIndex) -> None:
+        """Write a Markdown index with one section per table linking its diagram and direct neighbours"""
+        lines = [f"# Table Diagrams: {schema_name}", ""]
+        lines.append(f"**Tables:** {len(neighbourhoods)}")
+        lines.append(f"**Neighbourhood:** {self.hops} foreign key hop(s), at most {self.max_tables} tables")
+        lines.append("")
+
+        for table_name, tables, pdf_path in neighbourhoods:
+            lines.append(f"## {table_name}")
+            lines.append("")
+            diagrams = ', '.join(f"[{path.name}]({path.name})"
+                                 for path in format_paths(pdf_path, self.options.formats).values())
+            lines.append(f"- Diagram: {diagrams}")
+            references = sorted({fk.referenced_table_name for fk in fk_index.references(table_name)})
+            referenced_by = sorted({fk.table_name for fk in fk_index.referenced_by(table_name)})
+            if references:
+                lines.append(f"- References: {', '.join(references)}")
+            if referenced_by:
+                lines.append(f"- Referenced by: {', '.join(referenced_by)}")
+            lines.append(f"- Tables in diagram ({len(tables)}): {', '.join(tables)}")
+            lines.append("")
+
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+        logger.info(f"Table diagram index generated: {index_path}")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Stage Pipeline
+asyncio scheduler that runs each stage of a batch as its own pool of workers connected
+by bounded queues, so one item can be extracted while the previous one is rendered
+"""
+
+import asyncio
+import logging
+import subprocess
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+from diagram_renderer import command_runner
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 2
+
+# Marks the end of a stage's input
+_DONE = object()
+
+class Stage(NamedTuple):
+    """One pipeline stage: handler(item) -> item for the next stage, run by concurrency workers"""
+    name: str
+    handler: Callable[[Any], Any]
+    concurrency: int = 1
+
+async def run_subprocess(cmd: List[str], timeout: float = None) -> None:
+    """Run cmd without blocking the event loop, raising like subprocess.run(check=True, timeout=...)"""
+    process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout.decode(errors='replace'),
+                                            stderr.decode(errors='replace'))
+
+def _loop_command_runner(loop: asyncio.AbstractEventLoop) -> Callable[[List[str], float], None]:
+    """Command runner for worker threads that spawns the subprocess on loop and waits for it"""
+    def run(cmd: List[str], timeout: float = None) -> None:
+        asyncio.run_coroutine_threadsafe(run_subprocess(cmd, timeout), loop).result()
+    return run
+
+async def _worker(stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                  failures: Dict[Any, Exception]) -> None:
+    """Take (key, item) pairs from inbox, run the stage handler in a thread and pass the result on"""
+    while True:
+        entry = await inbox.get()
+        if entry is _DONE:
+            return
+        key, item = entry
+        try:
+            # to_thread copies the context, so command_runner reaches the handler's thread
+            result = await asyncio.to_thread(stage.handler, item)
+        except Exception as e:
+            logger.error(f"Error [{key}] in {stage.name} stage: {e}")
+            failures[key] = e
+            continue
+        await outbox.put((key, result))
+
+async def _run(items: Iterable[Tuple[Any, Any]], stages: List[Stage],
+               queue_size: int) -> Tuple[Dict[Any, Any], Dict[Any, Exception]]:
+    """Feed items through every stage and collect the last stage's results"""
+    command_runner.set(_loop_command_runner(asyncio.get_running_loop()))
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    # The last stage's results are only collected, so that queue is unbounded
+    queues.append(asyncio.Queue())
+    failures = {}
+
+    async def run_stage(index: int, stage: Stage) -> None:
+        workers = [asyncio.create_task(_worker(stage, queues[index], queues[index + 1], failures))
+                   for _ in range(max(1, stage.concurrency))]
+        await asyncio.gather(*workers)
+        if index + 1 < len(stages):
+            for _ in range(max(1, stages[index + 1].concurrency)):
+                await queues[index + 1].put(_DONE)
+
+    async def feed() -> None:
+        for key, item in items:
+            await queues[0].put((key, item))
+        for _ in range(max(1, stages[0].concurrency)):
+            await queues[0].put(_DONE)
+
+    await asyncio.gather(feed(), *(run_stage(index, stage) for index, stage in enumerate(stages)))
+
+    results = {}
+    while not queues[-1].empty():
+        key, result = queues[-1].get_nowait()
+        results[key] = result
+    return results, failures
+
+def run_pipeline(items: Iterable[Tuple[Any, Any]], stages: List[Stage],
+                 queue_size: int = DEFAULT_QUEUE_SIZE) -> Tuple[Dict[Any, Any], Dict[Any, Exception]]:
+    """Run (key, item) pairs through stages; returns results and failures keyed by key
+
+    At most queue_size items wait between two stages, which bounds how far
+    extraction can run ahead of rendering (and the schemas held in memory).
+    An item whose handler raises is dropped from the later stages.
+    """
+    return asyncio.run(_run(items, stages, max(1, queue_size)))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Query Guard
+Production-safe extraction limits shared by every extractor of a run: a per-statement
+MAX_EXECUTION_TIME, total query and time budgets, and a minimum interval between queries
+"""
+
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+# Defaults applied by safe mode to the limits that are not set explicitly
+SAFE_MAX_EXECUTION_TIME_MS = 10000
+SAFE_QUERY_BUDGET = 1000
+SAFE_TIME_BUDGET = 120.0
+SAFE_QUERY_INTERVAL_MS = 100
+
+# MySQL error raised when MAX_EXECUTION_TIME interrupts a statement
+ER_QUERY_TIMEOUT = 3024
+
+# Comments, quoted strings and identifiers, parentheses and words of a statement
+_SQL_TOKEN = re.compile(r"""/\*.*?\*/|(?:--\s|\#)[^\n]*|'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`|[()]|\w+""",
+                        re.S)
+
+def add_execution_time_hint(query: str, milliseconds: int) -> str:
+    """Add a MAX_EXECUTION_TIME optimizer hint to the top-level SELECT of query
+
+    MySQL only honours the hint in the outermost query block, so leading
+    comments, CTE bodies (WITH ... AS (SELECT ...)) and subqueries are skipped.
+    A statement without a top-level SELECT is returned unchanged.
+    """
+    depth = 0
+    for match in _SQL_TOKEN.finditer(query):
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0 and token.upper() == 'SELECT':
+            return f"{query[:match.end()]} /*+ MAX_EXECUTION_TIME({milliseconds}) */{query[match.end():]}"
+    return query
+
+class QueryGuard:
+    """Enforces the query limits of a run; thread-safe, inactive (a no-op) when every limit is 0
+
+    The time budget counts the seconds spent executing and fetching queries,
+    not the pauses of the rate limit, so it measures the load put on the server.
+    """
+
+    def __init__(self, max_execution_time_ms: int = 0, query_budget: int = 0, time_budget: float = 0.0,
+                 query_interval_ms: int = 0):
+        self.max_execution_time_ms = max(0, max_execution_time_ms)
+        self.query_budget = max(0, query_budget)
+        self.time_budget = max(0.0, time_budget)
+        self.query_interval = max(0, query_interval_ms) / 1000
+        self.lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def from_settings(cls, safe_mode: bool, max_execution_time_ms: int = 0, query_budget: int = 0,
+                      time_budget: float = 0.0, query_interval_ms: int = 0) -> 'QueryGuard':
+        """Build from the configured limits; in safe mode unset (0) limits take the safe defaults"""
+        if safe_mode:
+            max_execution_time_ms = max_execution_time_ms or SAFE_MAX_EXECUTION_TIME_MS
+            query_budget = query_budget or SAFE_QUERY_BUDGET
+            time_budget = time_budget or SAFE_TIME_BUDGET
+            query_interval_ms = query_interval_ms or SAFE_QUERY_INTERVAL_MS
+        return cls(max_execution_time_ms, query_budget, time_budget, query_interval_ms)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.max_execution_time_ms or self.query_budget or self.time_budget or self.query_interval)
+
+    def describe(self) -> str:
+        """Short human readable summary for the log"""
+        parts = []
+        if self.max_execution_time_ms:
+            parts.append(f"MAX_EXECUTION_TIME {self.max_execution_time_ms} ms")
+        if self.query_budget:
+            parts.append(f"at most {self.query_budget} queries")
+        if self.time_budget:
+            parts.append(f"at most {self.time_budget:g}s of query time")
+        if self.query_interval:
+            parts.append(f"{self.query_interval * 1000:g} ms between queries")
+        return ', '.join(parts) or 'no limits'
+
+    def reset(self) -> None:
+        """Start a new run (the daemon resets the budgets on every poll)"""
+        with self.lock:
+            self.queries = 0
+            self.seconds = 0.0
+            self.next_start = 0.0
+
+    def _check_time_budget(self, seconds: float) -> None:
+        if self.time_budget and seconds >= self.time_budget:
+            raise Exception(f"Query time budget exhausted: {seconds:.1f}s spent in queries "
+                            f"(budget {self.time_budget:g}s)")
+
+    def prepare(self, query: str) -> Tuple[str, int]:
+        """Wait for the rate limit, check the budgets and add the MAX_EXECUTION_TIME hint
+
+        The hint is the per-query limit or the remaining time budget, whichever
+        is lower, so a single statement cannot run past the budget. Returns the
+        query and its limit in milliseconds (0 when there is none).
+        """
+        with self.lock:
+            if self.query_budget and self.queries >= self.query_budget:
+                raise Exception(f"Query budget exhausted: {self.queries} queries issued "
+                                f"(budget {self.query_budget})")
+            self._check_time_budget(self.seconds)
+            limits = [self.max_execution_time_ms] if self.max_execution_time_ms else []
+            if self.time_budget:
+                limits.append(math.ceil((self.time_budget - self.seconds) * 1000))
+            execution_time_ms = min(limits, default=0)
+            self.queries += 1
+            # Reserve the next start slot so parallel extractors are paced as one client
+            now = time.monotonic()
+            wait = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.query_interval
+        if wait > 0:
+            time.sleep(wait)
+        if execution_time_ms:
+            query = add_execution_time_hint(query, execution_time_ms)
+        return query, execution_time_ms
+
+    def check(self, seconds: float) -> None:
+        """Raise when the budget is spent, counting seconds of a query still being fetched
+
+        Lets a long streamed result stop as soon as parallel extractors have
+        used up the budget, instead of only before the next query starts.
+        """
+        if self.time_budget:
+            with self.lock:
+                spent = self.seconds
+            self._check_time_budget(spent + seconds)
+
+    def record(self, seconds: float) -> None:
+        """Add the duration of a finished query to the time budget"""
+        with self.lock:
+            self.seconds += seconds
+
+def footprint_summary(queries: Dict[str, Dict[str, Any]]) -> str:
+    """One-line summary of the per-query metrics: count, total and slowest query"""
+    if not queries:
+        return "no queries"
+    count = sum(totals['count'] for totals in queries.values())
+    seconds = sum(totals['seconds'] for totals in queries.values())
+    rows = sum(totals['rows'] for totals in queries.values())
+    slowest = max(queries, key=lambda label: queries[label]['max_seconds'])
+    return (f"{count} queries, {seconds:.3f}s in MySQL, {rows} rows; slowest {slowest} "
+            f"({queries[slowest]['max_seconds'] * 1000:.1f} ms)")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Render Cache
+Content-addressed cache of rendered diagrams, keyed by normalized source, renderer, version and format
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Version flag of the tools that have one; Graphviz prints the version to stderr.
+# erd has none (run without arguments it reads a schema from stdin), so it is never probed.
+VERSION_FLAGS = {engine: '-V' for engine in ('dot', 'neato', 'fdp', 'sfdp', 'twopi', 'circo', 'osage', 'patchwork')}
+
+@lru_cache(maxsize=None)
+def tool_version(binary: str) -> Optional[str]:
+    """Return a version string for a layout tool, or None if it is not installed
+
+    Runs the tool's version flag when it has one and otherwise uses the
+    binary's size and mtime, so an upgraded tool still invalidates the cache.
+    """
+    path = shutil.which(binary)
+    if path is None:
+        return None
+    flag = VERSION_FLAGS.get(Path(binary).name)
+    if flag is not None:
+        try:
+            result = subprocess.run([path, flag], stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                                    timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            result = None
+        output = (result.stdout or result.stderr).strip() if result is not None else ''
+        if result is not None and result.returncode == 0 and output:
+            return output.splitlines()[0]
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{int(stat.st_mtime)}"
+
+def normalize_erd_source(content: str) -> str:
+    """Drop comments, blank lines and trailing whitespace from .er content"""
+    lines = []
+    for line in content.splitlines():
+        line = line.rstrip()
+        if line and not line.lstrip().startswith('#'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+def normalize_dot_source(source: str) -> str:
+    """Drop the leading comment line Digraph(comment=...) writes and trailing whitespace"""
+    lines = [line.rstrip() for line in source.splitlines()]
+    if lines and lines[0].startswith('//'):
+        lines = lines[1:]
+    return '\n'.join(line for line in lines if line)
+
+class RenderCache:
+    def __init__(self, cache_dir: Path, max_bytes: int = 512 * 1024 * 1024, max_age_days: float = 30):
+        """Initialize with the cache directory and its size/age eviction limits"""
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 3600
+
+    def key(self, renderer: str, version: str, output_format: str, normalized_source: str) -> str:
+        """Content address for one render"""
+        digest = hashlib.sha256()
+        for part in (renderer, version, output_format):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(normalized_source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str, output_format: str) -> Path:
+        """Location of a cache entry (sharded by the first two hex digits)"""
+        return self.cache_dir / key[:2] / f"{key}.{output_format}"
+
+    def fetch(self, key: str, output_format: str, output_path: Path) -> bool:
+        """Copy a cached render to output_path; returns False on a miss"""
+        entry_path = self._entry_path(key, output_format)
+        try:
+            shutil.copyfile(entry_path, output_path)
+        except FileNotFoundError:
+            return False
+        # Refresh the timestamp so eviction is least-recently-used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        logger.info(f"Render cache hit: {output_path.name}")
+        return True
+
+    def store(self, key: str, output_format: str, output_path: Path) -> None:
+        """Copy a freshly rendered file into the cache (atomic rename)"""
+        entry_path = self._entry_path(key, output_format)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=entry_path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(output_path, tmp_name)
+            os.replace(tmp_name, entry_path)
+        except OSError as e:
+            logger.warning(f"Could not store {output_path.name} in render cache: {e}")
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+    def evict(self) -> int:
+        """Remove entries older than max_age, then least-recently-used ones above max_bytes"""
+        if not self.cache_dir.exists():
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.cache_dir.glob('*/*'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            # Stale .tmp files are leftovers of interrupted stores
+            if now - stat.st_mtime > self.max_age_seconds or (path.suffix == '.tmp' and now - stat.st_mtime > 3600):
+                removed += self._remove(path)
+            elif path.suffix != '.tmp':
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total_bytes -= size
+        if removed:
+            logger.info(f"Render cache: evicted {removed} entries")
+        return removed
+
+    def _remove(self, path: Path) -> int:
+        """Delete one entry, tolerating concurrent removal"""
+        try:
+            path.unlink()
+            return 1
+        except FileNotFoundError:
+            return 0
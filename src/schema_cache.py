@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Schema Cache
+On-disk per-table metadata cache used for incremental extraction
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+from schema_model import Column, IndexColumn
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 3
+
+class SchemaCache:
+    def __init__(self, cache_path: Path):
+        """Initialize with the cache file path (one file per database schema)"""
+        self.cache_path = Path(cache_path)
+        self.tables: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self) -> None:
+        """Load cache entries from disk, starting empty if the file is missing or unreadable"""
+        self.tables = {}
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable schema cache {self.cache_path}: {e}")
+            return
+        if data.get('version') != CACHE_FORMAT_VERSION:
+            logger.warning(f"Ignoring schema cache {self.cache_path} with unsupported version {data.get('version')}")
+            return
+        self.tables = data.get('tables', {})
+
+    def get(self, table_name: str, fingerprint: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return cached table data if the stored fingerprint still matches"""
+        entry = self.tables.get(table_name)
+        if entry is None or fingerprint is None or entry['fingerprint'] != fingerprint:
+            return None
+        return {
+            'columns': [Column.from_values(values) for values in entry['columns']],
+            'indexes': [IndexColumn.from_values(values) for values in entry['indexes']]
+        }
+
+    def put(self, table_name: str, fingerprint: str, columns: List[Column],
+            indexes: List[IndexColumn]) -> None:
+        """Store freshly extracted table data under its fingerprint"""
+        self.tables[table_name] = {
+            'fingerprint': fingerprint,
+            # Rows are stored as value lists in FIELDS order to keep the file compact
+            'columns': [column.to_values() for column in columns],
+            'indexes': [index.to_values() for index in indexes]
+        }
+        self.dirty = True
+
+    def evict_missing(self, table_names: Iterable[str]) -> List[str]:
+        """Drop entries for tables that no longer exist; returns the evicted names"""
+        keep = set(table_names)
+        evicted = [name for name in self.tables if name not in keep]
+        for name in evicted:
+            del self.tables[name]
+        if evicted:
+            self.dirty = True
+        return evicted
+
+    def save(self) -> None:
+        """Write the cache atomically if anything changed"""
+        if not self.dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_FORMAT_VERSION, 'tables': self.tables}, f,
+                      ensure_ascii=False, default=_json_default)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+def _json_default(value: Any) -> Any:
+    """Serialize driver values that json does not handle natively"""
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Schema Diff
+Compares two extracted schemas (or snapshots) table by table and reports added, dropped
+and altered tables, columns, indexes and foreign keys as JSON and Markdown
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+from metrics import configure_logging
+from schema_model import ForeignKeyConstraint, group_foreign_keys
+from schema_snapshot import load_snapshot
+
+logger = logging.getLogger(__name__)
+
+DIFF_FORMAT_VERSION = 1
+
+def _index_definitions(table_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """{index_name: {'unique': bool, 'columns': [...]}} with columns in index order"""
+    definitions = {}
+    for index in sorted(table_data.get('indexes', []), key=attrgetter('index_name', 'seq_in_index')):
+        definition = definitions.setdefault(index.index_name, {'unique': not index.non_unique, 'columns': []})
+        definition['columns'].append(index.column_name)
+    return definitions
+
+def _foreign_key_definition(constraint: ForeignKeyConstraint) -> str:
+    """"(a, b) -> target(x, y)" """
+    return (f"({', '.join(constraint.columns)}) -> "
+            f"{constraint.referenced_table_name}({', '.join(constraint.referenced_columns)})")
+
+def _foreign_keys_by_table(relationships: List[Any]) -> Dict[str, Dict[str, str]]:
+    """{table_name: {constraint_name: definition}} for the outgoing constraints of each table"""
+    by_table = {}
+    for constraint in group_foreign_keys(relationships):
+        by_table.setdefault(constraint.table_name, {})[constraint.name] = _foreign_key_definition(constraint)
+    return by_table
+
+def table_hash(table_data: Dict[str, Any], foreign_keys: Dict[str, str]) -> str:
+    """Content hash of one table: its columns, index definitions and outgoing foreign keys"""
+    content = [
+        [list(column.to_values()) for column in table_data['columns']],
+        sorted(_index_definitions(table_data).items()),
+        sorted(foreign_keys.items()),
+    ]
+    encoded = json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def _diff_named(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Added, dropped and altered entries of two {name: definition} dicts"""
+    return {
+        'added': {name: new[name] for name in sorted(new.keys() - old.keys())},
+        'dropped': {name: old[name] for name in sorted(old.keys() - new.keys())},
+        'altered': {name: {'old': old[name], 'new': new[name]}
+                    for name in sorted(old.keys() & new.keys()) if old[name] != new[name]},
+    }
+
+def _diff_columns(old_columns: List[Any], new_columns: List[Any]) -> Dict[str, Any]:
+    """Added and dropped column names, and {column: {FIELD: [old, new]}} for altered columns"""
+    old = {column.name: column for column in old_columns}
+    new = {column.name: column for column in new_columns}
+    altered = {}
+    for name in sorted(old.keys() & new.keys()):
+        old_row, new_row = old[name].to_dict(), new[name].to_dict()
+        changes = {field: [old_row[field], new_row[field]]
+                   for field in old[name].FIELDS if old_row[field] != new_row[field]}
+        if changes:
+            altered[name] = changes
+    return {
+        'added': [name for name in new if name not in old],
+        'dropped': [name for name in old if name not in new],
+        'altered': altered,
+    }
+
+def _describe(schema_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Database, schema and table count of one side of a diff"""
+    return {
+        'database': schema_data['database'],
+        'schema': schema_data.get('schema', schema_data['database']),
+        'tables': len(schema_data['tables']),
+    }
+
+def diff_schemas(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare two schema_data dicts; returns a JSON-serializable report
+
+    Tables whose content hashes match are not compared any further, so the
+    cost of a diff grows with the number of changed tables.
+    """
+    old_tables, new_tables = old['tables'], new['tables']
+    old_fks = _foreign_keys_by_table(old['relationships'])
+    new_fks = _foreign_keys_by_table(new['relationships'])
+
+    altered = {}
+    for table_name in sorted(old_tables.keys() & new_tables.keys()):
+        old_table, new_table = old_tables[table_name], new_tables[table_name]
+        old_table_fks, new_table_fks = old_fks.get(table_name, {}), new_fks.get(table_name, {})
+        if table_hash(old_table, old_table_fks) == table_hash(new_table, new_table_fks):
+            continue
+        altered[table_name] = {
+            'columns': _diff_columns(old_table['columns'], new_table['columns']),
+            'indexes': _diff_named(_index_definitions(old_table), _index_definitions(new_table)),
+            'foreign_keys': _diff_named(old_table_fks, new_table_fks),
+        }
+
+    added = sorted(new_tables.keys() - old_tables.keys())
+    dropped = sorted(old_tables.keys() - new_tables.keys())
+    return {
+        'version': DIFF_FORMAT_VERSION,
+        'old': _describe(old),
+        'new': _describe(new),
+        'summary': {
+            'added_tables': len(added),
+            'dropped_tables': len(dropped),
+            'altered_tables': len(altered),
+            'unchanged_tables': len(old_tables.keys() & new_tables.keys()) - len(altered),
+        },
+        'added_tables': added,
+        'dropped_tables': dropped,
+        'altered_tables': altered,
+    }
+
+def changed_tables(diff: Dict[str, Any]) -> Set[str]:
+    """Every table that was added, dropped or altered"""
+    return set(diff['added_tables']) | set(diff['dropped_tables']) | set(diff['altered_tables'])
+
+def has_changes(diff: Dict[str, Any]) -> bool:
+    """Whether the diff contains any added, dropped or altered table"""
+    return bool(diff['added_tables'] or diff['dropped_tables'] or diff['altered_tables'])
+
+def _change_rows(changes: Dict[str, Any]) -> List[Tuple[str, str, str, str]]:
+    """(change, kind, name, details) rows for one altered table"""
+    rows = []
+    columns = changes['columns']
+    rows.extend(('added', 'column', name, '-') for name in columns['added'])
+    rows.extend(('dropped', 'column', name, '-') for name in columns['dropped'])
+    for name, fields in columns['altered'].items():
+        details = '; '.join(f"{field}: {old} → {new}" for field, (old, new) in fields.items())
+        rows.append(('altered', 'column', name, details))
+
+    def index_text(definition: Dict[str, Any]) -> str:
+        return f"{'unique ' if definition['unique'] else ''}({', '.join(definition['columns'])})"
+
+    for kind, key, describe in (('index', 'indexes', index_text), ('foreign key', 'foreign_keys', str)):
+        named = changes[key]
+        rows.extend(('added', kind, name, describe(definition)) for name, definition in named['added'].items())
+        rows.extend(('dropped', kind, name, describe(definition))
+                    for name, definition in named['dropped'].items())
+        rows.extend(('altered', kind, name, f"{describe(change['old'])} → {describe(change['new'])}")
+                    for name, change in named['altered'].items())
+    return rows
+
+def diff_markdown(diff: Dict[str, Any]) -> str:
+    """Render a diff report as Markdown"""
+    old, new, summary = diff['old'], diff['new'], diff['summary']
+    lines = [f"# Schema Diff: {new['schema']}", ""]
+    lines.append(f"**Old:** `{old['database']}.{old['schema']}` ({old['tables']} tables)")
+    lines.append(f"**New:** `{new['database']}.{new['schema']}` ({new['tables']} tables)")
+    lines.append(f"**Added:** {summary['added_tables']} / **Dropped:** {summary['dropped_tables']} / "
+                 f"**Altered:** {summary['altered_tables']} / **Unchanged:** {summary['unchanged_tables']}")
+    lines.append("")
+
+    if not has_changes(diff):
+        lines.append("No schema changes.")
+        lines.append("")
+        return '\n'.join(lines)
+
+    for title, key in (("Added Tables", 'added_tables'), ("Dropped Tables", 'dropped_tables')):
+        if diff[key]:
+            lines.append(f"## {title}")
+            lines.append("")
+            lines.extend(f"- {table_name}" for table_name in diff[key])
+            lines.append("")
+
+    if diff['altered_tables']:
+        lines.append("## Altered Tables")
+        lines.append("")
+        for table_name, changes in diff['altered_tables'].items():
+            lines.append(f"### {table_name}")
+            lines.append("")
+            lines.append("| Change | Kind | Name | Details |")
+            lines.append("|--------|------|------|---------|")
+            for change, kind, name, details in _change_rows(changes):
+                lines.append(f"| {change} | {kind} | {name} | {details} |")
+            lines.append("")
+    return '\n'.join(lines)
+
+def write_diff_reports(diff: Dict[str, Any], markdown_path: Path = None, json_path: Path = None) -> None:
+    """Write the Markdown and/or JSON report"""
+    if markdown_path is not None:
+        markdown_path.write_text(diff_markdown(diff), encoding='utf-8')
+        logger.info(f"Schema diff generated: {markdown_path}")
+    if json_path is not None:
+        json_path.write_text(json.dumps(diff, indent=2, ensure_ascii=False, default=str) + '\n',
+                             encoding='utf-8')
+        logger.info(f"Schema diff generated: {json_path}")
+
+def main(argv: List[str] = None) -> int:
+    """Compare two schema snapshots without a database"""
+    parser = argparse.ArgumentParser(description="Compare two ERD Plus schema snapshots")
+    parser.add_argument('old', type=Path, help="Snapshot of the old schema ({schema}.snapshot.json.gz)")
+    parser.add_argument('new', type=Path, help="Snapshot of the new schema")
+    parser.add_argument('--markdown', type=Path, help="Write the Markdown report to this file")
+    parser.add_argument('--json', type=Path, help="Write the JSON report to this file")
+    parser.add_argument('--exit-code', action='store_true', help="Exit with 1 when the schemas differ")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    try:
+        diff = diff_schemas(load_snapshot(args.old), load_snapshot(args.new))
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        return 2
+    if args.markdown is None and args.json is None:
+        print(diff_markdown(diff))
+    write_diff_reports(diff, args.markdown, args.json)
+    return 1 if args.exit_code and has_changes(diff) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
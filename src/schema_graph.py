@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Schema Graph
+Foreign-key graph utilities: adjacency index, collapsed relationship edges, connected components,
+neighbourhoods, size-bounded partitions and sub-schemas
+"""
+
+from collections import deque
+from typing import Dict, Any, List, Iterable, NamedTuple, Set, Tuple
+from schema_model import ForeignKeyConstraint, group_foreign_keys, relationship_cardinality
+
+class RelationshipEdge(NamedTuple):
+    """One diagram edge per (source, target) table pair, covering every constraint between them"""
+    source: str
+    cardinality: str
+    target: str
+    constraints: Tuple[ForeignKeyConstraint, ...]
+
+    @property
+    def label(self) -> str:
+        """Combined column label of all constraints on the edge"""
+        return '; '.join(constraint.label for constraint in self.constraints)
+
+def _merge_cardinality(first: str, second: str) -> str:
+    """Loosest of two cardinalities: '*' beats '?' on the source side, '?' beats '1' on the target side"""
+    source = '*' if '*' in (first[0], second[0]) else first[0]
+    target = '?' if '?' in (first[-1], second[-1]) else first[-1]
+    return f"{source}--{target}"
+
+class RelationshipCollector:
+    """Builds collapsed, cardinality-annotated edges from the FK rows
+
+    Key information of the source tables is noted as tables pass by, so this
+    also works when tables are streamed and not kept in schema_data.
+    """
+
+    def __init__(self, relationships: Iterable[Any], tables: Dict[str, Any] = None):
+        self.constraints = group_foreign_keys(relationships)
+        self.fk_columns: Dict[str, Set[str]] = {}
+        for constraint in self.constraints:
+            self.fk_columns.setdefault(constraint.table_name, set()).update(constraint.columns)
+        self.tables: Dict[str, Any] = {}
+        for table_name, table_data in (tables or {}).items():
+            self.note_table(table_name, table_data)
+
+    def note_table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        """Remember the key columns and unique indexes of a table that declares foreign keys
+
+        Only what cardinality inference needs is kept, so streaming stays bounded.
+        """
+        if table_name not in self.fk_columns:
+            return
+        key_data = {'columns': [
+            column for column in table_data.get('columns', [])
+            if column.name in self.fk_columns[table_name] or column.is_primary_key or column.is_unique
+        ]}
+        if table_data.get('indexes'):
+            key_data['indexes'] = [index for index in table_data['indexes'] if not index.non_unique]
+        self.tables[table_name] = key_data
+
+    def edges(self) -> List[RelationshipEdge]:
+        """One edge per (source, target) pair, in order of the first constraint"""
+        grouped: Dict[Tuple[str, str], List[Any]] = {}
+        for constraint in self.constraints:
+            cardinality = relationship_cardinality(constraint, self.tables.get(constraint.table_name))
+            key = (constraint.table_name, constraint.referenced_table_name)
+            if key in grouped:
+                grouped[key][0] = _merge_cardinality(grouped[key][0], cardinality)
+                grouped[key][1].append(constraint)
+            else:
+                grouped[key] = [cardinality, [constraint]]
+        return [
+            RelationshipEdge(source, cardinality, target, tuple(constraints))
+            for (source, target), (cardinality, constraints) in grouped.items()
+        ]
+
+class ForeignKeyIndex:
+    """Outgoing and incoming foreign keys per table, built once from the relationships list"""
+
+    def __init__(self, relationships: Iterable[Any]):
+        self.outgoing: Dict[str, List[Any]] = {}
+        self.incoming: Dict[str, List[Any]] = {}
+        for fk in relationships:
+            self.outgoing.setdefault(fk.table_name, []).append(fk)
+            self.incoming.setdefault(fk.referenced_table_name, []).append(fk)
+
+    def references(self, table_name: str) -> List[Any]:
+        """FKs declared on table_name"""
+        return self.outgoing.get(table_name, [])
+
+    def referenced_by(self, table_name: str) -> List[Any]:
+        """FKs in other tables pointing at table_name"""
+        return self.incoming.get(table_name, [])
+
+    def neighbours(self, table_name: str) -> Set[str]:
+        """Tables one foreign key away in either direction (excluding table_name itself)"""
+        neighbours = {fk.referenced_table_name for fk in self.references(table_name)}
+        neighbours.update(fk.table_name for fk in self.referenced_by(table_name))
+        neighbours.discard(table_name)
+        return neighbours
+
+    def neighbourhood(self, table_name: str, hops: int, max_tables: int = None) -> List[str]:
+        """Tables within hops foreign keys of table_name, nearest first, capped at max_tables
+
+        table_name itself is always first. Within one hop distance tables are
+        visited in name order so the result is deterministic.
+        """
+        result = [table_name]
+        seen = {table_name}
+        frontier = [table_name]
+        for _ in range(hops):
+            next_frontier = []
+            for current in frontier:
+                for neighbour in sorted(self.neighbours(current)):
+                    if neighbour in seen:
+                        continue
+                    if max_tables is not None and len(result) >= max_tables:
+                        return result
+                    seen.add(neighbour)
+                    result.append(neighbour)
+                    next_frontier.append(neighbour)
+            frontier = next_frontier
+        return result
+
+    def relationships_among(self, table_names: List[str]) -> List[Any]:
+        """FKs whose source and target are both in table_names, grouped by source in table_names order"""
+        selected = set(table_names)
+        return [
+            fk
+            for table_name in table_names
+            for fk in self.references(table_name)
+            if fk.referenced_table_name in selected
+        ]
+
+def _as_index(relationships: Any) -> ForeignKeyIndex:
+    """Accept either a relationships list or a prebuilt ForeignKeyIndex"""
+    return relationships if isinstance(relationships, ForeignKeyIndex) else ForeignKeyIndex(relationships)
+
+def _build_adjacency(table_names: Iterable[str], relationships: Any) -> Dict[str, Set[str]]:
+    """Undirected adjacency sets over the tables, ignoring FKs to unknown tables"""
+    fk_index = _as_index(relationships)
+    adjacency = {table_name: set() for table_name in table_names}
+    for table_name, neighbours in adjacency.items():
+        neighbours.update(neighbour for neighbour in fk_index.neighbours(table_name) if neighbour in adjacency)
+    return adjacency
+
+def connected_components(table_names: Iterable[str], relationships: Any) -> List[List[str]]:
+    """Group tables into connected components of the foreign-key graph, largest first"""
+    adjacency = _build_adjacency(table_names, relationships)
+    seen = set()
+    components = []
+    for start in adjacency:
+        if start in seen:
+            continue
+        seen.add(start)
+        component = []
+        queue = deque([start])
+        while queue:
+            table_name = queue.popleft()
+            component.append(table_name)
+            for neighbour in sorted(adjacency[table_name]):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        components.append(sorted(component))
+    components.sort(key=lambda component: (-len(component), component[0]))
+    return components
+
+def _split_component(component: List[str], adjacency: Dict[str, Set[str]], max_tables: int) -> List[List[str]]:
+    """Split a component into clusters of at most max_tables by BFS growth from hub tables
+
+    Each cluster starts from the remaining table with the most remaining
+    neighbours and grows breadth-first, so related tables stay together.
+    """
+    remaining = set(component)
+    clusters = []
+    while remaining:
+        start = max(sorted(remaining), key=lambda name: len(adjacency[name] & remaining))
+        cluster = []
+        queue = deque([start])
+        queued = {start}
+        while queue and len(cluster) < max_tables:
+            table_name = queue.popleft()
+            cluster.append(table_name)
+            for neighbour in sorted(adjacency[table_name] & remaining):
+                if neighbour not in queued:
+                    queued.add(neighbour)
+                    queue.append(neighbour)
+        remaining.difference_update(cluster)
+        clusters.append(sorted(cluster))
+    return clusters
+
+def partition_tables(table_names: Iterable[str], relationships: Any, max_tables: int) -> List[List[str]]:
+    """Partition tables into parts of at most max_tables
+
+    Connected components are kept whole when they fit, giant components are
+    split into BFS clusters, and small components are packed together so the
+    result is not hundreds of one-table diagrams.
+    """
+    fk_index = _as_index(relationships)
+    adjacency = _build_adjacency(table_names, fk_index)
+    clusters = []
+    for component in connected_components(adjacency.keys(), fk_index):
+        if len(component) > max_tables:
+            clusters.extend(_split_component(component, adjacency, max_tables))
+        else:
+            clusters.append(component)
+
+    # First-fit decreasing packing of the clusters into parts
+    parts = []
+    for cluster in sorted(clusters, key=len, reverse=True):
+        for part in parts:
+            if len(part) + len(cluster) <= max_tables:
+                part.extend(cluster)
+                break
+        else:
+            parts.append(list(cluster))
+    return [sorted(part) for part in parts]
+
+def subschema(schema_data: Dict[str, Any], table_names: Iterable[str],
+              fk_index: ForeignKeyIndex = None) -> Dict[str, Any]:
+    """Return a schema_data restricted to table_names and the FKs between them
+
+    Pass a prebuilt fk_index when extracting many sub-schemas so each one
+    only touches the FKs of its own tables.
+    """
+    table_names = list(dict.fromkeys(name for name in table_names if name in schema_data['tables']))
+    if fk_index is None:
+        selected = set(table_names)
+        relationships = [
+            fk for fk in schema_data['relationships']
+            if fk.table_name in selected and fk.referenced_table_name in selected
+        ]
+    else:
+        relationships = fk_index.relationships_among(table_names)
+    return {
+        'database': schema_data['database'],
+        'schema': schema_data.get('schema', schema_data['database']),
+        'tables': {name: schema_data['tables'][name] for name in table_names},
+        'relationships': relationships
+    }
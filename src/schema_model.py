@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Schema Model
+Compact slotted records used as the interchange format between the extractor and the generators
+"""
+
+import sys
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Column flag bits
+PRIMARY_KEY = 1
+UNIQUE = 2
+MULTIPLE = 4
+NULLABLE = 8
+AUTO_INCREMENT = 16
+
+_COLUMN_KEY_FLAGS = {'PRI': PRIMARY_KEY, 'UNI': UNIQUE, 'MUL': MULTIPLE}
+
+# Types with a fractional seconds precision (DATETIME_PRECISION, 0 without an argument)
+FSP_TYPES = ('datetime', 'timestamp', 'time')
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern short repeated strings (type names, EXTRA values)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class _RowCompat:
+    """Read-only dict-style access for callers written against INFORMATION_SCHEMA row dicts"""
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    # Maps each row dict key to a function reading it from the record
+    ACCESSORS: Dict[str, Callable[[Any], Any]] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self.ACCESSORS[key](self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get() equivalent"""
+        accessor = self.ACCESSORS.get(key)
+        return accessor(self) if accessor is not None else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.ACCESSORS
+
+    def keys(self) -> Tuple[str, ...]:
+        """Row dict keys, in INFORMATION_SCHEMA column order"""
+        return self.FIELDS
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Row dict items"""
+        return ((key, self[key]) for key in self.FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the equivalent INFORMATION_SCHEMA row dict"""
+        return dict(self.items())
+
+    def to_values(self) -> Tuple[Any, ...]:
+        """Return the row values in FIELDS order (inverse of from_values)"""
+        return tuple(self[key] for key in self.FIELDS)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, _RowCompat):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Column(_RowCompat):
+    """One table column with key/nullability/auto_increment packed into flag bits"""
+    __slots__ = ('name', 'data_type', 'flags', 'default', 'extra',
+                 'max_length', 'precision', 'scale', 'comment', 'datetime_precision')
+    FIELDS = ('COLUMN_NAME', 'DATA_TYPE', 'IS_NULLABLE', 'COLUMN_KEY', 'COLUMN_DEFAULT', 'EXTRA',
+              'CHARACTER_MAXIMUM_LENGTH', 'NUMERIC_PRECISION', 'NUMERIC_SCALE', 'COLUMN_COMMENT',
+              'DATETIME_PRECISION')
+
+    def __init__(self, name: str, data_type: str, flags: int = 0, default: Optional[str] = None,
+                 extra: str = '', max_length: Optional[int] = None, precision: Optional[int] = None,
+                 scale: Optional[int] = None, comment: str = '', datetime_precision: Optional[int] = None):
+        self.name = name
+        self.data_type = _intern(data_type)
+        self.flags = flags
+        self.default = default
+        self.extra = _intern(extra or '')
+        self.max_length = max_length
+        self.precision = precision
+        self.scale = scale
+        self.comment = comment or ''
+        # Fractional seconds precision of time types (datetime(3) -> 3), None for other types
+        self.datetime_precision = datetime_precision
+
+    @classmethod
+    def from_values(cls, values: Sequence[Any]) -> 'Column':
+        """Build from a tuple cursor row selected in FIELDS order"""
+        (name, data_type, is_nullable, column_key, default, extra,
+         max_length, precision, scale, comment, datetime_precision) = values
+        flags = _COLUMN_KEY_FLAGS.get(column_key, 0)
+        if is_nullable == 'YES':
+            flags |= NULLABLE
+        if extra and 'auto_increment' in extra.lower():
+            flags |= AUTO_INCREMENT
+        return cls(name, data_type, flags, default, extra, max_length, precision, scale, comment,
+                   datetime_precision)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'Column':
+        """Build from an INFORMATION_SCHEMA.COLUMNS row dict"""
+        return cls.from_values([row.get(field) for field in cls.FIELDS])
+
+    @property
+    def is_primary_key(self) -> bool:
+        """COLUMN_KEY is PRI"""
+        return bool(self.flags & PRIMARY_KEY)
+
+    @property
+    def is_unique(self) -> bool:
+        """COLUMN_KEY is UNI"""
+        return bool(self.flags & UNIQUE)
+
+    @property
+    def is_multiple(self) -> bool:
+        """COLUMN_KEY is MUL (first column of a non-unique index)"""
+        return bool(self.flags & MULTIPLE)
+
+    @property
+    def is_nullable(self) -> bool:
+        """IS_NULLABLE is YES"""
+        return bool(self.flags & NULLABLE)
+
+    @property
+    def is_auto_increment(self) -> bool:
+        """EXTRA contains auto_increment"""
+        return bool(self.flags & AUTO_INCREMENT)
+
+    @property
+    def column_key(self) -> str:
+        """COLUMN_KEY value: 'PRI', 'UNI', 'MUL' or ''"""
+        if self.flags & PRIMARY_KEY:
+            return 'PRI'
+        if self.flags & UNIQUE:
+            return 'UNI'
+        if self.flags & MULTIPLE:
+            return 'MUL'
+        return ''
+
+Column.ACCESSORS = {
+    'COLUMN_NAME': attrgetter('name'),
+    'DATA_TYPE': attrgetter('data_type'),
+    'IS_NULLABLE': lambda column: 'YES' if column.flags & NULLABLE else 'NO',
+    'COLUMN_KEY': attrgetter('column_key'),
+    'COLUMN_DEFAULT': attrgetter('default'),
+    'EXTRA': attrgetter('extra'),
+    'CHARACTER_MAXIMUM_LENGTH': attrgetter('max_length'),
+    'NUMERIC_PRECISION': attrgetter('precision'),
+    'NUMERIC_SCALE': attrgetter('scale'),
+    'COLUMN_COMMENT': attrgetter('comment'),
+    'DATETIME_PRECISION': attrgetter('datetime_precision'),
+}
+
+class IndexColumn(_RowCompat):
+    """One column of an index (one INFORMATION_SCHEMA.STATISTICS row)"""
+    __slots__ = ('index_name', 'column_name', 'non_unique', 'seq_in_index')
+    FIELDS = ('INDEX_NAME', 'COLUMN_NAME', 'NON_UNIQUE', 'SEQ_IN_INDEX')
+
+    def __init__(self, index_name: str, column_name: str, non_unique: int, seq_in_index: int):
+        self.index_name = _intern(index_name)
+        self.column_name = column_name
+        self.non_unique = int(non_unique)
+        self.seq_in_index = int(seq_in_index)
+
+    @classmethod
+    def from_values(cls, values: Sequence[Any]) -> 'IndexColumn':
+        """Build from a tuple cursor row selected in FIELDS order"""
+        return cls(*values)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'IndexColumn':
+        """Build from an INFORMATION_SCHEMA.STATISTICS row dict"""
+        return cls.from_values([row.get(field) for field in cls.FIELDS])
+
+IndexColumn.ACCESSORS = {
+    'INDEX_NAME': attrgetter('index_name'),
+    'COLUMN_NAME': attrgetter('column_name'),
+    'NON_UNIQUE': attrgetter('non_unique'),
+    'SEQ_IN_INDEX': attrgetter('seq_in_index'),
+}
+
+class ForeignKey(_RowCompat):
+    """One foreign key column pair (one INFORMATION_SCHEMA.KEY_COLUMN_USAGE row)"""
+    __slots__ = ('table_name', 'column_name', 'referenced_table_name', 'referenced_column_name',
+                 'constraint_name', 'ordinal_position')
+    FIELDS = ('TABLE_NAME', 'COLUMN_NAME', 'REFERENCED_TABLE_NAME', 'REFERENCED_COLUMN_NAME',
+              'CONSTRAINT_NAME', 'ORDINAL_POSITION')
+
+    def __init__(self, table_name: str, column_name: str, referenced_table_name: str,
+                 referenced_column_name: str, constraint_name: str, ordinal_position: int = 1):
+        self.table_name = _intern(table_name)
+        self.column_name = column_name
+        self.referenced_table_name = _intern(referenced_table_name)
+        self.referenced_column_name = referenced_column_name
+        self.constraint_name = constraint_name
+        self.ordinal_position = int(ordinal_position or 1)
+
+    @classmethod
+    def from_values(cls, values: Sequence[Any]) -> 'ForeignKey':
+        """Build from a tuple cursor row selected in FIELDS order"""
+        return cls(*values)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'ForeignKey':
+        """Build from an INFORMATION_SCHEMA.KEY_COLUMN_USAGE row dict"""
+        return cls.from_values([row.get(field) for field in cls.FIELDS])
+
+class ForeignKeyConstraint:
+    """One foreign key constraint: its column pairs grouped from ForeignKey rows, in ordinal order"""
+    __slots__ = ('name', 'table_name', 'referenced_table_name', 'columns', 'referenced_columns')
+
+    def __init__(self, name: str, table_name: str, referenced_table_name: str,
+                 columns: Tuple[str, ...], referenced_columns: Tuple[str, ...]):
+        self.name = name
+        self.table_name = table_name
+        self.referenced_table_name = referenced_table_name
+        self.columns = columns
+        self.referenced_columns = referenced_columns
+
+    @property
+    def label(self) -> str:
+        """"col -> refcol", or "(a, b) -> (x, y)" for composite keys"""
+        if len(self.columns) == 1:
+            return f"{self.columns[0]} -> {self.referenced_columns[0]}"
+        return f"({', '.join(self.columns)}) -> ({', '.join(self.referenced_columns)})"
+
+    def __repr__(self) -> str:
+        return f"ForeignKeyConstraint({self.name!r}, {self.table_name!r}, {self.label!r})"
+
+ForeignKey.ACCESSORS = {
+    'TABLE_NAME': attrgetter('table_name'),
+    'COLUMN_NAME': attrgetter('column_name'),
+    'REFERENCED_TABLE_NAME': attrgetter('referenced_table_name'),
+    'REFERENCED_COLUMN_NAME': attrgetter('referenced_column_name'),
+    'CONSTRAINT_NAME': attrgetter('constraint_name'),
+    'ORDINAL_POSITION': attrgetter('ordinal_position'),
+}
+
+def group_foreign_keys(relationships: Iterable[ForeignKey]) -> List[ForeignKeyConstraint]:
+    """Group per-column FK rows into constraints, in order of first appearance"""
+    grouped: Dict[Tuple[str, str, str], List[ForeignKey]] = {}
+    for fk in relationships:
+        # Rows without a constraint name (hand-built data) are one constraint per column
+        key = (fk.table_name, fk.referenced_table_name, fk.constraint_name or fk.column_name)
+        grouped.setdefault(key, []).append(fk)
+
+    constraints = []
+    for (table_name, referenced_table_name, name), rows in grouped.items():
+        rows.sort(key=attrgetter('ordinal_position'))
+        constraints.append(ForeignKeyConstraint(
+            name, table_name, referenced_table_name,
+            tuple(fk.column_name for fk in rows),
+            tuple(fk.referenced_column_name for fk in rows)))
+    return constraints
+
+def unique_column_sets(table_data: Dict[str, Any]) -> List[FrozenSet[str]]:
+    """Column sets of the table's unique indexes (PRIMARY included)
+
+    Falls back to the COLUMN_KEY flags when index rows are not available
+    (streaming extraction): UNI columns and the primary key columns.
+    """
+    indexes = table_data.get('indexes')
+    if indexes:
+        grouped: Dict[str, set] = {}
+        for index in indexes:
+            if not index.non_unique:
+                grouped.setdefault(index.index_name, set()).add(index.column_name)
+        return [frozenset(columns) for columns in grouped.values()]
+
+    columns = table_data.get('columns', [])
+    unique_sets = [frozenset([column.name]) for column in columns if column.is_unique]
+    primary_key = frozenset(column.name for column in columns if column.is_primary_key)
+    if primary_key:
+        unique_sets.append(primary_key)
+    return unique_sets
+
+def relationship_cardinality(constraint: ForeignKeyConstraint, table_data: Optional[Dict[str, Any]]) -> str:
+    """Infer the erd cardinality of a constraint from its source table
+
+    Source side: '?' when the FK columns are covered by a unique index (at
+    most one row per referenced row), otherwise '*'. Target side: '?' when
+    any FK column is nullable (the reference is optional), otherwise '1'.
+    Without table data the traditional '*--1' is returned.
+    """
+    if table_data is None:
+        return '*--1'
+    fk_columns = set(constraint.columns)
+    unique = any(unique_set <= fk_columns for unique_set in unique_column_sets(table_data))
+    nullable = any(column.is_nullable for column in table_data.get('columns', []) if column.name in fk_columns)
+    return f"{'?' if unique else '*'}--{'?' if nullable else '1'}"
+
+def normalize_schema_data(schema_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert any plain row dicts in schema_data to model records, in place
+
+    Lets callers that build schema_data by hand (or from older JSON) keep
+    passing INFORMATION_SCHEMA-style dicts to the generators.
+    """
+    for table_data in schema_data.get('tables', {}).values():
+        columns = table_data.get('columns', [])
+        if columns and isinstance(columns[0], dict):
+            table_data['columns'] = [Column.from_row(row) for row in columns]
+        indexes = table_data.get('indexes', [])
+        if indexes and isinstance(indexes[0], dict):
+            table_data['indexes'] = [IndexColumn.from_row(row) for row in indexes]
+    relationships = schema_data.get('relationships', [])
+    if relationships and isinstance(relationships[0], dict):
+        schema_data['relationships'] = [ForeignKey.from_row(row) for row in relationships]
+    return schema_data
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Schema Snapshot
+Versioned, gzip-compressed JSON copy of extracted schema_data, so diagrams and Markdown
+can be rendered again later (or on another machine) without connecting to MySQL
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, TextIO
+from schema_model import FSP_TYPES, Column, ForeignKey, IndexColumn
+
+SNAPSHOT_FORMAT = 'erd-plus-snapshot'
+SNAPSHOT_FORMAT_VERSION = 2
+# Version 1 snapshots predate DATETIME_PRECISION; load_snapshot fills it in
+SUPPORTED_VERSIONS = (1, SNAPSHOT_FORMAT_VERSION)
+SNAPSHOT_SUFFIX = '.snapshot.json.gz'
+
+def _dumps(value: Any) -> str:
+    """Compact JSON for one snapshot fragment"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+def _json_default(value: Any) -> Any:
+    """Serialize driver values that json does not handle natively"""
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+class SnapshotWriter:
+    """Writes a snapshot one table at a time, so streaming extraction stays bounded in memory
+
+    Rows are stored as value lists in each record's FIELDS order (the same
+    layout as the schema cache); the field names are recorded in the header.
+    The file is written next to its final path and renamed into place by end().
+    """
+
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.tmp_path = self.output_path.with_name(self.output_path.name + '.tmp')
+        self.file: TextIO = None
+        self.table_count = 0
+
+    def begin(self, database: str, schema: str) -> None:
+        """Open the file and write the header"""
+        self.file = gzip.open(self.tmp_path, 'wt', encoding='utf-8')
+        header = {
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_FORMAT_VERSION,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'database': database,
+            'schema': schema,
+            'fields': {
+                'columns': Column.FIELDS,
+                'indexes': IndexColumn.FIELDS,
+                'relationships': ForeignKey.FIELDS,
+            },
+        }
+        self.file.write(_dumps(header)[:-1] + ',"tables":{')
+
+    def table(self, table_name: str, table_data: Dict[str, Any]) -> None:
+        """Append one table"""
+        entry = {
+            'columns': [column.to_values() for column in table_data['columns']],
+            'indexes': [index.to_values() for index in table_data.get('indexes', [])],
+        }
+        self.file.write((',' if self.table_count else '') + _dumps(table_name) + ':' + _dumps(entry))
+        self.table_count += 1
+
+    def end(self, relationships) -> None:
+        """Write the relationships and move the finished file into place"""
+        self.file.write('},"relationships":' + _dumps([fk.to_values() for fk in relationships]) + '}')
+        self.file.close()
+        self.file = None
+        os.replace(self.tmp_path, self.output_path)
+
+    def close(self) -> None:
+        """Discard an unfinished snapshot"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            os.remove(self.tmp_path)
+
+def save_snapshot(schema_data: Dict[str, Any], output_path: Path) -> None:
+    """Write a complete schema_data dict as a snapshot"""
+    writer = SnapshotWriter(output_path)
+    try:
+        writer.begin(schema_data['database'], schema_data.get('schema', schema_data['database']))
+        for table_name, table_data in schema_data['tables'].items():
+            writer.table(table_name, table_data)
+        writer.end(schema_data['relationships'])
+    finally:
+        writer.close()
+
+def _column_v1(values) -> Column:
+    """Column from a version 1 row, with the DATETIME_PRECISION MySQL reports for it
+
+    Version 1 did not record the fractional seconds precision; assuming the
+    default of 0 keeps unchanged datetime columns from showing up as altered
+    when such a snapshot is diffed against a current one.
+    """
+    data_type = values[Column.FIELDS.index('DATA_TYPE')]
+    return Column.from_values(list(values) + [0 if data_type in FSP_TYPES else None])
+
+def load_snapshot(snapshot_path: Path) -> Dict[str, Any]:
+    """Read a snapshot back into schema_data (tables, relationships, database and schema)"""
+    snapshot_path = Path(snapshot_path)
+    try:
+        opener = gzip.open if snapshot_path.suffix == '.gz' else open
+        with opener(snapshot_path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise Exception(f"Could not read schema snapshot {snapshot_path}: {e}")
+    if not isinstance(data, dict) or data.get('format') != SNAPSHOT_FORMAT:
+        raise Exception(f"{snapshot_path} is not an ERD Plus schema snapshot")
+    if data.get('version') not in SUPPORTED_VERSIONS:
+        raise Exception(f"Schema snapshot {snapshot_path} has unsupported version {data.get('version')} "
+                        f"(supported: {', '.join(map(str, SUPPORTED_VERSIONS))})")
+
+    load_column = _column_v1 if data['version'] == 1 else Column.from_values
+    tables = {
+        table_name: {
+            'columns': [load_column(values) for values in entry['columns']],
+            'indexes': [IndexColumn.from_values(values) for values in entry['indexes']],
+        }
+        for table_name, entry in data['tables'].items()
+    }
+    return {
+        'database': data['database'],
+        'schema': data['schema'],
+        'tables': tables,
+        'relationships': [ForeignKey.from_values(values) for values in data['relationships']],
+    }
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Synthetic Schema
+Deterministic generated schemas of any size, for benchmarks that must run without a database
+"""
+
+import random
+from typing import Dict, Any
+from schema_model import (Column, ForeignKey, IndexColumn, AUTO_INCREMENT, MULTIPLE, NULLABLE,
+                          PRIMARY_KEY, UNIQUE)
+
+_ASCII_WORDS = ('customer', 'order', 'status', 'amount', 'created', 'updated', 'reference', 'code',
+                'flag', 'note', 'total', 'price', 'address', 'name', 'type', 'value')
+_MULTIBYTE_WORDS = ('顧客', '注文', '状態', '金額', '作成日時', '更新日時', '参照', 'コード',
+                    'フラグ', '備考', '合計', '価格', '住所', '名前', '種別', '値')
+
+# (data_type, max_length, precision, scale) for the filler columns
+_COLUMN_TYPES = [
+    ('varchar', 255, None, None),
+    ('int', None, 10, 0),
+    ('decimal', None, 10, 2),
+    ('datetime', None, None, None),
+    ('text', 65535, None, None),
+    ('tinyint', None, 3, 0),
+]
+
+def _comment(rng: random.Random, length: int, multibyte: bool) -> str:
+    """Column comment of about length characters made of ASCII or Japanese words"""
+    if length <= 0:
+        return ''
+    words = _MULTIBYTE_WORDS if multibyte else _ASCII_WORDS
+    separator = '' if multibyte else ' '
+    text = ''
+    while len(text) < length:
+        text += rng.choice(words) + separator
+    return text[:length].rstrip() or text[:length]
+
+def synthetic_schema(table_count: int, columns_per_table: int = 8, fks_per_table: float = 1.5,
+                     comment_length: int = 16, multibyte: bool = False, seed: int = 0,
+                     database: str = 'synthetic') -> Dict[str, Any]:
+    """Build schema_data with table_count tables and about fks_per_table foreign keys each
+
+    Foreign keys point at earlier tables with preferential attachment, so the
+    graph has a few hub tables (like users/orders) and a long tail, which is
+    closer to real schemas than a uniform random graph. Filler columns get
+    comments of comment_length characters, in Japanese when multibyte is set.
+    """
+    rng = random.Random(seed)
+    tables = {}
+    relationships = []
+    # Each table appears once per incoming FK, so popular tables attract more
+    targets = []
+
+    for number in range(table_count):
+        table_name = f"table_{number:05d}"
+        columns = [Column('id', 'bigint', PRIMARY_KEY | AUTO_INCREMENT, None, 'auto_increment',
+                          None, 19, 0, 'Primary key')]
+        indexes = [IndexColumn('PRIMARY', 'id', 0, 1)]
+
+        fk_count = 0
+        if number > 0:
+            fk_count = min(number, int(fks_per_table) + (rng.random() < fks_per_table % 1))
+        referenced = set()
+        while len(referenced) < fk_count:
+            if targets and rng.random() < 0.7:
+                referenced.add(rng.choice(targets))
+            else:
+                referenced.add(f"table_{rng.randrange(number):05d}")
+        for target in sorted(referenced):
+            column_name = f"{target}_id"
+            flags = MULTIPLE | (NULLABLE if rng.random() < 0.3 else 0)
+            columns.append(Column(column_name, 'bigint', flags, None, '', None, 19, 0, ''))
+            indexes.append(IndexColumn(f"idx_{column_name}", column_name, 1, 1))
+            relationships.append(ForeignKey(table_name, column_name, target, 'id',
+                                            f"fk_{table_name}_{column_name}"))
+            targets.append(target)
+
+        for index in range(max(0, columns_per_table - len(columns))):
+            data_type, max_length, precision, scale = rng.choice(_COLUMN_TYPES)
+            column_name = f"column_{index:02d}"
+            flags = NULLABLE if rng.random() < 0.5 else 0
+            if index == 0 and data_type == 'varchar':
+                flags |= UNIQUE
+                indexes.append(IndexColumn(f"uq_{column_name}", column_name, 0, 1))
+            columns.append(Column(column_name, data_type, flags, None, '',
+                                  max_length, precision, scale, _comment(rng, comment_length, multibyte)))
+
+        tables[table_name] = {'columns': columns, 'indexes': indexes}
+
+    return {
+        'database': database,
+        'schema': database,
+        'tables': tables,
+        'relationships': relationships
+    }
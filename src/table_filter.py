@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Table Filter
+Include/exclude table name patterns and a table type selection, rendered as SQL conditions
+so that extraction queries only ever return rows of the selected tables
+"""
+
+import re
+from typing import Iterable, List, Pattern, Tuple
+
+TABLE_TYPES = ('BASE TABLE', 'VIEW', 'SYSTEM VIEW')
+TABLE_TYPE_ALIASES = {'table': 'BASE TABLE', 'base': 'BASE TABLE', 'view': 'VIEW'}
+# Escape character of the LIKE patterns (explicit, so NO_BACKSLASH_ESCAPES does not matter)
+LIKE_ESCAPE = '!'
+
+def _split(value: str) -> List[str]:
+    """Comma separated list without blanks"""
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+def glob_to_like(pattern: str) -> str:
+    """Translate a glob (* and ?) into a LIKE pattern, escaping LIKE's own wildcards"""
+    like = ''
+    for char in pattern:
+        if char in (LIKE_ESCAPE, '%', '_'):
+            like += LIKE_ESCAPE + char
+        elif char == '*':
+            like += '%'
+        elif char == '?':
+            like += '_'
+        else:
+            like += char
+    return like
+
+def glob_to_regex(pattern: str) -> Pattern:
+    """Compile a glob with the semantics of glob_to_like: only * and ? are wildcards, case-insensitive
+
+    Unlike fnmatch, [ and ] are literal, so both matching paths select the same tables.
+    """
+    regex = ''.join('.*' if char == '*' else '.' if char == '?' else re.escape(char) for char in pattern)
+    return re.compile(regex, re.I | re.S)
+
+def parse_table_types(value: str) -> Tuple[str, ...]:
+    """Validate a comma separated table type list ('' selects every type)"""
+    table_types = []
+    for item in _split(value):
+        table_type = TABLE_TYPE_ALIASES.get(item.lower(), item.upper())
+        if table_type not in TABLE_TYPES:
+            raise Exception(f"Unknown table type '{item}' (supported: {', '.join(TABLE_TYPES)}, table, view)")
+        if table_type not in table_types:
+            table_types.append(table_type)
+    return tuple(table_types)
+
+class TableFilter:
+    """Which tables of a schema are extracted: name globs to include and exclude, and table types"""
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = (),
+                 table_types: Iterable[str] = ()):
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.table_types = tuple(table_types)
+        self.include_regexes = [glob_to_regex(pattern) for pattern in self.include]
+        self.exclude_regexes = [glob_to_regex(pattern) for pattern in self.exclude]
+
+    @classmethod
+    def parse(cls, include: str = '', exclude: str = '', table_types: str = '') -> 'TableFilter':
+        """Build from comma separated .env / command line values"""
+        return cls(_split(include), _split(exclude), parse_table_types(table_types))
+
+    @property
+    def active(self) -> bool:
+        """Whether the filter selects anything less than the whole schema"""
+        return bool(self.include or self.exclude or self.table_types)
+
+    def describe(self) -> str:
+        """Short human readable summary for the log"""
+        parts = []
+        if self.include:
+            parts.append(f"include {', '.join(self.include)}")
+        if self.exclude:
+            parts.append(f"exclude {', '.join(self.exclude)}")
+        if self.table_types:
+            parts.append(f"types {', '.join(self.table_types)}")
+        return '; '.join(parts) or 'all tables'
+
+    def matches(self, table_name: str, table_type: str = 'BASE TABLE') -> bool:
+        """Whether the filter selects a table, for sources other than INFORMATION_SCHEMA
+
+        Globs match case-insensitively, as LIKE does under the default collation,
+        and select the same tables as the LIKE patterns of condition().
+        """
+        if self.include and not any(regex.fullmatch(table_name) for regex in self.include_regexes):
+            return False
+        if any(regex.fullmatch(table_name) for regex in self.exclude_regexes):
+            return False
+        return not self.table_types or table_type in self.table_types
+
+    def condition(self, schema_name: str, column: str = 'TABLE_NAME',
+                  type_column: str = None) -> Tuple[str, Tuple]:
+        """'AND ...' conditions selecting column's tables, and their parameters
+
+        type_column names the TABLE_TYPE column when the query reads
+        INFORMATION_SCHEMA.TABLES itself; other views are matched against a
+        TABLES subquery. Returns ('', ()) for an inactive filter.
+        """
+        clauses = []
+        params = ()
+        if self.include:
+            clauses.append("(" + ' OR '.join([f"{column} LIKE %s ESCAPE '{LIKE_ESCAPE}'"] * len(self.include)) + ")")
+            params += tuple(glob_to_like(pattern) for pattern in self.include)
+        for pattern in self.exclude:
+            clauses.append(f"{column} NOT LIKE %s ESCAPE '{LIKE_ESCAPE}'")
+            params += (glob_to_like(pattern),)
+        if self.table_types:
+            placeholders = ', '.join(['%s'] * len(self.table_types))
+            if type_column is not None:
+                clauses.append(f"{type_column} IN ({placeholders})")
+                params += self.table_types
+            else:
+                clauses.append(f"{column} IN (SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES "
+                               f"WHERE TABLE_SCHEMA = %s AND TABLE_TYPE IN ({placeholders}))")
+                params += (schema_name,) + self.table_types
+        return ' '.join(f"AND {clause}" for clause in clauses), params
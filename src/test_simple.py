@@ -30,9 +30,11 @@ def load_config():
     
     return config
 
-def test_mysql_connection(config=None, verbose=False):
+def test_mysql_connection(config=None, verbose=False, pool=None):
     """
     Test MySQL connection with the given configuration
+    If a connection pool is given, a pooled connection is borrowed instead of
+    opening a new one
     Returns True if connection successful, False otherwise
     """
     if config is None:
@@ -62,13 +64,16 @@ def test_mysql_connection(config=None, verbose=False):
         if verbose:
             print("Attempting to connect...")
             
-        connection = mysql.connector.connect(
-            host=config.get('host'),
-            port=config.get('port'),
-            user=config.get('username'),
-            password=config.get('password'),
-            connect_timeout=10
-        )
+        if pool is not None:
+            connection = pool.get_connection()
+        else:
+            connection = mysql.connector.connect(
+                host=config.get('host'),
+                port=config.get('port'),
+                user=config.get('username'),
+                password=config.get('password'),
+                connect_timeout=10
+            )
         
         if connection.is_connected():
             if verbose:
@@ -77,6 +82,7 @@ def test_mysql_connection(config=None, verbose=False):
                 cursor.execute("SELECT VERSION()")
                 version = cursor.fetchone()
                 print(f"MySQL version: {version[0]}")
+                cursor.close()
             connection.close()
             return True
     
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Token Estimates
+Cheap, dependency-free approximation of how many LLM tokens a text costs
+"""
+
+# BPE tokenizers average about four characters of English/ASCII text per token
+ASCII_CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: one token per four ASCII characters, one per other character
+
+    Japanese and other non-ASCII characters usually cost a token each (often
+    more), so counting them one by one keeps budgets on the safe side.
+    """
+    if text.isascii():
+        return -(-len(text) // ASCII_CHARS_PER_TOKEN)
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return -(-ascii_chars // ASCII_CHARS_PER_TOKEN) + len(text) - ascii_chars
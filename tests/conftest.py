@@ -0,0 +1,6 @@
+"""pytest setup: the application modules live flat in src/ and import each other by bare name"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
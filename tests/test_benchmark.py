@@ -0,0 +1,41 @@
+"""Tests for the synthetic schemas and the stage benchmark"""
+
+from benchmark import benchmark_size, compare
+from schema_model import group_foreign_keys
+from synthetic_schema import synthetic_schema
+
+def test_synthetic_schema_is_deterministic_per_seed():
+    first = synthetic_schema(50, seed=7)
+    assert first == synthetic_schema(50, seed=7)
+    assert first['relationships'] != synthetic_schema(50, seed=8)['relationships']
+
+def test_synthetic_schema_shape():
+    schema_data = synthetic_schema(40, columns_per_table=6, fks_per_table=2, multibyte=True)
+    assert len(schema_data['tables']) == 40
+    assert all(len(table_data['columns']) >= 6 for table_data in schema_data['tables'].values())
+    # Foreign keys only point at earlier tables; the first table has none
+    for constraint in group_foreign_keys(schema_data['relationships']):
+        assert constraint.referenced_table_name < constraint.table_name
+    assert len(schema_data['relationships']) == 2 * 39 - 1
+    comments = [column.comment for column in schema_data['tables']['table_00001']['columns'][1:] if column.comment]
+    assert comments and all(not comment.isascii() for comment in comments)
+
+def test_benchmark_size_reports_every_stage(tmp_path):
+    results = benchmark_size(synthetic_schema(20), ['erd', 'emit', 'compact', 'dot'], 1, tmp_path)
+    assert list(results) == ['erd', 'emit', 'compact', 'dot']
+    for result in results.values():
+        assert result['output_bytes'] > 0
+        assert result['seconds_min'] <= result['seconds_median']
+
+def _results(seconds, parameters=None):
+    return {'parameters': parameters or {'seed': 0},
+            'runs': [{'tables': 100, 'stages': {stage: {'seconds_min': value} for stage, value in seconds.items()}}]}
+
+def test_compare_reports_regressions_above_the_threshold(capsys):
+    baseline = _results({'erd': 1.0, 'dot': 1.0, 'emit': 0.0})
+    regressions = compare(_results({'erd': 1.2, 'dot': 1.5, 'emit': 0.1}), baseline, 1.25)
+    assert regressions == ['dot at 100 tables (1.50x)']
+    assert 'Warning' not in capsys.readouterr().out
+
+    compare(_results({'erd': 1.0}, {'seed': 1}), baseline, 1.25)
+    assert 'different parameters' in capsys.readouterr().out
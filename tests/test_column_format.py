@@ -0,0 +1,40 @@
+"""Tests for the column wording shared by the .er labels and the Markdown outputs"""
+
+from column_format import column_constraints
+from emitters import MarkdownEmitter, emit_schema
+from erd_generator import ERDGenerator
+from schema_model import Column, ForeignKey
+
+def _column(name, key='', nullable='NO'):
+    return Column.from_row({'COLUMN_NAME': name, 'DATA_TYPE': 'int', 'IS_NULLABLE': nullable, 'COLUMN_KEY': key})
+
+def test_indexed_column_without_foreign_key_is_not_labelled_foreign_key():
+    assert column_constraints(_column('created_by', key='MUL')) == ['not null']
+
+def test_foreign_key_label_comes_from_the_foreign_key_columns():
+    assert column_constraints(_column('user_id'), {'user_id'}) == ['foreign key', 'not null']
+    # A foreign key that is also the primary key keeps both labels
+    assert column_constraints(_column('user_id', key='PRI'), {'user_id'}) == ['primary key', 'foreign key', 'not null']
+
+def test_er_labels_mark_only_the_real_foreign_key_columns():
+    generator = ERDGenerator({
+        'database': 'shop',
+        'tables': {
+            'orders': {'columns': [_column('id', key='PRI'), _column('user_id'), _column('status', key='MUL')]},
+            'users': {'columns': [_column('id', key='PRI')]},
+        },
+        'relationships': [ForeignKey('orders', 'user_id', 'users', 'id', 'fk_orders_user', 1)],
+    })
+    definition = generator._generate_table_definition('orders', generator.schema_data['tables']['orders'])
+    assert '+user_id {label: "int, foreign key, not null"}' in definition
+    assert '+status {label: "int, not null"}' in definition
+
+def test_markdown_marks_only_the_real_foreign_key_columns(tmp_path):
+    schema_info = {'database': 'shop',
+                   'relationships': [ForeignKey('orders', 'user_id', 'users', 'id', 'fk_orders_user', 1)]}
+    tables = [('orders', {'columns': [_column('user_id'), _column('status', key='MUL')]}),
+              ('users', {'columns': [_column('id', key='PRI')]})]
+    emit_schema(schema_info, tables, [MarkdownEmitter(tmp_path / 'shop.md')], ['orders', 'users'])
+    markdown = (tmp_path / 'shop.md').read_text(encoding='utf-8')
+    assert '| user_id | int | foreign key, not null |' in markdown
+    assert '| status | int | not null |' in markdown
@@ -0,0 +1,62 @@
+"""Tests for the token-dense compact schema serialization"""
+
+import io
+
+from compact_schema import format_column, write_compact_schema
+from emitters import CompactSchemaEmitter, MarkdownEmitter, emit_schema
+from schema_model import Column, ForeignKey, IndexColumn
+from synthetic_schema import synthetic_schema
+from tokens import estimate_tokens
+
+def _column(name, data_type='int', nullable='NO', key='', **fields):
+    return Column.from_row(dict({'COLUMN_NAME': name, 'DATA_TYPE': data_type, 'IS_NULLABLE': nullable,
+                                 'COLUMN_KEY': key}, **fields))
+
+def _schema():
+    return {
+        'database': 'db', 'schema': 'shop',
+        'tables': {
+            'users': {'columns': [_column('id', key='PRI', EXTRA='auto_increment', NUMERIC_PRECISION=10),
+                                  _column('email', 'varchar', key='UNI', CHARACTER_MAXIMUM_LENGTH=255,
+                                          COLUMN_COMMENT='login name')],
+                      'indexes': [IndexColumn('PRIMARY', 'id', 0, 1), IndexColumn('uq_email', 'email', 0, 1)]},
+            'orders': {'columns': [_column('id', key='PRI'), _column('user_id', nullable='YES', key='MUL'),
+                                   _column('total', 'decimal', NUMERIC_PRECISION=10, NUMERIC_SCALE=2,
+                                           COLUMN_DEFAULT='0.00'),
+                                   _column('created_at', 'datetime', COLUMN_DEFAULT='CURRENT_TIMESTAMP',
+                                           DATETIME_PRECISION=3)],
+                       'indexes': [IndexColumn('PRIMARY', 'id', 0, 1), IndexColumn('ix_user', 'user_id', 1, 1)]},
+        },
+        'relationships': [ForeignKey('orders', 'user_id', 'users', 'id', 'fk_orders_user')],
+    }
+
+def test_column_flags_defaults_and_comments():
+    assert format_column(_column('id', key='PRI', EXTRA='auto_increment', NUMERIC_PRECISION=10)) == '*id i A'
+    assert format_column(_column('note', 'varchar', nullable='YES', CHARACTER_MAXIMUM_LENGTH=20,
+                                 COLUMN_DEFAULT='a b', COLUMN_COMMENT='備考')) == 'note vc20? ="a b" "備考"'
+
+def test_compact_schema_lines():
+    f = io.StringIO()
+    tokens = write_compact_schema(_schema(), f)
+    lines = f.getvalue().splitlines()
+    assert lines[0] == '# db.shop: 2 tables, 1 foreign keys (erd-plus compact v1)'
+    assert lines[3:] == [
+        'users: *id i A; email vc255 U "login name"',
+        'orders: *id i; user_id i? K; total dec10,2 =0.00; created_at dt3 =now',
+        '# fk: source>target, then source side (*=many ?=at most one) and target side (1=required ?=optional)',
+        'orders.user_id>users.id *?',
+    ]
+    assert tokens == estimate_tokens(f.getvalue())
+
+def test_emitter_matches_the_whole_schema_writer_and_beats_markdown(tmp_path):
+    schema_data = synthetic_schema(30, comment_length=24)
+    f = io.StringIO()
+    write_compact_schema(schema_data, f)
+
+    emitter = CompactSchemaEmitter(tmp_path / 'synthetic.schema.txt')
+    emit_schema(schema_data, schema_data['tables'].items(), [emitter, MarkdownEmitter(tmp_path / 'synthetic.md')])
+    compact = (tmp_path / 'synthetic.schema.txt').read_text(encoding='utf-8')
+    assert compact == f.getvalue()
+    # The running estimate rounds up once per written line group, so it never undercounts
+    assert estimate_tokens(compact) <= emitter.tokens <= estimate_tokens(compact) + len(schema_data['tables']) + 2
+    assert emitter.tokens < estimate_tokens((tmp_path / 'synthetic.md').read_text(encoding='utf-8')) / 2
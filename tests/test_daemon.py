@@ -0,0 +1,22 @@
+"""Tests for the daemon's per-schema regeneration outputs"""
+
+import json
+
+from daemon import METRICS_SUFFIX, ERDDaemon
+
+def test_metrics_are_kept_per_schema(tmp_path, monkeypatch):
+    def generate(schema_name, target_dir):
+        path = target_dir / f"{schema_name}.er"
+        path.write_text(f"[{schema_name}]\n")
+        return {'ERD file': path}
+
+    daemon = ERDDaemon({'database': 'db', 'schemas': ['shop', 'blog']}, None, tmp_path, generate)
+    monkeypatch.setattr(daemon, 'schema_fingerprint', lambda schema_name: f"{schema_name}-1")
+    assert daemon.poll() == 2
+
+    for schema_name in ('shop', 'blog'):
+        data = json.loads((tmp_path / f"{schema_name}{METRICS_SUFFIX}").read_text(encoding='utf-8'))
+        assert data['schemas'] == [schema_name]
+        assert f"{schema_name}{METRICS_SUFFIX}" in daemon.store.index()[schema_name]['files']
+    assert not (tmp_path / 'metrics.json').exists()
+    assert not (tmp_path / '.staging').exists()
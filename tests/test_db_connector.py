@@ -0,0 +1,214 @@
+"""Tests for the MySQL schema extractor against a fake INFORMATION_SCHEMA"""
+
+import pytest
+from mysql.connector import Error
+
+from db_connector import MySQLSchemaExtractor, _connect_preferred, connection_targets
+from schema_cache import SchemaCache
+from schema_model import Column, ForeignKey, IndexColumn
+
+# Rows of the bulk queries (TABLE_NAME first), in the order MySQL returns them
+COLUMN_ROWS = [
+    ('orders', 'id', 'int', 'NO', 'PRI', None, 'auto_increment', None, 10, 0, '', None),
+    ('orders', 'user_id', 'int', 'NO', 'MUL', None, '', None, 10, 0, '', None),
+    ('orders', 'created_at', 'datetime', 'NO', '', 'CURRENT_TIMESTAMP', 'DEFAULT_GENERATED', None, None, None, '', 0),
+    ('users', 'id', 'int', 'NO', 'PRI', None, 'auto_increment', None, 10, 0, '', None),
+    ('users', 'email', 'varchar', 'NO', 'UNI', None, '', 255, None, None, 'login', None),
+]
+INDEX_ROWS = [
+    ('orders', 'PRIMARY', 'id', 0, 1),
+    ('orders', 'ix_user', 'user_id', 1, 1),
+    ('users', 'PRIMARY', 'id', 0, 1),
+    ('users', 'uq_email', 'email', 0, 1),
+]
+FOREIGN_KEY_ROWS = [('orders', 'user_id', 'users', 'id', 'fk_orders_user', 1)]
+
+class FakeCursor:
+    """Cursor answering the extractor's queries from the rows above"""
+
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+
+    def execute(self, query, params):
+        self.database.queries.append(query)
+        self.rows = list(self.database.answer(query, params))
+        self.database.unread_result = bool(self.rows)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        self.database.unread_result = False
+        return rows
+
+    def fetchmany(self, size):
+        self.database.fetch_sizes.append(size)
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        self.database.unread_result = bool(self.rows)
+        return rows
+
+    def close(self):
+        pass
+
+class FakeDatabase:
+    """Connection and pool in one: every cursor reads the same fake INFORMATION_SCHEMA"""
+
+    def __init__(self, column_rows=COLUMN_ROWS, index_rows=INDEX_ROWS, fingerprints=None):
+        self.column_rows = column_rows
+        self.index_rows = index_rows
+        # TABLES-level fingerprint row values per table (CREATE_TIME, column count, checksums)
+        self.fingerprints = fingerprints or {}
+        self.queries = []
+        self.fetch_sizes = []
+        self.unread_result = False
+        self.consumed = 0
+
+    def answer(self, query, params):
+        per_table = 'AND TABLE_NAME = %s' in query
+        if 'FROM INFORMATION_SCHEMA.TABLES t' in query:
+            return [(table_name,) + values for table_name, values in self.fingerprints.items()]
+        if 'FROM INFORMATION_SCHEMA.TABLES' in query:
+            return [(table_name,) for table_name in dict.fromkeys(row[0] for row in self.column_rows)]
+        if 'KEY_COLUMN_USAGE' in query:
+            return FOREIGN_KEY_ROWS
+        rows = self.column_rows if 'FROM INFORMATION_SCHEMA.COLUMNS' in query else self.index_rows
+        if 'TABLE_NAME IN' in query:
+            rows = [row for row in rows if row[0] in params[1:]]
+        if 'NON_UNIQUE = 0' in query:
+            rows = [row for row in rows if row[3] == 0]
+        if per_table:
+            return [row[1:] for row in rows if row[0] == params[1]]
+        return rows
+
+    def get_connection(self):
+        return self
+
+    def cursor(self, buffered=True):
+        return FakeCursor(self)
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+    def consume_results(self):
+        self.consumed += 1
+        self.unread_result = False
+
+def _extractor(database, **config):
+    return MySQLSchemaExtractor(dict({'database': 'shop', 'schema': 'shop'}, **config), pool=database)
+
+def test_bulk_extraction_groups_rows_per_table_with_one_query_per_view():
+    database = FakeDatabase()
+    schema_data = _extractor(database).extract_schema(bulk=True)
+    assert list(schema_data['tables']) == ['orders', 'users']
+    assert [column.name for column in schema_data['tables']['orders']['columns']] == ['id', 'user_id', 'created_at']
+    assert schema_data['tables']['users']['columns'][1] == Column.from_values(COLUMN_ROWS[4][1:])
+    assert schema_data['tables']['users']['indexes'] == [IndexColumn.from_values(row[1:]) for row in INDEX_ROWS[2:]]
+    assert schema_data['relationships'] == [ForeignKey.from_values(FOREIGN_KEY_ROWS[0])]
+    # tables, columns, indexes and foreign keys, however many tables there are
+    assert len(database.queries) == 4
+
+def test_bulk_and_per_table_extraction_agree():
+    per_table_database = FakeDatabase()
+    per_table = _extractor(per_table_database).extract_schema(bulk=False)
+    assert per_table == _extractor(FakeDatabase()).extract_schema(bulk=True)
+    assert len(per_table_database.queries) == 2 + 2 * len(per_table['tables'])
+
+def test_connection_targets_put_the_replica_first():
+    config = {'host': 'primary', 'port': 3306}
+    assert connection_targets(config) == [('primary', 3306)]
+    assert connection_targets(dict(config, replica_host='replica')) == [('replica', 3306), ('primary', 3306)]
+    assert connection_targets(dict(config, replica_host='replica', replica_port=3307)) == \
+        [('replica', 3307), ('primary', 3306)]
+
+def _connector(reachable):
+    attempts = []
+
+    def connect(host, port):
+        attempts.append(host)
+        if host not in reachable:
+            raise Error(msg=f"Can't connect to {host}")
+        return f"connection to {host}"
+    return attempts, connect
+
+def test_unreachable_replica_falls_back_to_the_primary():
+    config = {'host': 'primary', 'port': 3306, 'replica_host': 'replica'}
+    attempts, connect = _connector(reachable={'primary'})
+    assert _connect_preferred(config, connect) == 'connection to primary'
+    assert attempts == ['replica', 'primary']
+
+    attempts, connect = _connector(reachable={'replica', 'primary'})
+    assert _connect_preferred(config, connect) == 'connection to replica'
+    assert attempts == ['replica']
+
+def test_unreachable_primary_raises():
+    attempts, connect = _connector(reachable=set())
+    with pytest.raises(Error):
+        _connect_preferred({'host': 'primary', 'port': 3306, 'replica_host': 'replica'}, connect)
+    assert attempts == ['replica', 'primary']
+
+def _table_queries(database):
+    """COLUMNS and STATISTICS queries the extractor ran (fingerprints also read those views)"""
+    return [query for query in database.queries
+            if 'INFORMATION_SCHEMA.TABLES' not in query and 'KEY_COLUMN_USAGE' not in query]
+
+FINGERPRINTS = {'orders': ('2026-01-01 00:00:00', 3, 111, 11), 'users': ('2026-01-01 00:00:00', 2, 222, 22)}
+
+def test_cache_refetches_only_changed_tables(tmp_path):
+    cache_path = tmp_path / 'shop.json'
+    first = _extractor(FakeDatabase(fingerprints=FINGERPRINTS)).extract_schema(cache=SchemaCache(cache_path))
+
+    # users gets a new column comment and checksum; orders is served from the cache
+    column_rows = COLUMN_ROWS[:4] + [COLUMN_ROWS[4][:10] + ('e-mail',) + COLUMN_ROWS[4][11:]]
+    database = FakeDatabase(column_rows, fingerprints=dict(FINGERPRINTS, users=('2026-01-01 00:00:00', 2, 333, 22)))
+    second = _extractor(database).extract_schema(cache=SchemaCache(cache_path))
+
+    assert second['tables']['orders'] == first['tables']['orders']
+    assert second['tables']['users']['columns'][1].comment == 'e-mail'
+    table_queries = _table_queries(database)
+    assert len(table_queries) == 2
+    assert all('TABLE_NAME IN (%s)' in query for query in table_queries)
+
+def test_cache_evicts_dropped_tables(tmp_path):
+    cache_path = tmp_path / 'shop.json'
+    _extractor(FakeDatabase(fingerprints=FINGERPRINTS)).extract_schema(cache=SchemaCache(cache_path))
+
+    database = FakeDatabase(COLUMN_ROWS[3:], INDEX_ROWS[2:], fingerprints={'users': FINGERPRINTS['users']})
+    schema_data = _extractor(database).extract_schema(cache=SchemaCache(cache_path))
+    assert list(schema_data['tables']) == ['users']
+    assert list(SchemaCache(cache_path).tables) == ['users']
+    # Nothing changed for users, so no column or index rows were read
+    assert _table_queries(database) == []
+
+def test_metadata_rows_are_fetched_in_batches():
+    database = FakeDatabase()
+    extractor = _extractor(database, fetch_batch_size=2)
+    extractor.connection = database
+    columns = extractor.get_all_table_columns()
+    assert [len(columns[table_name]) for table_name in ('orders', 'users')] == [3, 2]
+    # Five rows in batches of two, then the empty batch that ends the stream
+    assert database.fetch_sizes == [2, 2, 2, 2]
+
+def test_stopping_a_stream_early_drains_the_result_set():
+    database = FakeDatabase()
+    extractor = _extractor(database, fetch_batch_size=2)
+    extractor.connection = database
+    rows = extractor._iter_rows(database.cursor(buffered=False), "SELECT ... FROM INFORMATION_SCHEMA.COLUMNS",
+                                ('shop',), 'columns')
+    assert next(rows) == COLUMN_ROWS[0]
+    rows.close()
+    assert database.consumed == 1
+    assert not database.unread_result
+
+def test_streamed_tables_arrive_one_at_a_time_with_their_unique_indexes():
+    database = FakeDatabase()
+    schema_info, tables = _extractor(database, fetch_batch_size=2).stream_schema()
+    assert schema_info['table_names'] == ['orders', 'users']
+    assert schema_info['relationships'] == [ForeignKey.from_values(FOREIGN_KEY_ROWS[0])]
+    orders_name, orders = next(tables)
+    assert orders_name == 'orders'
+    assert [column.name for column in orders['columns']] == ['id', 'user_id', 'created_at']
+    # Only unique indexes are attached; ix_user is left out
+    assert [index.index_name for index in orders['indexes']] == ['PRIMARY']
+    assert [table_name for table_name, _ in tables] == ['users']
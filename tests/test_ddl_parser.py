@@ -0,0 +1,149 @@
+"""Tests for the mysqldump DDL parser and its agreement with the INFORMATION_SCHEMA rows extract_schema reads"""
+
+import gzip
+
+import pytest
+
+from ddl_parser import parse_ddl
+from schema_model import Column
+from table_filter import TableFilter
+
+# SHOW CREATE TABLE output of MySQL 8.0
+CREATE_TABLE = """\
+-- Host: localhost    Database: shop
+CREATE TABLE `orders` (
+  `id` bigint unsigned NOT NULL AUTO_INCREMENT,
+  `user_id` int NOT NULL COMMENT '注文者',
+  `code` char(36) NOT NULL DEFAULT (uuid()),
+  `status` enum('new','paid','shipped') NOT NULL DEFAULT 'new',
+  `total` decimal(10,2) NOT NULL DEFAULT '0.00',
+  `paid_at` timestamp(6) NULL DEFAULT NULL,
+  `created_at` datetime(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `ship_time` time(2) DEFAULT NULL,
+  `ship_date` date DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_code` (`code`),
+  KEY `fk_user` (`user_id`),
+  CONSTRAINT `fk_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+# INFORMATION_SCHEMA.COLUMNS rows of the same table, in Column.FIELDS order
+INFORMATION_SCHEMA_COLUMNS = [
+    ('id', 'bigint', 'NO', 'PRI', None, 'auto_increment', None, 20, 0, '', None),
+    ('user_id', 'int', 'NO', 'MUL', None, '', None, 10, 0, '注文者', None),
+    ('code', 'char', 'NO', 'UNI', 'uuid()', 'DEFAULT_GENERATED', 36, None, None, '', None),
+    ('status', 'enum', 'NO', '', 'new', '', 7, None, None, '', None),
+    ('total', 'decimal', 'NO', '', '0.00', '', None, 10, 2, '', None),
+    ('paid_at', 'timestamp', 'YES', '', None, '', None, None, None, '', 6),
+    ('created_at', 'datetime', 'NO', '', 'CURRENT_TIMESTAMP(3)', 'DEFAULT_GENERATED', None, None, None, '', 3),
+    ('updated_at', 'datetime', 'NO', '', 'CURRENT_TIMESTAMP', 'DEFAULT_GENERATED on update CURRENT_TIMESTAMP',
+     None, None, None, '', 0),
+    ('ship_time', 'time', 'YES', '', None, '', None, None, None, '', 2),
+    ('ship_date', 'date', 'YES', '', None, '', None, None, None, '', None),
+]
+
+@pytest.fixture
+def schema_data(tmp_path):
+    path = tmp_path / 'dump.sql'
+    path.write_text(CREATE_TABLE, encoding='utf-8')
+    schemas = parse_ddl(path)
+    assert [schema['schema'] for schema in schemas] == ['shop']
+    return schemas[0]
+
+def test_columns_match_information_schema(schema_data):
+    columns = schema_data['tables']['orders']['columns']
+    assert [column.to_values() for column in columns] == INFORMATION_SCHEMA_COLUMNS
+    assert columns == [Column.from_values(values) for values in INFORMATION_SCHEMA_COLUMNS]
+
+def test_foreign_keys_match_information_schema(schema_data):
+    (fk,) = schema_data['relationships']
+    assert (fk.table_name, fk.column_name, fk.referenced_table_name, fk.referenced_column_name,
+            fk.constraint_name) == ('orders', 'user_id', 'users', 'id', 'fk_user')
+
+# mysqldump --databases output: two databases, data, a view placeholder and tricky strings
+DUMP = """\
+-- MySQL dump 10.13
+--
+-- Host: localhost    Database: shop
+-- ------------------------------------------------------
+CREATE DATABASE /*!32312 IF NOT EXISTS*/ `shop`;
+USE `shop`;
+DROP TABLE IF EXISTS `users`;
+CREATE TABLE `users` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `name` varchar(32) NOT NULL DEFAULT 'a;b)(' COMMENT 'it''s; not (the) end',
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB;
+INSERT INTO `users` VALUES (1,'CREATE TABLE `fake` (');
+CREATE TABLE `order_lines` (
+  `order_id` int NOT NULL,
+  `line_no` smallint NOT NULL,
+  `user_id` int DEFAULT NULL,
+  PRIMARY KEY (`order_id`,`line_no`),
+  KEY `ix_user_line` (`user_id`,`line_no`),
+  CONSTRAINT `fk_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE SET NULL
+) ENGINE=InnoDB;
+CREATE TABLE `shipments` (
+  `id` int NOT NULL,
+  `order_id` int NOT NULL,
+  `line_no` smallint NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_line` (`order_id`,`line_no`),
+  CONSTRAINT `fk_line` FOREIGN KEY (`order_id`, `line_no`) REFERENCES `order_lines` (`order_id`, `line_no`)
+) ENGINE=InnoDB;
+/*!50001 CREATE VIEW `v_users` AS SELECT 1 AS `id`*/;
+USE `blog`;
+CREATE TABLE `posts` (
+  `id` int NOT NULL,
+  PRIMARY KEY (`id`)
+);
+"""
+
+@pytest.fixture
+def dump_path(tmp_path):
+    path = tmp_path / 'prod.sql'
+    path.write_text(DUMP, encoding='utf-8')
+    return path
+
+def test_every_database_of_a_dump_is_a_schema(dump_path):
+    shop, blog = parse_ddl(dump_path)
+    assert (shop['database'], shop['schema'], blog['schema']) == ('prod', 'shop', 'blog')
+    assert list(shop['tables']) == ['users', 'order_lines', 'shipments']
+    assert list(blog['tables']) == ['posts']
+
+def test_quoted_semicolons_and_parentheses_stay_in_the_statement(dump_path):
+    name = parse_ddl(dump_path)[0]['tables']['users']['columns'][1]
+    assert (name.default, name.comment) == ('a;b)(', "it's; not (the) end")
+
+def test_indexes_and_composite_foreign_keys(dump_path):
+    shop = parse_ddl(dump_path)[0]
+    indexes = [index.to_values() for index in shop['tables']['order_lines']['indexes']]
+    assert indexes == [('PRIMARY', 'order_id', 0, 1), ('PRIMARY', 'line_no', 0, 2),
+                       ('ix_user_line', 'user_id', 1, 1), ('ix_user_line', 'line_no', 1, 2)]
+    columns = {column.name: column.column_key for column in shop['tables']['order_lines']['columns']}
+    assert columns == {'order_id': 'PRI', 'line_no': 'PRI', 'user_id': 'MUL'}
+    assert [fk.to_values() for fk in shop['relationships']] == [
+        ('order_lines', 'user_id', 'users', 'id', 'fk_user', 1),
+        ('shipments', 'order_id', 'order_lines', 'order_id', 'fk_line', 1),
+        ('shipments', 'line_no', 'order_lines', 'line_no', 'fk_line', 2),
+    ]
+
+def test_gzip_dump(tmp_path):
+    path = tmp_path / 'prod.sql.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(DUMP)
+    assert [schema['schema'] for schema in parse_ddl(path)] == ['shop', 'blog']
+
+def test_table_filter_drops_tables_and_foreign_keys_to_them(dump_path):
+    # A database without any selected table is not a schema
+    (shop,) = parse_ddl(dump_path, TableFilter(exclude=['users', 'posts']))
+    assert list(shop['tables']) == ['order_lines', 'shipments']
+    assert {fk.constraint_name for fk in shop['relationships']} == {'fk_line'}
+
+def test_unparseable_statement_names_the_dump(tmp_path):
+    path = tmp_path / 'broken.sql'
+    path.write_text("CREATE TABLE `t` (\n  PRIMARY KEY\n);\n", encoding='utf-8')
+    with pytest.raises(Exception, match="Cannot parse CREATE TABLE in .*broken.sql"):
+        parse_ddl(path)
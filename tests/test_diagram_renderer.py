@@ -0,0 +1,54 @@
+"""Tests for the layout fallback and its interaction with the render cache"""
+
+import subprocess
+
+import pytest
+
+from diagram_renderer import DiagramOptions, command_runner
+from graphviz_erd import GraphvizERDGenerator
+from render_cache import RenderCache
+from schema_model import Column
+
+SCHEMA = {'database': 'db', 'schema': 'shop', 'relationships': [],
+          'tables': {'users': {'columns': [Column.from_row({'COLUMN_NAME': 'id', 'DATA_TYPE': 'int',
+                                                             'IS_NULLABLE': 'NO', 'COLUMN_KEY': 'PRI'})],
+                               'indexes': []}}}
+
+class Commands(list):
+    """Renderer commands run so far; engines in timeouts time out, the others write their output"""
+
+    def __init__(self):
+        super().__init__()
+        self.timeouts = set()
+
+    def __call__(self, cmd, timeout):
+        self.append(cmd[0])
+        if cmd[0] in self.timeouts:
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        with open(cmd[cmd.index('-o') + 1], 'w') as f:
+            f.write(cmd[0])
+
+@pytest.fixture
+def commands():
+    calls = Commands()
+    token = command_runner.set(calls)
+    yield calls
+    command_runner.reset(token)
+
+def _render(cache, tmp_path):
+    options = DiagramOptions(formats=('svg',), layout_engine='dot', layout_timeout=1)
+    output_path = tmp_path / 'shop.pdf'
+    GraphvizERDGenerator(SCHEMA, render_cache=cache, options=options).generate_diagram(output_path)
+    return (tmp_path / 'shop.svg').read_text()
+
+def test_fallback_layout_is_not_cached(tmp_path, commands):
+    cache = RenderCache(tmp_path / 'cache')
+    commands.timeouts.add('dot')
+    assert _render(cache, tmp_path) == 'sfdp'
+    assert commands == ['dot', 'sfdp']
+
+    # Once dot finishes in time its layout is rendered, cached and then served from the cache
+    commands.timeouts.clear()
+    assert _render(cache, tmp_path) == 'dot'
+    assert _render(cache, tmp_path) == 'dot'
+    assert commands == ['dot', 'sfdp', 'dot']
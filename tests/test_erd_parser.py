@@ -0,0 +1,115 @@
+"""Tests for the .er parser and its round trip with ERDGenerator"""
+
+import io
+import pickle
+
+import pytest
+
+from erd_generator import ERDGenerator
+from erd_parser import ERDParseError, Entity, Relationship, iter_erd, split_label
+from schema_model import Column
+
+def _column(name, data_type='int', key='', nullable='YES', comment='', **fields):
+    row = {'COLUMN_NAME': name, 'DATA_TYPE': data_type, 'IS_NULLABLE': nullable, 'COLUMN_KEY': key,
+           'COLUMN_COMMENT': comment}
+    row.update(fields)
+    return Column.from_row(row)
+
+def _write_table(columns):
+    generator = ERDGenerator({'database': 'db', 'tables': {}, 'relationships': []})
+    f = io.StringIO()
+    generator.write_header(f)
+    generator.write_table(f, 'users', {'columns': columns, 'indexes': []})
+    return f.getvalue()
+
+@pytest.mark.parametrize('comment', [
+    'say "hi" here',
+    'free -- text, with (parentheses, and commas)',
+    'back\\slash "quoted, comma" end',
+    '"',
+    'メールアドレス (ログインID)',
+])
+def test_comment_round_trip(comment):
+    text = _write_table([_column('id', key='PRI', nullable='NO', comment=comment),
+                         _column('name', 'varchar', CHARACTER_MAXIMUM_LENGTH=32)])
+    (entity,) = list(iter_erd(text.splitlines()))
+    first, second = entity.attributes
+    assert first.name == 'id'
+    assert first.primary_key
+    assert first.data_type == 'int'
+    assert first.constraints == ('primary key', 'not null')
+    assert first.comment == comment
+    assert second.data_type == 'varchar(32)'
+    assert second.comment == ''
+
+def test_unescaped_quotes_from_older_files_stay_in_the_label():
+    (entity,) = list(iter_erd(['[users]', '*id {label: "int, say "hi" here"}']))
+    assert entity.attributes[0].comment == 'say "hi" here'
+
+def test_multiple_options_after_an_unescaped_quote():
+    (entity,) = list(iter_erd(['[users]', 'id {label: "int, a "b", c", color: "red"}']))
+    assert entity.attributes[0].options == {'label': 'int, a "b", c', 'color': 'red'}
+
+def test_split_label_keeps_commas_inside_parentheses():
+    assert split_label('decimal(10,2), not null, default 0.00, 金額, 税込') == \
+        ('decimal(10,2)', ('not null', 'default 0.00'), '金額, 税込')
+
+def test_relationship_and_entity_order():
+    nodes = list(iter_erd(['title {label: "t"}', '[a]', '*id', '[b]', '+a_id', 'b *--1 a']))
+    assert [type(node) for node in nodes[1:]] == [Entity, Entity, Relationship]
+    assert nodes[3].cardinality == '*--1'
+
+def test_free_text_with_double_dash_is_not_a_relationship():
+    (entity,) = list(iter_erd(['[a]', 'note {label: "text, free -- text"}']))
+    assert entity.attributes[0].comment == 'free -- text'
+
+def test_errors_report_the_line_number():
+    with pytest.raises(ERDParseError) as error:
+        list(iter_erd(['[a]', 'id {label: "int}']))
+    assert error.value.line_number == 2
+
+def test_generated_file_round_trip():
+    schema = {'database': 'db', 'relationships': [
+        {'TABLE_NAME': 'orders', 'COLUMN_NAME': 'user_id', 'REFERENCED_TABLE_NAME': 'users',
+         'REFERENCED_COLUMN_NAME': 'id', 'CONSTRAINT_NAME': 'fk_user'}],
+        'tables': {
+            'users': {'columns': [_column('id', key='PRI', nullable='NO', EXTRA='auto_increment')], 'indexes': []},
+            'orders': {'columns': [_column('id', key='PRI', nullable='NO'),
+                                   _column('user_id', key='MUL', nullable='NO', comment='注文者')],
+                       'indexes': []},
+        }}
+    generator = ERDGenerator(schema)
+    f = io.StringIO()
+    generator.generate_erd_stream(f, schema['tables'].items())
+    users, orders, relationship = iter_erd(f.getvalue().splitlines())
+    assert (users.name, orders.name) == ('users', 'orders')
+    assert users.attributes[0].constraints == ('auto_increment', 'primary key', 'not null')
+    assert orders.attributes[1].constraints == ('foreign key', 'not null')
+    assert orders.attributes[1].comment == '注文者'
+    assert (relationship.source, relationship.cardinality, relationship.target) == ('orders', '*--1', 'users')
+
+def test_key_markers_quoted_names_and_options():
+    entity, relationship = iter_erd(['[`order items`] {bgcolor: "#d0e0d0"}', '*+`order id` {label: "int"}',
+                                     '"order items" +--? users {label: "placed by"}'])
+    assert entity.name == 'order items'
+    assert entity.options == {'bgcolor': '#d0e0d0'}
+    attribute = entity.attributes[0]
+    assert (attribute.name, attribute.primary_key, attribute.foreign_key) == ('order id', True, True)
+    assert relationship.source == 'order items'
+    assert (relationship.source_cardinality, relationship.target_cardinality) == ('+', '?')
+    assert relationship.options == {'label': 'placed by'}
+
+@pytest.mark.parametrize('lines, line_number', [
+    (['id {label: "int"}'], 1),
+    (['[a]', '', '[b'], 3),
+    (['[a]', 'id label: "int"'], 2),
+    (['[a]', 'id {label: int}'], 2),
+])
+def test_invalid_lines(lines, line_number):
+    with pytest.raises(ERDParseError) as error:
+        list(iter_erd(lines))
+    assert error.value.line_number == line_number
+
+def test_parse_errors_can_be_pickled():
+    error = pickle.loads(pickle.dumps(ERDParseError("expected a name", 7)))
+    assert (str(error), error.line_number) == ("line 7: expected a name", 7)
@@ -0,0 +1,31 @@
+"""Tests for the Graphviz ERD generator"""
+
+import pytest
+
+import graphviz_erd
+from graphviz_erd import GraphvizERDGenerator
+from schema_model import Column, ForeignKey
+
+class PlanSeen(Exception):
+    pass
+
+def _schema():
+    columns = [Column.from_row({'COLUMN_NAME': 'id', 'DATA_TYPE': 'int', 'IS_NULLABLE': 'NO', 'COLUMN_KEY': 'PRI'})]
+    return {'database': 'db', 'schema': 'shop',
+            'tables': {name: {'columns': columns, 'indexes': []} for name in ('users', 'orders', 'items')},
+            'relationships': [ForeignKey('orders', 'id', 'users', 'id', 'fk_user'),
+                              ForeignKey('items', 'id', 'orders', 'id', 'fk_order')]}
+
+def test_graph_size_is_counted_per_diagram(tmp_path, monkeypatch):
+    sizes = []
+
+    def layout_plan(options, table_count, edge_count):
+        sizes.append((table_count, edge_count))
+        raise PlanSeen()
+
+    monkeypatch.setattr(graphviz_erd, 'layout_plan', layout_plan)
+    generator = GraphvizERDGenerator(_schema())
+    for _ in range(2):
+        with pytest.raises(PlanSeen):
+            generator.generate_diagram(tmp_path / 'shop.pdf')
+    assert sizes == [(3, 2), (3, 2)]
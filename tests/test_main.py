@@ -0,0 +1,25 @@
+"""Tests for the run configuration of main.py"""
+
+import pytest
+
+import main
+
+@pytest.fixture
+def env_file(tmp_path, monkeypatch):
+    """A .env next to a stand-in main.py, with the required database settings in the environment"""
+    (tmp_path / '.env').write_text('')
+    monkeypatch.setattr(main, '__file__', str(tmp_path / 'main.py'))
+    for name, value in (('DB_HOST', 'db'), ('DB_DATABASE', 'shop'), ('DB_USERNAME', 'erd'),
+                        ('DB_SCHEMA', 'shop')):
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv('ERD_SNAPSHOT', raising=False)
+    monkeypatch.delenv('ERD_STREAM', raising=False)
+
+def test_snapshots_are_saved_by_default(env_file):
+    assert main.load_config(main.parse_args([]))['snapshot']
+
+def test_stream_mode_saves_no_snapshot(env_file):
+    # Streamed tables carry only their unique indexes, which would make the snapshot incomplete
+    config = main.load_config(main.parse_args(['--stream']))
+    assert config['stream']
+    assert not config['snapshot']
@@ -0,0 +1,30 @@
+"""Tests for the batch .er to Markdown converter"""
+
+import logging
+
+import pytest
+
+from markdown_converter import main
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    yield
+    logging.basicConfig(force=True)
+
+def test_bad_files_are_reported_without_stopping_the_batch(tmp_path, capsys):
+    (tmp_path / 'good.er').write_text('[users]\n*id {label: "int, primary key, not null"}\n', encoding='utf-8')
+    (tmp_path / 'latin1.er').write_bytes('[café]\n*id {label: "int, clé"}\n'.encode('latin-1'))
+    (tmp_path / 'broken.er').write_text('id {label: "int"}\n', encoding='utf-8')
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path)])
+    assert exit_info.value.code == 1
+    output = capsys.readouterr().out
+    assert f"Error converting {tmp_path / 'latin1.er'}" in output
+    assert f"Error converting {tmp_path / 'broken.er'}: line 1" in output
+    assert "Converted 1 of 3 .er files" in output
+    assert '| id | int | primary key, not null |' in (tmp_path / 'good.md').read_text(encoding='utf-8')
+
+def test_no_files(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path)])
+    assert "No .er files found" in capsys.readouterr().out
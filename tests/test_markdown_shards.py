@@ -0,0 +1,49 @@
+"""Tests for the token-budgeted Markdown shards"""
+
+import json
+
+from emitters import MarkdownShardEmitter, emit_schema
+from markdown_shards import pack_tables
+from synthetic_schema import synthetic_schema
+from tokens import estimate_tokens
+
+def _emit(output_dir, schema_data, **options):
+    emitter = MarkdownShardEmitter(output_dir, workers=1, **options)
+    emit_schema(schema_data, schema_data['tables'].items(), [emitter])
+    return json.loads((output_dir / 'manifest.json').read_text(encoding='utf-8'))
+
+def test_token_estimates():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcd') == 1
+    assert estimate_tokens('abcde') == 2
+    # Non-ASCII characters count one token each
+    assert estimate_tokens('ab顧客') == 3
+
+def test_cluster_shards_stay_within_the_budget_and_cover_every_table(tmp_path):
+    schema_data = synthetic_schema(60, seed=3)
+    manifest = _emit(tmp_path, schema_data, token_budget=3000)
+    assert len(manifest['shards']) > 1
+    assert sorted(manifest['tables']) == sorted(schema_data['tables'])
+    for entry in manifest['shards']:
+        text = (tmp_path / entry['file']).read_text(encoding='utf-8')
+        assert entry['tokens'] == estimate_tokens(text) <= 3000
+        assert 'over_budget' not in entry
+        for table_name in entry['tables']:
+            assert f"## {table_name}\n" in text
+    index = (tmp_path / 'index.md').read_text(encoding='utf-8')
+    assert all(f"[{entry['file']}]({entry['file']})" in index for entry in manifest['shards'])
+
+def test_connected_tables_that_fit_share_a_shard():
+    edges = [('b', '*--1', 'a'), ('c', '*--1', 'a'), ('e', '*--1', 'd')]
+    tokens = {'a': 40, 'b': 30, 'c': 30, 'd': 50, 'e': 40}
+    assert pack_tables(sorted(tokens), edges, tokens, 100) == [['a', 'b', 'c'], ['d', 'e']]
+
+def test_table_mode_writes_one_file_per_table_and_removes_stale_shards(tmp_path):
+    schema_data = synthetic_schema(5)
+    manifest = _emit(tmp_path, schema_data, mode='table')
+    assert [entry['file'] for entry in manifest['shards']] == [f"table_{number:05d}.md" for number in range(5)]
+
+    # A rerun packed into clusters drops the per-table files of the previous run
+    manifest = _emit(tmp_path, schema_data, token_budget=100000)
+    assert [entry['file'] for entry in manifest['shards']] == ['shard_001.md']
+    assert sorted(path.name for path in tmp_path.glob('*.md')) == ['index.md', 'shard_001.md']
@@ -0,0 +1,72 @@
+"""Tests for the run metrics accumulator and the log level parsing"""
+
+import json
+import logging
+import threading
+
+import pytest
+
+from metrics import RunMetrics, parse_log_level, parse_profiler
+
+def test_phases_are_summed_overall_and_per_schema():
+    metrics = RunMetrics()
+    metrics.add_time('extract', 1.0, 'shop')
+    metrics.add_time('extract', 0.5, 'blog')
+    with metrics.phase('render', 'shop'):
+        pass
+    snapshot = metrics.snapshot()
+    assert snapshot['phases']['extract'] == {'seconds': 1.5, 'count': 2}
+    assert snapshot['phases']['render']['count'] == 1
+    assert snapshot['schema_phases']['shop']['extract'] == 1.0
+    assert set(snapshot['schema_phases']['shop']) == {'extract', 'render'}
+
+def test_phase_is_recorded_when_the_block_raises():
+    metrics = RunMetrics()
+    with pytest.raises(ValueError):
+        with metrics.phase('extract'):
+            raise ValueError
+    assert metrics.snapshot()['phases']['extract']['count'] == 1
+
+def test_queries_update_latency_rows_and_counters_from_many_threads():
+    metrics = RunMetrics()
+
+    def worker():
+        for _ in range(100):
+            metrics.add_query('columns', 0.01, 3)
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.add_query('tables', 0.25, 1)
+    metrics.count('bytes_written', 2048)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['queries']['columns']['count'] == 400
+    assert snapshot['queries']['columns']['rows'] == 1200
+    assert snapshot['queries']['tables']['max_seconds'] == 0.25
+    assert snapshot['counters'] == {'queries': 401, 'rows_fetched': 1201, 'bytes_written': 2048}
+
+def test_write_adds_extra_fields_and_reset_starts_over(tmp_path):
+    metrics = RunMetrics()
+    metrics.add_query('tables', 0.1, 5)
+    output_path = tmp_path / 'metrics.json'
+    metrics.write(output_path, schemas=['shop'])
+    data = json.loads(output_path.read_text(encoding='utf-8'))
+    assert data['schemas'] == ['shop']
+    assert data['counters']['rows_fetched'] == 5
+    assert set(data['peak_rss_kib']) == {'self', 'children'}
+
+    metrics.reset()
+    assert metrics.snapshot()['queries'] == {}
+
+def test_log_level_and_profiler_names():
+    assert parse_log_level('quiet') == logging.WARNING
+    assert parse_log_level('Verbose') == logging.DEBUG
+    assert parse_log_level('info') == logging.INFO
+    with pytest.raises(Exception, match="Unknown log level"):
+        parse_log_level('loud')
+    assert parse_profiler(' cProfile ') == 'cprofile'
+    assert parse_profiler('') == ''
+    with pytest.raises(Exception, match="Unknown profiler"):
+        parse_profiler('perf')
@@ -0,0 +1,69 @@
+"""Tests for the part manifest and stale file cleanup of the partitioned renderers"""
+
+import json
+
+import pytest
+
+import partition_renderer
+from diagram_renderer import DiagramOptions
+from partition_renderer import MANIFEST_NAME, NeighbourhoodRenderer, PartitionRenderer, file_stem
+from schema_model import Column
+
+def _schema(table_names):
+    columns = [Column.from_row({'COLUMN_NAME': 'id', 'DATA_TYPE': 'int', 'IS_NULLABLE': 'NO', 'COLUMN_KEY': 'PRI'})]
+    return {'database': 'db', 'schema': 'shop',
+            'tables': {name: {'columns': columns, 'indexes': []} for name in table_names},
+            'relationships': []}
+
+@pytest.fixture
+def fake_render(monkeypatch):
+    """Replace the erd/Graphviz process pool by writing each part's files"""
+    def render_parts(jobs, workers=None, render_cache=None, options=DiagramOptions()):
+        for part_schema, erd_path, pdf_path in jobs:
+            erd_path.write_text(' '.join(sorted(part_schema['tables'])))
+            for path in partition_renderer.format_paths(pdf_path, options.formats).values():
+                path.write_text(' '.join(sorted(part_schema['tables'])))
+        return []
+    monkeypatch.setattr(partition_renderer, 'render_parts', render_parts)
+
+def _files(directory):
+    return sorted(path.name for path in directory.iterdir())
+
+def test_shrinking_the_part_count_removes_the_last_part(tmp_path, fake_render):
+    options = DiagramOptions(formats=('pdf', 'svg'))
+    PartitionRenderer(_schema(['a', 'b', 'c']), max_tables=1, options=options).render(tmp_path)
+    parts_dir = tmp_path / 'shop_parts'
+    assert 'shop_part003.svg' in _files(parts_dir)
+
+    PartitionRenderer(_schema(['a', 'b']), max_tables=1, options=options,
+                      changed_tables={'c'}).render(tmp_path)
+    assert _files(parts_dir) == [MANIFEST_NAME, 'index.md', 'shop_part001.er', 'shop_part001.pdf',
+                                 'shop_part001.svg', 'shop_part002.er', 'shop_part002.pdf', 'shop_part002.svg']
+    manifest = json.loads((parts_dir / MANIFEST_NAME).read_text())
+    assert sorted(manifest) == ['shop_part001.pdf', 'shop_part002.pdf']
+
+def test_dropping_a_format_removes_its_files(tmp_path, fake_render):
+    PartitionRenderer(_schema(['a']), options=DiagramOptions(formats=('pdf', 'svg'))).render(tmp_path)
+    PartitionRenderer(_schema(['a']), options=DiagramOptions(formats=('pdf',))).render(tmp_path)
+    assert 'shop_part001.svg' not in _files(tmp_path / 'shop_parts')
+
+def test_dropped_table_loses_its_neighbourhood_diagram(tmp_path, fake_render):
+    NeighbourhoodRenderer(_schema(['a', 'b'])).render(tmp_path)
+    NeighbourhoodRenderer(_schema(['a']), changed_tables={'b'}, previous_dir=tmp_path).render(tmp_path)
+    assert _files(tmp_path / 'shop_tables') == [MANIFEST_NAME, 'a.er', 'a.pdf', 'index.md']
+
+def test_file_stems_are_unique_per_table_name():
+    names = ['a b', 'a_b', 'a/b', 'a:b', 'index', 'Index', 'manifest', 'users', '注文']
+    stems = [file_stem(name) for name in names]
+    assert len(set(stems)) == len(names)
+    assert file_stem('users') == 'users'
+    assert file_stem('a b') == file_stem('a b')
+    assert all(stem.replace('_', '').replace('-', '').isalnum() for stem in stems)
+
+def test_tables_with_colliding_names_get_their_own_neighbourhood_files(tmp_path, fake_render):
+    NeighbourhoodRenderer(_schema(['a b', 'a_b'])).render(tmp_path)
+    tables_dir = tmp_path / 'shop_tables'
+    manifest = json.loads((tables_dir / MANIFEST_NAME).read_text())
+    assert len(manifest) == 2
+    assert (tables_dir / 'a_b.pdf').read_text() == 'a_b'
+    assert (tables_dir / f"{file_stem('a b')}.pdf").read_text() == 'a b'
@@ -0,0 +1,106 @@
+"""Tests for the asyncio stage pipeline"""
+
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from diagram_renderer import command_runner, run_command
+from pipeline import Stage, run_pipeline, run_subprocess
+
+def _items(count):
+    return [(f"s{i}", [f"s{i}"]) for i in range(count)]
+
+def _step(name, log):
+    def handler(item):
+        log.append((item[0], name))
+        return item + [name]
+    return handler
+
+def test_every_item_passes_the_stages_in_order():
+    log = []
+    stages = [Stage('extract', _step('extract', log), 3), Stage('emit', _step('emit', log), 2),
+              Stage('render', _step('render', log), 1)]
+    results, failures = run_pipeline(_items(6), stages)
+    assert failures == {}
+    assert results == {f"s{i}": [f"s{i}", 'extract', 'emit', 'render'] for i in range(6)}
+    for key in results:
+        assert [name for item_key, name in log if item_key == key] == ['extract', 'emit', 'render']
+
+def test_a_failed_item_does_not_block_the_others():
+    log = []
+
+    def extract(item):
+        if item[0] == 's1':
+            raise Exception("connection refused")
+        return _step('extract', log)(item)
+
+    stages = [Stage('extract', extract, 1), Stage('render', _step('render', log), 1)]
+    results, failures = run_pipeline(_items(4), stages, queue_size=1)
+    assert sorted(results) == ['s0', 's2', 's3']
+    assert list(failures) == ['s1']
+    assert str(failures['s1']) == "connection refused"
+    # The failed item never reaches the later stages
+    assert not [entry for entry in log if entry[0] == 's1']
+
+def test_failures_in_a_later_stage_are_reported_per_item():
+    def render(item):
+        if item[0] == 's2':
+            raise RuntimeError("dot crashed")
+        return item
+
+    results, failures = run_pipeline(_items(4), [Stage('extract', lambda item: item, 2), Stage('render', render, 2)])
+    assert sorted(results) == ['s0', 's1', 's3']
+    assert isinstance(failures['s2'], RuntimeError)
+
+def test_bounded_queue_limits_how_far_extraction_runs_ahead():
+    pulled = []
+    release = threading.Event()
+    rendering = threading.Event()
+
+    def items():
+        for key, item in _items(10):
+            pulled.append(key)
+            yield key, item
+
+    def render(item):
+        rendering.set()
+        release.wait(10)
+        return item
+
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(
+        result=run_pipeline(items(), [Stage('extract', lambda item: item, 1), Stage('render', render, 1)],
+                            queue_size=1)))
+    thread.start()
+    assert rendering.wait(10)
+    time.sleep(0.2)
+    # One item rendering, one per bounded queue, one in the extract worker and one held by the feeder
+    assert len(pulled) <= 5
+    release.set()
+    thread.join(10)
+    results, failures = outcome['result']
+    assert len(results) == 10
+    assert failures == {}
+
+def test_handlers_run_commands_through_the_event_loop():
+    def render(item):
+        assert command_runner.get() is not None
+        run_command([sys.executable, '-c', 'pass'])
+        if item[0] == 's1':
+            run_command([sys.executable, '-c', 'import sys; sys.exit(3)'])
+        return item
+
+    results, failures = run_pipeline(_items(2), [Stage('render', render, 2)])
+    assert list(results) == ['s0']
+    assert isinstance(failures['s1'], subprocess.CalledProcessError)
+    assert failures['s1'].returncode == 3
+    # The runner is only set inside the pipeline
+    assert command_runner.get() is None
+
+def test_run_subprocess_timeout():
+    with pytest.raises(subprocess.TimeoutExpired):
+        asyncio.run(run_subprocess([sys.executable, '-c', 'import time; time.sleep(10)'], timeout=0.2))
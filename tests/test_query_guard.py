@@ -0,0 +1,91 @@
+"""Tests for the query guard's budgets and MAX_EXECUTION_TIME hints"""
+
+import pytest
+
+from db_connector import MySQLSchemaExtractor
+from query_guard import QueryGuard, add_execution_time_hint
+
+HINT = '/*+ MAX_EXECUTION_TIME(500) */'
+
+def test_hint_follows_the_first_select():
+    assert add_execution_time_hint("SELECT a FROM t WHERE b IN (SELECT c FROM u)", 500) == \
+        f"SELECT {HINT} a FROM t WHERE b IN (SELECT c FROM u)"
+
+@pytest.mark.parametrize('query, expected', [
+    ("/* SELECT in a comment */ SELECT a FROM t", f"/* SELECT in a comment */ SELECT {HINT} a FROM t"),
+    ("-- SELECT first\nSELECT a FROM t", f"-- SELECT first\nSELECT {HINT} a FROM t"),
+    ("WITH cte AS (SELECT a FROM t) SELECT a FROM cte", f"WITH cte AS (SELECT a FROM t) SELECT {HINT} a FROM cte"),
+    ("WITH x AS (SELECT ')' AS p), y AS (SELECT 1) SELECT * FROM x, y",
+     f"WITH x AS (SELECT ')' AS p), y AS (SELECT 1) SELECT {HINT} * FROM x, y"),
+    ("\n    select a from t", f"\n    select {HINT} a from t"),
+    ("SHOW TABLES", "SHOW TABLES"),
+])
+def test_hint_skips_comments_and_cte_bodies(query, expected):
+    assert add_execution_time_hint(query, 500) == expected
+
+def test_hint_is_capped_by_the_remaining_time_budget():
+    guard = QueryGuard(max_execution_time_ms=10000, time_budget=2.0)
+    assert guard.prepare("SELECT 1") == ("SELECT /*+ MAX_EXECUTION_TIME(2000) */ 1", 2000)
+    guard.record(1.75)
+    assert guard.prepare("SELECT 1") == ("SELECT /*+ MAX_EXECUTION_TIME(250) */ 1", 250)
+
+def test_per_query_limit_applies_while_the_budget_is_large():
+    guard = QueryGuard(max_execution_time_ms=300, time_budget=60.0)
+    assert guard.prepare("SELECT 1")[1] == 300
+    assert QueryGuard().prepare("SELECT 1") == ("SELECT 1", 0)
+
+def test_query_budget_exhaustion():
+    guard = QueryGuard(query_budget=2)
+    guard.prepare("SELECT 1")
+    guard.prepare("SELECT 1")
+    with pytest.raises(Exception, match="Query budget exhausted"):
+        guard.prepare("SELECT 1")
+    guard.reset()
+    guard.prepare("SELECT 1")
+
+def test_time_budget_exhaustion():
+    guard = QueryGuard(time_budget=1.0)
+    guard.prepare("SELECT 1")
+    guard.record(1.0)
+    with pytest.raises(Exception, match="Query time budget exhausted"):
+        guard.prepare("SELECT 1")
+
+def test_check_counts_the_running_query():
+    guard = QueryGuard(time_budget=1.0)
+    guard.record(0.5)
+    guard.check(0.4)
+    with pytest.raises(Exception, match="Query time budget exhausted"):
+        guard.check(0.5)
+
+class FakeConnection:
+    unread_result = False
+
+class FakeCursor:
+    """Unbuffered cursor whose batches each take `seconds` of the query time budget"""
+
+    def __init__(self, guard, batches, seconds):
+        self.guard = guard
+        self.batches = batches
+        self.seconds = seconds
+        self.fetches = 0
+
+    def execute(self, query, params):
+        self.query = query
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        # Time spent by parallel extractors sharing the guard
+        self.guard.record(self.seconds)
+        return [(self.fetches,)] * size if self.fetches <= self.batches else []
+
+def test_stream_is_aborted_when_the_time_budget_runs_out():
+    guard = QueryGuard(time_budget=1.0)
+    extractor = MySQLSchemaExtractor({'query_guard': guard, 'fetch_batch_size': 2})
+    extractor.connection = FakeConnection()
+    cursor = FakeCursor(guard, batches=100, seconds=0.3)
+    rows = []
+    with pytest.raises(Exception, match="Query time budget exhausted"):
+        for row in extractor._iter_rows(cursor, "SELECT a FROM t", (), 'stream'):
+            rows.append(row)
+    assert cursor.fetches == 4
+    assert len(rows) == 6
@@ -0,0 +1,77 @@
+"""Tests for the content-addressed render cache and the renderer version probe used in its keys"""
+
+import os
+import subprocess
+import time
+
+import pytest
+
+import render_cache
+from render_cache import RenderCache, normalize_dot_source, normalize_erd_source, tool_version
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch):
+    """Fake dot and erd binaries on PATH, and the subprocess.run calls made to probe them"""
+    for name in ('dot', 'erd'):
+        path = tmp_path / name
+        path.write_text('#!/bin/sh\n')
+        path.chmod(0o755)
+    monkeypatch.setenv('PATH', str(tmp_path))
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append((cmd, kwargs))
+        return subprocess.CompletedProcess(cmd, 0, stdout='', stderr='dot - graphviz version 9.0.0 (0)\n')
+
+    monkeypatch.setattr(render_cache.subprocess, 'run', run)
+    tool_version.cache_clear()
+    yield tmp_path, calls
+    tool_version.cache_clear()
+
+def test_graphviz_is_probed_with_its_version_flag(tools):
+    tmp_path, calls = tools
+    assert tool_version('dot') == 'dot - graphviz version 9.0.0 (0)'
+    [(cmd, kwargs)] = calls
+    assert cmd == [str(tmp_path / 'dot'), '-V']
+    assert kwargs['stdin'] is subprocess.DEVNULL
+
+def test_erd_is_identified_without_running_it(tools):
+    tmp_path, calls = tools
+    assert tool_version('erd').startswith(f"{tmp_path / 'erd'}:")
+    assert calls == []
+
+def test_missing_tool(tools):
+    assert tool_version('circo') is None
+
+def test_key_ignores_comments_and_blank_lines():
+    cache = RenderCache('unused')
+    source = normalize_erd_source("[users]\n*id\n")
+    assert normalize_erd_source("# Generated ERD file\n\n[users]   \n*id\n\n") == source
+    assert cache.key('erd', 'v1', 'pdf', source) == cache.key('erd', 'v1', 'pdf', normalize_erd_source("[users]\n*id"))
+    assert cache.key('erd', 'v1', 'pdf', source) != cache.key('erd', 'v2', 'pdf', source)
+    assert cache.key('erd', 'v1', 'pdf', source) != cache.key('erd', 'v1', 'svg', source)
+    assert normalize_dot_source("// Database ERD\ndigraph {\n}\n") == "digraph {\n}"
+
+def test_store_then_fetch(tmp_path):
+    cache = RenderCache(tmp_path / 'cache')
+    rendered = tmp_path / 'shop.pdf'
+    rendered.write_bytes(b'%PDF diagram')
+    key = cache.key('erd', 'v1', 'pdf', '[users]')
+    assert not cache.fetch(key, 'pdf', tmp_path / 'miss.pdf')
+    cache.store(key, 'pdf', rendered)
+    assert cache.fetch(key, 'pdf', tmp_path / 'hit.pdf')
+    assert (tmp_path / 'hit.pdf').read_bytes() == b'%PDF diagram'
+
+def test_evict_drops_expired_then_least_recently_used_entries(tmp_path):
+    cache = RenderCache(tmp_path / 'cache', max_bytes=20, max_age_days=1)
+    rendered = tmp_path / 'diagram.pdf'
+    rendered.write_bytes(b'x' * 10)
+    now = time.time()
+    keys = [cache.key('erd', 'v1', 'pdf', str(number)) for number in range(4)]
+    for key, age in zip(keys, (2 * 86400, 300, 200, 100)):
+        cache.store(key, 'pdf', rendered)
+        path = cache._entry_path(key, 'pdf')
+        os.utime(path, (now - age, now - age))
+    # The expired entry goes first, then the oldest of the rest until 20 bytes remain
+    assert cache.evict() == 2
+    assert [cache._entry_path(key, 'pdf').exists() for key in keys] == [False, False, True, True]
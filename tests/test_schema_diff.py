@@ -0,0 +1,84 @@
+"""Tests for the table-by-table schema diff"""
+
+import copy
+
+from schema_diff import changed_tables, diff_schemas, has_changes
+from schema_model import Column, ForeignKey, IndexColumn
+
+def _column(name, data_type='int', nullable='NO', key='', comment=''):
+    return Column.from_row({'COLUMN_NAME': name, 'DATA_TYPE': data_type, 'IS_NULLABLE': nullable,
+                            'COLUMN_KEY': key, 'COLUMN_COMMENT': comment})
+
+def _schema():
+    return {
+        'database': 'db', 'schema': 'shop',
+        'tables': {
+            'users': {'columns': [_column('id', key='PRI'), _column('email', 'varchar', key='UNI')],
+                      'indexes': [IndexColumn('PRIMARY', 'id', 0, 1), IndexColumn('uq_email', 'email', 0, 1)]},
+            'orders': {'columns': [_column('id', key='PRI'), _column('user_id', key='MUL')],
+                       'indexes': [IndexColumn('PRIMARY', 'id', 0, 1), IndexColumn('fk_user', 'user_id', 1, 1)]},
+            'logs': {'columns': [_column('id', key='PRI')], 'indexes': []},
+        },
+        'relationships': [ForeignKey('orders', 'user_id', 'users', 'id', 'fk_user')],
+    }
+
+def test_identical_schemas_have_no_changes():
+    diff = diff_schemas(_schema(), _schema())
+    assert not has_changes(diff)
+    assert changed_tables(diff) == set()
+    assert diff['summary'] == {'added_tables': 0, 'dropped_tables': 0, 'altered_tables': 0,
+                               'unchanged_tables': 3}
+
+def test_added_dropped_and_altered_tables():
+    new = _schema()
+    del new['tables']['logs']
+    new['tables']['audit'] = {'columns': [_column('id', key='PRI')], 'indexes': []}
+    new['tables']['users']['columns'][1] = _column('email', 'varchar', key='UNI', comment='login')
+    diff = diff_schemas(_schema(), new)
+    assert diff['added_tables'] == ['audit']
+    assert diff['dropped_tables'] == ['logs']
+    assert diff['altered_tables'] == {'users': {
+        'columns': {'added': [], 'dropped': [], 'altered': {'email': {'COLUMN_COMMENT': ['', 'login']}}},
+        'indexes': {'added': {}, 'dropped': {}, 'altered': {}},
+        'foreign_keys': {'added': {}, 'dropped': {}, 'altered': {}},
+    }}
+    assert changed_tables(diff) == {'audit', 'logs', 'users'}
+    assert diff['summary']['unchanged_tables'] == 1
+
+def test_column_and_index_changes():
+    new = _schema()
+    orders = new['tables']['orders']
+    orders['columns'].append(_column('total', 'decimal', nullable='YES'))
+    orders['columns'][1] = _column('user_id', nullable='YES', key='MUL')
+    orders['indexes'].append(IndexColumn('ix_total', 'total', 1, 1))
+    new['tables']['users']['indexes'][1] = IndexColumn('uq_email', 'email', 1, 1)
+    changes = diff_schemas(_schema(), new)['altered_tables']
+    assert changes['orders']['columns'] == {'added': ['total'], 'dropped': [],
+                                            'altered': {'user_id': {'IS_NULLABLE': ['NO', 'YES']}}}
+    assert changes['orders']['indexes']['added'] == {'ix_total': {'unique': False, 'columns': ['total']}}
+    assert changes['users']['indexes']['altered'] == {'uq_email': {
+        'old': {'unique': True, 'columns': ['email']}, 'new': {'unique': False, 'columns': ['email']}}}
+
+def test_foreign_key_changes_alter_the_source_table_only():
+    new = _schema()
+    new['relationships'] = [ForeignKey('orders', 'user_id', 'users', 'email', 'fk_user')]
+    diff = diff_schemas(_schema(), new)
+    assert changed_tables(diff) == {'orders'}
+    assert diff['altered_tables']['orders']['foreign_keys']['altered'] == {
+        'fk_user': {'old': '(user_id) -> users(id)', 'new': '(user_id) -> users(email)'}}
+
+    new['relationships'] = []
+    diff = diff_schemas(_schema(), new)
+    assert diff['altered_tables']['orders']['foreign_keys']['dropped'] == {'fk_user': '(user_id) -> users(id)'}
+
+def test_index_row_order_does_not_matter():
+    new = _schema()
+    new['tables']['users']['indexes'].reverse()
+    assert not has_changes(diff_schemas(_schema(), new))
+
+def test_diff_does_not_modify_its_inputs():
+    old, new = _schema(), _schema()
+    new['tables']['logs']['columns'].append(_column('message', 'text'))
+    before = copy.deepcopy((old, new))
+    diff_schemas(old, new)
+    assert (old, new) == before
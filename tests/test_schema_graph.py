@@ -0,0 +1,117 @@
+"""Tests for relationship cardinality and the foreign-key graph partitioning"""
+
+import pytest
+
+from schema_graph import ForeignKeyIndex, RelationshipCollector, partition_tables
+from schema_model import Column, ForeignKey, IndexColumn, group_foreign_keys
+
+def _columns(nullable=(), primary=(), names=('order_id', 'line_no', 'sku')):
+    return [Column.from_row({'COLUMN_NAME': name, 'DATA_TYPE': 'int',
+                             'IS_NULLABLE': 'YES' if name in nullable else 'NO',
+                             'COLUMN_KEY': 'PRI' if name in primary else ''})
+            for name in names]
+
+def _index(name, columns, unique=True):
+    return [IndexColumn(name, column, 0 if unique else 1, seq) for seq, column in enumerate(columns, 1)]
+
+# Composite FK shipments(order_id, line_no) -> order_lines(order_id, line_no), rows in reverse ordinal order
+COMPOSITE_FK = [
+    ForeignKey('shipments', 'line_no', 'order_lines', 'line_no', 'fk_line', 2),
+    ForeignKey('shipments', 'order_id', 'order_lines', 'order_id', 'fk_line', 1),
+]
+
+def _edges(table_data, relationships=COMPOSITE_FK):
+    return [(edge.source, edge.cardinality, edge.target)
+            for edge in RelationshipCollector(relationships, {'shipments': table_data}).edges()]
+
+def test_composite_rows_are_grouped_in_ordinal_order():
+    (constraint,) = group_foreign_keys(COMPOSITE_FK)
+    assert constraint.columns == ('order_id', 'line_no')
+    assert constraint.referenced_columns == ('order_id', 'line_no')
+    assert constraint.label == '(order_id, line_no) -> (order_id, line_no)'
+
+@pytest.mark.parametrize('indexes, cardinality', [
+    # Unique index on exactly the FK columns: at most one shipment per order line
+    (_index('uq_line', ['order_id', 'line_no']), '?--1'),
+    # A unique subset of the FK columns is unique too
+    (_index('uq_order', ['order_id']), '?--1'),
+    # Unique only together with another column: many shipments per line
+    (_index('uq_line_sku', ['order_id', 'line_no', 'sku']), '*--1'),
+    (_index('ix_line', ['order_id', 'line_no'], unique=False), '*--1'),
+    # One unique index on one FK column and another on the other do not combine
+    (_index('uq_a', ['order_id', 'sku']) + _index('uq_b', ['line_no', 'sku']), '*--1'),
+])
+def test_composite_source_cardinality(indexes, cardinality):
+    assert _edges({'columns': _columns(), 'indexes': indexes}) == [('shipments', cardinality, 'order_lines')]
+
+def test_any_nullable_fk_column_makes_the_reference_optional():
+    table_data = {'columns': _columns(nullable=('line_no',)), 'indexes': []}
+    assert _edges(table_data) == [('shipments', '*--?', 'order_lines')]
+
+def test_key_flags_are_used_without_index_rows():
+    # Streaming extraction: a composite primary key equal to the FK columns
+    table_data = {'columns': _columns(primary=('order_id', 'line_no'))}
+    assert _edges(table_data) == [('shipments', '?--1', 'order_lines')]
+    # Part of a wider primary key is not unique
+    table_data = {'columns': _columns(primary=('order_id', 'line_no', 'sku'))}
+    assert _edges(table_data) == [('shipments', '*--1', 'order_lines')]
+
+def test_constraints_between_the_same_tables_collapse_to_the_loosest_cardinality():
+    relationships = COMPOSITE_FK + [ForeignKey('shipments', 'sku', 'order_lines', 'sku', 'fk_sku')]
+    table_data = {'columns': _columns(nullable=('sku',)),
+                  'indexes': _index('uq_line', ['order_id', 'line_no'])}
+    (edge,) = RelationshipCollector(relationships, {'shipments': table_data}).edges()
+    assert edge.cardinality == '*--?'
+    assert [constraint.name for constraint in edge.constraints] == ['fk_line', 'fk_sku']
+
+def test_streamed_tables_give_the_same_edges():
+    table_data = {'columns': _columns(), 'indexes': _index('uq_line', ['order_id', 'line_no'])}
+    collector = RelationshipCollector(COMPOSITE_FK)
+    assert collector.edges()[0].cardinality == '*--1'
+    collector.note_table('shipments', table_data)
+    assert [(edge.source, edge.cardinality, edge.target) for edge in collector.edges()] == _edges(table_data)
+
+
+def _fks(*pairs):
+    return [ForeignKey(source, 'ref_id', target, 'id', f"fk_{source}_{target}") for source, target in pairs]
+
+def _check_partition(parts, table_names, max_tables):
+    flat = [name for part in parts for name in part]
+    assert sorted(flat) == sorted(table_names)
+    assert all(0 < len(part) <= max_tables for part in parts)
+
+def test_components_that_fit_stay_whole_and_small_ones_are_packed():
+    relationships = _fks(('b', 'a'), ('c', 'a'), ('e', 'd'))
+    table_names = ['a', 'b', 'c', 'd', 'e', 'f', 'g']
+    parts = partition_tables(table_names, relationships, 4)
+    _check_partition(parts, table_names, 4)
+    assert parts == [['a', 'b', 'c', 'f'], ['d', 'e', 'g']]
+
+def test_giant_component_is_split_around_its_hub():
+    # A star around 'hub' plus a chain hanging off one spoke
+    relationships = _fks(*[(f"s{i}", 'hub') for i in range(6)], ('c1', 's0'), ('c2', 'c1'), ('c3', 'c2'))
+    table_names = ['hub'] + [f"s{i}" for i in range(6)] + ['c1', 'c2', 'c3']
+    parts = partition_tables(table_names, relationships, 5)
+    _check_partition(parts, table_names, 5)
+    hub_part = next(part for part in parts if 'hub' in part)
+    assert len(hub_part) == 5
+    assert all(name in ('hub', 's0', 's1', 's2', 's3') for name in hub_part)
+
+def test_foreign_keys_to_unknown_tables_are_ignored():
+    relationships = _fks(('a', 'missing'), ('b', 'missing'))
+    parts = partition_tables(['a', 'b'], relationships, 1)
+    assert parts == [['a'], ['b']]
+
+def test_partition_is_deterministic_and_accepts_a_prebuilt_index():
+    relationships = _fks(*[(f"t{i}", f"t{i // 3}") for i in range(1, 30)])
+    table_names = [f"t{i}" for i in range(30)]
+    parts = partition_tables(table_names, relationships, 7)
+    _check_partition(parts, table_names, 7)
+    assert parts == partition_tables(list(reversed(table_names)), relationships, 7)
+    assert parts == partition_tables(table_names, ForeignKeyIndex(relationships), 7)
+
+@pytest.mark.parametrize('max_tables', [1, 2, 3, 50])
+def test_every_table_lands_in_exactly_one_part(max_tables):
+    relationships = _fks(('b', 'a'), ('c', 'b'), ('d', 'a'), ('f', 'e'))
+    table_names = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
+    _check_partition(partition_tables(table_names, relationships, max_tables), table_names, max_tables)
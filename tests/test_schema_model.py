@@ -0,0 +1,46 @@
+"""Tests for the slotted schema records and their INFORMATION_SCHEMA row compatibility"""
+
+from schema_model import Column, ForeignKey, IndexColumn, normalize_schema_data
+
+ROW = {'COLUMN_NAME': 'email', 'DATA_TYPE': 'varchar', 'IS_NULLABLE': 'YES', 'COLUMN_KEY': 'UNI',
+       'COLUMN_DEFAULT': None, 'EXTRA': '', 'CHARACTER_MAXIMUM_LENGTH': 255, 'NUMERIC_PRECISION': None,
+       'NUMERIC_SCALE': None, 'COLUMN_COMMENT': 'login', 'DATETIME_PRECISION': None}
+
+def test_column_round_trips_its_row():
+    column = Column.from_row(ROW)
+    assert column.to_dict() == ROW
+    assert column == ROW
+    assert Column.from_values(column.to_values()) == column
+    assert column['CHARACTER_MAXIMUM_LENGTH'] == 255
+    assert column.get('TABLE_NAME', 'missing') == 'missing'
+    assert 'COLUMN_COMMENT' in column and 'TABLE_NAME' not in column
+
+def test_column_flags_follow_key_nullability_and_extra():
+    column = Column.from_row(dict(ROW, COLUMN_KEY='PRI', IS_NULLABLE='NO', EXTRA='auto_increment'))
+    assert (column.is_primary_key, column.is_unique, column.is_multiple) == (True, False, False)
+    assert not column.is_nullable
+    assert column.is_auto_increment
+    assert column['COLUMN_KEY'] == 'PRI' and column['IS_NULLABLE'] == 'NO'
+    indexed = Column.from_row(dict(ROW, COLUMN_KEY='MUL'))
+    assert indexed.is_multiple and indexed.is_nullable and indexed.column_key == 'MUL'
+
+def test_records_are_slotted():
+    column = Column.from_row(ROW)
+    assert not hasattr(column, '__dict__')
+    assert not hasattr(IndexColumn('PRIMARY', 'id', 0, 1), '__dict__')
+
+def test_index_and_foreign_key_values_round_trip():
+    index = IndexColumn.from_values(('uq_email', 'email', '0', '1'))
+    assert index.to_values() == ('uq_email', 'email', 0, 1)
+    fk = ForeignKey.from_row({'TABLE_NAME': 'orders', 'COLUMN_NAME': 'user_id', 'REFERENCED_TABLE_NAME': 'users',
+                              'REFERENCED_COLUMN_NAME': 'id', 'CONSTRAINT_NAME': 'fk_user'})
+    assert fk.ordinal_position == 1
+    assert ForeignKey.from_values(fk.to_values()) == fk
+
+def test_normalize_converts_row_dicts_in_place():
+    schema_data = {'tables': {'users': {'columns': [ROW], 'indexes': [{'INDEX_NAME': 'PRIMARY', 'COLUMN_NAME': 'id',
+                                                                       'NON_UNIQUE': 0, 'SEQ_IN_INDEX': 1}]}},
+                   'relationships': []}
+    normalize_schema_data(schema_data)
+    assert isinstance(schema_data['tables']['users']['columns'][0], Column)
+    assert schema_data['tables']['users']['indexes'] == [IndexColumn('PRIMARY', 'id', 0, 1)]
@@ -0,0 +1,55 @@
+"""Tests for writing and reading schema snapshots"""
+
+import gzip
+import json
+
+import pytest
+
+from schema_diff import diff_schemas, has_changes
+from schema_model import Column, ForeignKey, IndexColumn
+from schema_snapshot import SNAPSHOT_FORMAT, load_snapshot, save_snapshot
+
+def _schema():
+    return {
+        'database': 'db', 'schema': 'shop',
+        'tables': {
+            'orders': {
+                'columns': [
+                    Column.from_row({'COLUMN_NAME': 'id', 'DATA_TYPE': 'int', 'IS_NULLABLE': 'NO', 'COLUMN_KEY': 'PRI'}),
+                    Column.from_row({'COLUMN_NAME': 'created_at', 'DATA_TYPE': 'datetime', 'IS_NULLABLE': 'NO',
+                                     'DATETIME_PRECISION': 0}),
+                ],
+                'indexes': [IndexColumn('PRIMARY', 'id', 0, 1)],
+            },
+        },
+        'relationships': [ForeignKey('orders', 'id', 'orders', 'id', 'fk_self')],
+    }
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / 'shop.snapshot.json.gz'
+    save_snapshot(_schema(), path)
+    assert load_snapshot(path) == _schema()
+
+def test_version_1_snapshot_diffs_clean_against_current_schema(tmp_path):
+    # Version 1 rows have no DATETIME_PRECISION value
+    schema = _schema()
+    v1 = {
+        'format': SNAPSHOT_FORMAT, 'version': 1, 'database': 'db', 'schema': 'shop',
+        'tables': {'orders': {'columns': [list(column.to_values()[:-1]) for column in schema['tables']['orders']['columns']],
+                              'indexes': [list(index.to_values()) for index in schema['tables']['orders']['indexes']]}},
+        'relationships': [list(fk.to_values()) for fk in schema['relationships']],
+    }
+    path = tmp_path / 'old.snapshot.json.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(v1, f)
+
+    old = load_snapshot(path)
+    assert [column.datetime_precision for column in old['tables']['orders']['columns']] == [None, 0]
+    assert not has_changes(diff_schemas(old, schema))
+
+def test_unknown_version_is_rejected(tmp_path):
+    path = tmp_path / 'new.snapshot.json.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump({'format': SNAPSHOT_FORMAT, 'version': 99}, f)
+    with pytest.raises(Exception, match='unsupported version 99'):
+        load_snapshot(path)
@@ -0,0 +1,82 @@
+"""Tests that TableFilter.matches and the SQL LIKE conditions select the same tables"""
+
+import re
+
+import pytest
+
+from table_filter import LIKE_ESCAPE, TableFilter, glob_to_like, parse_table_types
+
+def _like(value, pattern, escape=LIKE_ESCAPE):
+    """MySQL LIKE ... ESCAPE semantics (case-insensitive collation) for the comparison"""
+    regex = ''
+    chars = iter(pattern)
+    for char in chars:
+        if char == escape:
+            regex += re.escape(next(chars))
+        elif char == '%':
+            regex += '.*'
+        elif char == '_':
+            regex += '.'
+        else:
+            regex += re.escape(char)
+    return re.fullmatch(regex, value, re.I | re.S) is not None
+
+def _sql_selects(table_filter, table_name):
+    """Evaluate the include/exclude clauses of condition() for one table name"""
+    condition, params = table_filter.condition('shop')
+    params = list(params)
+    include = [params.pop(0) for _ in table_filter.include]
+    exclude = [params.pop(0) for _ in table_filter.exclude]
+    assert condition.count(f"ESCAPE '{LIKE_ESCAPE}'") == len(include) + len(exclude)
+    return ((not include or any(_like(table_name, pattern) for pattern in include))
+            and not any(_like(table_name, pattern) for pattern in exclude))
+
+TABLE_NAMES = ['user_log', 'userXlog', 'user%log', 'user!log', 'user!!log', 'users', 'USER_LOG', 'user[1]',
+               'user1', 'log_2024_01', 'log_2024x01', 'tmp_!a', '100%', '100x', '']
+
+@pytest.mark.parametrize('include, exclude', [
+    (['user_log'], []),
+    (['user%log'], []),
+    (['user!log'], []),
+    (['user!!log'], []),
+    (['user*'], ['user_*']),
+    (['user?log'], []),
+    (['log_????_??'], []),
+    (['user[1]'], []),
+    (['*!*'], []),
+    (['100%'], []),
+    ([], ['*_*', '*%']),
+    (['tmp_!?'], []),
+])
+def test_python_and_sql_paths_agree(include, exclude):
+    table_filter = TableFilter(include, exclude)
+    for table_name in TABLE_NAMES:
+        assert table_filter.matches(table_name) == _sql_selects(table_filter, table_name), table_name
+
+@pytest.mark.parametrize('pattern, like', [
+    ('user_log', 'user!_log'),
+    ('100%', '100!%'),
+    ('a!b', 'a!!b'),
+    ('*_?', '%!__'),
+    ('user[1]', 'user[1]'),
+])
+def test_glob_to_like(pattern, like):
+    assert glob_to_like(pattern) == like
+
+def test_wildcard_characters_are_literal():
+    table_filter = TableFilter(['user_log', 'user[12]'])
+    assert table_filter.matches('USER_LOG')
+    assert not table_filter.matches('userXlog')
+    assert table_filter.matches('user[12]')
+    assert not table_filter.matches('user1')
+
+def test_table_types():
+    table_filter = TableFilter.parse(table_types='view, base')
+    assert table_filter.table_types == ('VIEW', 'BASE TABLE')
+    assert table_filter.matches('v_users', 'VIEW')
+    assert not table_filter.matches('v_users', 'SYSTEM VIEW')
+    condition, params = table_filter.condition('shop')
+    assert 'TABLE_TYPE IN (%s, %s)' in condition
+    assert params == ('shop', 'VIEW', 'BASE TABLE')
+    with pytest.raises(Exception, match="Unknown table type"):
+        parse_table_types('tables')